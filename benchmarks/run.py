@@ -0,0 +1,295 @@
+"""
+Throughput benchmarks of the migration scripts on synthetic data.
+
+    python benchmarks/run.py export --scales 10k,100k,1m
+    python benchmarks/run.py import --scales 10k,100k,1m
+
+`export` runs from a CarFigures environment, where `carfigures` can be imported. It fills a database
+with `synthetic.py`'s data for every scale (a number of car instances), runs `src/export.py` on it and
+keeps the migration files in `--output`. `import` runs from a Ballsdex environment and imports these
+files into an empty database with `src/import.py`.
+
+The scripts run as they do in an eval command, with stand-ins for `ctx`, `bot` and the status
+message, and the confirmation is answered with `proceed`. Both default to a SQLite database in a
+temporary folder; pass `--db` to use a throwaway PostgreSQL database instead (the importer only uses
+`COPY` there). On PostgreSQL, the source data has no orphaned references, since foreign keys are
+enforced. Every scale runs in its own process, so peak RSS isn't carried over between scales.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import synthetic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SOURCE = Path(__file__).resolve().parent.parent / "src"
+SCALES = "10k,100k,1m"  # Default scales, in car instances.
+MODELS = {"export": "carfigures.core.models", "import": "ballsdex.core.models"}
+
+
+class Message:
+    def __init__(self):
+        self.edits = 0
+        self.embed = None
+
+    async def edit(self, embed=None):
+        self.edits += 1
+        self.embed = embed
+
+
+class Context:
+    """Stands in for the eval command's `ctx`, the status message is kept in `message`."""
+
+    author = "benchmark"
+    channel = "benchmark"
+
+    def __init__(self):
+        self.message: Message | None = None
+
+    async def send(self, content=None, embed=None):
+        if embed is None:
+            return None
+
+        self.message = Message()
+        return self.message
+
+
+class Reply:
+    content = "proceed"
+    author = Context.author
+    channel = Context.channel
+
+
+class Bot:
+    async def wait_for(self, event, check=None, timeout=None):
+        return Reply()
+
+
+def parse_scale(text: str) -> int:
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([km]?)", text.strip().lower())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid scale: {text!r}")
+
+    number, unit = match.groups()
+    return int(float(number) * {"": 1, "k": 1_000, "m": 1_000_000}[unit])
+
+
+def load_script(name: str, ctx: Context) -> dict[str, Any]:
+    """Run a script up to its `main()` call, returning its globals."""
+    path = SOURCE / f"{name}.py"
+    source = re.sub(r"^await main\(\).*$", "", path.read_text(encoding="utf-8"), flags=re.M)
+
+    namespace = {"__name__": "__eval__", "ctx": ctx, "bot": Bot()}
+    exec(compile(source, str(path), "exec"), namespace)
+    return namespace
+
+
+def time_steps(namespace: dict[str, Any]) -> dict[str, float]:
+    """Record how long every step shown in the embed took, such as a section's export."""
+    timings = {}
+    reporter = namespace["ProgressReporter"]
+    finish = reporter.finish
+
+    def timed_finish(self, progress, text):
+        timings[progress.label.removeprefix("- ")] = time.perf_counter() - progress.start
+        finish(self, progress, text)
+
+    reporter.finish = timed_finish
+    return timings
+
+
+def peak_rss() -> tuple[int | None, int | None]:
+    """
+    Peak resident memory of this process and of its largest child (compression workers), in bytes.
+    None where `resource` isn't available.
+    """
+    if resource is None:
+        return None, None
+
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    )
+
+
+async def init_database(mode: str, url: str):
+    from tortoise import Tortoise
+
+    await Tortoise.init(db_url=url, modules={"models": [MODELS[mode]]})
+    await Tortoise.generate_schemas(safe=True)
+
+    if url.startswith("sqlite"):
+        # Real bots have orphaned references, SQLite only allows them with foreign keys off.
+        await Tortoise.get_connection("default").execute_script("PRAGMA foreign_keys=OFF;")
+
+
+async def bench_export(scale: int, url: str, output: Path, workdir: Path) -> dict[str, Any]:
+    await init_database("export", url)
+
+    ctx = Context()
+    namespace = load_script("export", ctx)
+
+    # A database given with `--db` is reused between scales.
+    for migration in reversed(namespace["MIGRATIONS"].values()):
+        await migration["model"].all().delete()
+
+    sizes = await synthetic.populate(namespace["MIGRATIONS"], scale)
+    timings = time_steps(namespace)
+
+    os.chdir(workdir)
+    start = time.perf_counter()
+    await namespace["main"]()
+    elapsed = time.perf_counter() - start
+
+    files = list(workdir.glob("migration.txt*"))
+    if not files:
+        raise RuntimeError(f"the export didn't write a migration file: {ctx.message and ctx.message.embed}")
+
+    target = output / files[0].name.replace("migration", f"migration-{scale}", 1)
+    shutil.move(files[0], target)
+
+    return {"rows": sum(sizes.values()), "seconds": elapsed, "sections": timings, "file": str(target)}
+
+
+async def bench_import(scale: int, url: str, output: Path, workdir: Path) -> dict[str, Any]:
+    files = list(output.glob(f"migration-{scale}.txt*"))
+    if not files:
+        raise RuntimeError(f"no migration file for {scale:,} instances in {output}, run the export benchmark first")
+
+    await init_database("import", url)
+
+    ctx = Context()
+    namespace = load_script("import", ctx)
+    timings = time_steps(namespace)
+
+    # "migration-{scale}.txt.bz2" is imported as "migration.txt.bz2".
+    shutil.copy(files[0], workdir / files[0].name.replace(f"migration-{scale}.txt", namespace["MIGRATION_FILE"], 1))
+    reader = namespace["MigrationReader"](str(files[0]))
+    reader.inspect()
+    rows = reader.total_rows or sum(synthetic.section_sizes(scale).values())
+
+    os.chdir(workdir)
+    start = time.perf_counter()
+    await namespace["main"]()
+    elapsed = time.perf_counter() - start
+
+    # The importer reports its errors in the embed (or a plain message) instead of raising them.
+    embed = ctx.message and ctx.message.embed
+    if embed is None or embed.description != "Status: **FINISHED**":
+        output = "\n".join(namespace["output"])
+        raise RuntimeError(f"the import didn't finish: {embed and embed.description}\n{output}")
+
+    return {"rows": rows, "seconds": elapsed, "sections": timings, "file": str(files[0])}
+
+
+async def run_single(mode: str, scale: int, url: str | None, output: Path) -> dict[str, Any]:
+    from tortoise import Tortoise
+
+    output.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        url = url or f"sqlite://{workdir / 'benchmark.sqlite3'}"
+        bench = bench_export if mode == "export" else bench_import
+
+        try:
+            result = await bench(scale, url, output.resolve(), workdir)
+        finally:
+            os.chdir(SOURCE.parent)
+            await Tortoise.close_connections()
+
+    rss, workers_rss = peak_rss()
+    result.update(
+        mode=mode,
+        scale=scale,
+        rows_per_second=result["rows"] / result["seconds"] if result["seconds"] else 0.0,
+        peak_rss=rss,
+        workers_peak_rss=workers_rss,
+    )
+    return result
+
+
+def format_bytes(size: int | None) -> str:
+    if size is None:
+        return "-"
+
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def report(results: list[dict[str, Any]]):
+    print(f"{'instances':>12} {'rows':>12} {'seconds':>9} {'rows/s':>10} {'peak RSS':>10} {'workers':>10}")
+    for result in results:
+        print(
+            f"{result['scale']:>12,} {result['rows']:>12,} {result['seconds']:>9.2f} "
+            f"{result['rows_per_second']:>10,.0f} {format_bytes(result['peak_rss']):>10} "
+            f"{format_bytes(result['workers_peak_rss']):>10}"
+        )
+
+    steps = list(dict.fromkeys(step for result in results for step in result["sections"]))
+    if not steps:
+        return
+
+    width = max(len(step) for step in steps)
+    print()
+    print(f"{'seconds per step':<{width}} " + " ".join(f"{result['scale']:>12,}" for result in results))
+    for step in steps:
+        times = [result["sections"].get(step) for result in results]
+        print(f"{step:<{width}} " + " ".join(f"{t:>12.2f}" if t is not None else f"{'-':>12}" for t in times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the migration scripts on synthetic data.")
+    parser.add_argument("mode", choices=["export", "import"])
+    parser.add_argument("--scales", default=SCALES, help=f"comma-separated car instance counts (default: {SCALES})")
+    parser.add_argument("--db", help="database URL, a fresh SQLite database by default")
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "output")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scales = [parse_scale(scale) for scale in args.scales.split(",")]
+
+    if args.single:
+        print(json.dumps(asyncio.run(run_single(args.mode, scales[0], args.db, args.output))))
+        return
+
+    results = []
+    for scale in scales:
+        command = [sys.executable, __file__, args.mode, "--single", "--scales", str(scale), "--output", str(args.output)]
+        if args.db:
+            command += ["--db", args.db]
+
+        print(f"Running the {args.mode} benchmark with {scale:,} car instances...", file=sys.stderr)
+        process = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            raise SystemExit(f"The benchmark with {scale:,} car instances failed.")
+
+        # The scripts print their own messages, the result is the last line.
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        report(results)
+
+
+if __name__ == "__main__":
+    main()
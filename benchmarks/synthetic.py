@@ -0,0 +1,157 @@
+"""
+CarFigures-shaped synthetic data for the benchmarks.
+
+The rows are built from the models of `export.py`'s `MIGRATIONS`, so every field the bot defines is
+filled, with the quirks real bots have: a few players own most instances, some instances reference
+players or cars that don't exist, Events and Exclusives share ids and some car emojis aren't valid
+Discord ids.
+"""
+
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterator
+
+INSERT_BATCH_SIZE = 10_000  # Rows per `bulk_create` when filling the source database.
+PLAYER_RATIO = 20  # Car instances per player on average.
+OWNERSHIP_SKEW = 3.0  # Higher values give more instances to the first players, 1 spreads them evenly.
+ORPHAN_RATE = 0.005  # Share of car instances referencing a player or car that doesn't exist.
+BAD_EMOJI_RATE = 0.05  # Share of cars whose emoji isn't a 17-19 digit Discord id.
+OPTIONAL_FK_RATE = 0.1  # Share of nullable references that are set, such as an instance's event.
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def section_sizes(instances: int) -> dict[str, int]:
+    """Number of rows of every `MIGRATIONS` section for a bot with `instances` car instances."""
+    players = max(instances // PLAYER_RATIO, 10)
+    trades = max(instances // 200, 5)
+
+    return {
+        "R": 5,
+        "E": 12,
+        "S-EV": 20,
+        "S-EX": 12,  # Shares its ids with the first Events.
+        "B": 250,
+        "P": players,
+        "BI": instances,
+        "GC": max(instances // 2_000, 5),
+        "F": max(players // 4, 5),
+        "BU": max(players // 500, 1),
+        "BG": max(players // 5_000, 1),
+        "T": trades,
+        "TO": trades * 3,
+    }
+
+
+def relations(model) -> dict[str, tuple[Any, bool]]:
+    """Map the id column of every foreign key of `model` to its related model and nullability."""
+    meta = model._meta
+    result = {}
+
+    for name in meta.fk_fields | meta.o2o_fields:
+        field = meta.fields_map[name]
+        result[field.source_field or f"{name}_id"] = (field.related_model, field.null)
+
+    return result
+
+
+def field_value(name: str, field, index: int, rng: random.Random) -> Any:
+    """A plausible value for a data field, based on its type."""
+    enum_type = getattr(field, "enum_type", None)
+    if enum_type is not None:
+        return list(enum_type)[0]
+
+    kind = type(field).__name__
+
+    if kind == "BigIntField":
+        return 100_000_000_000_000_000 + index  # Snowflake-sized, and unique for the unique ones.
+    if kind in ("IntField", "SmallIntField"):
+        return index if field.unique else rng.randint(-20, 500)
+    if kind in ("FloatField", "DecimalField"):
+        return round(rng.uniform(0.01, 2.0), 4)
+    if kind == "BooleanField":
+        return rng.random() > 0.1
+    if kind == "DatetimeField":
+        return EPOCH + timedelta(seconds=index * 37)
+    if kind == "DateField":
+        return date(2023, 1, 1) + timedelta(days=index % 1_000)
+    if kind == "JSONField":
+        return {}
+    if kind in ("CharField", "TextField"):
+        value = f"{name} {index}"
+        if name.lower().endswith(("image", "picture", "card")):
+            value = f"/static/uploads/{name}-{index}.png"
+        max_length = getattr(field, "max_length", None)
+        return value[-max_length:] if max_length else value
+
+    return None
+
+
+def rows(key: str, model, count: int, sizes: dict[str, int], models: dict[str, Any], rng: random.Random) -> Iterator[dict]:
+    """Yield `count` rows of `model`, with ids from 1 to `count`."""
+    meta = model._meta
+    foreign_keys = relations(model)
+    counts = {models[section]: size for section, size in sizes.items()}
+    fields = [
+        (name, field)
+        for name, field in meta.fields_map.items()
+        if name in meta.db_fields and name != meta.pk_attr and name not in foreign_keys
+    ]
+    players = counts.get(models["P"], 1)
+    # Rows of models with unique pairs, like friendships, get distinct references.
+    distinct = bool(meta.unique_together)
+
+    for index in range(1, count + 1):
+        row = {meta.pk_attr: index}
+
+        for name, field in fields:
+            if field.null and field.default is None and rng.random() < 0.5:
+                row[name] = None
+            else:
+                row[name] = field_value(name, field, index, rng)
+
+        for position, (column, (related_model, nullable)) in enumerate(foreign_keys.items()):
+            size = counts.get(related_model, 1)
+
+            if distinct:
+                row[column] = 1 + (index + position) % size
+            elif nullable and rng.random() > OPTIONAL_FK_RATE:
+                row[column] = None
+            elif related_model is models["P"]:
+                # Most instances belong to the first players, like on a real bot.
+                row[column] = 1 + int(players * rng.random() ** OWNERSHIP_SKEW)
+            else:
+                row[column] = rng.randint(1, size)
+
+            if key == "BI" and not nullable and rng.random() < ORPHAN_RATE:
+                row[column] = size + rng.randint(1, 1_000)
+
+        if key == "B":
+            emoji = next((name for name, _ in fields if name.lower().startswith("emoji")), None)
+            if emoji is not None and isinstance(row[emoji], int) and rng.random() < BAD_EMOJI_RATE:
+                row[emoji] = rng.randint(1, 10**6)
+
+        yield row
+
+
+async def populate(migrations: dict[str, dict[str, Any]], instances: int, seed: int = 0) -> dict[str, int]:
+    """Fill the initialized Tortoise database with a bot of `instances` car instances."""
+    rng = random.Random(seed)
+    sizes = section_sizes(instances)
+    models = {key: migration["model"] for key, migration in migrations.items()}
+
+    for key, migration in migrations.items():
+        model = migration["model"]
+        batch = []
+
+        for row in rows(key, model, sizes[key], sizes, models, rng):
+            batch.append(model(**row))
+
+            if len(batch) >= INSERT_BATCH_SIZE:
+                await model.bulk_create(batch)
+                batch = []
+
+        if batch:
+            await model.bulk_create(batch)
+
+    return sizes
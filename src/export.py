@@ -1,10 +1,33 @@
+import asyncio
 import bz2
+import contextlib
+import contextvars
+import cProfile
+import functools
+import gzip
+import io
+import json
+import lzma
+import multiprocessing
 import os
+import pstats
+import shutil
+import struct
+import sys
+import tempfile
+import threading
 import time
 import traceback
-from typing import Any
+import tracemalloc
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import IO, Any, AsyncIterator, Iterator
 
 import discord
+from tortoise import Tortoise
+from tortoise.expressions import Q
 from carfigures.core.models import (
     BlacklistedGuild,
     BlacklistedUser,
@@ -21,12 +44,38 @@ from carfigures.core.models import (
     TradeObject,
 )
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 __version__ = "1.0.1"
 
+FORMAT_VERSION = 2  # 1 is the original text format, 2 stores each chunk of a section as typed columns.
+WRITE_CHUNK_SIZE = 10_000  # Rows buffered in memory before being written to the file.
+QUERY_CHUNK_SIZE: int | None = 10_000  # Rows fetched per query, `None` fetches a section in one query.
+EXPORT_CONCURRENCY = 4  # Sections exported at once over the connection pool, 1 exports them in order.
+COMPRESSION = "bz2"  # Codec from `CODECS` used to compress the migration file.
+COMPRESSION_WORKERS = os.cpu_count() or 1  # Processes compressing blocks, 0 compresses in the bot process.
+COMPRESSION_BLOCK_SIZE = 8 * 1024**2  # Uncompressed bytes per independently compressed stream.
+COMPARE_CODECS = False  # Benchmarks every codec on a sample of the exported data once finished.
+CODEC_SAMPLE_SIZE = 16 * 1024**2  # Uncompressed bytes used for the codec comparison.
+DELTA = False  # Exports only the rows added or changed since the last export, see `WATERMARK_FILE`.
+WATERMARK_FILE = "migration_watermark.json"  # Highest ID and timestamp of every section at the last export.
+PROGRESS_INTERVAL = 2.0  # Seconds between embed updates, the states in between are skipped.
+METRICS_FILE = "migration_metrics.json"  # Time, CPU time, rows and queries of every phase, written when the export ends.
+PROFILE = None  # "cprofile" or "tracemalloc" profiles the `PROFILE_PHASE` phase into `PROFILE_FILE`.
+PROFILE_PHASE = "slowest"  # Phase profiled with `PROFILE`, "slowest" is the slowest phase in the last `METRICS_FILE`.
+PROFILE_FILE = "migration_profile.txt"  # Report of the profiled phase.
+
+# Delta exports only keep the rows of a section with a higher ID or a newer `timestamp` than at the
+# last export, plus the rows referenced by new rows of its `changed_by` section (trades move instances).
+# Sections with `"delta": "all"` are small and edited in place, so they're always exported in full.
 MIGRATIONS: dict[str, dict[str, Any]] = {
     "R": {
         "model": CarType,
         "process": "CarType",
+        "delta": "all",
         "values": [
             "name",
             "image",
@@ -35,6 +84,7 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "E": {
         "model": Country,
         "process": "Country",
+        "delta": "all",
         "values": [
             "name",
             "image",
@@ -43,6 +93,7 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "S-EV": {
         "model": Event,
         "process": "Event",
+        "delta": "all",
         "values": [
             "name",
             "rarity",
@@ -60,6 +111,7 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "S-EX": {
         "model": Exclusive,
         "process": "Exclusive",
+        "delta": "all",
         "values": [
             "name",
             "image",
@@ -73,6 +125,7 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "B": {
         "model": Car,
         "process": "Car",
+        "delta": "all",
         "values": [
             "cartype_id",
             "fullName",
@@ -104,6 +157,8 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "BI": {
         "model": CarInstance,
         "process": "CarInstance",
+        "timestamp": "catchDate",
+        "changed_by": ("TO", "carinstance_id"),
         "values": [
             "car_id",
             "player_id",
@@ -124,27 +179,36 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     "GC": {
         "model": GuildConfig,
         "process": "GuildConfig",
+        "delta": "all",
         "values": ["guild_id"],
         "defaults": {"spawnChannel": None, "enabled": True},
     },
     "F": {
         "model": Friendship,
         "process": "Friendship",
+        "timestamp": "since",
         "values": ["friender_id", "friended_id", "since"],
     },
     "BU": {
         "model": BlacklistedUser,
         "process": "BlacklistedUser",
+        "delta": "all",
         "values": ["discord_id"],
         "defaults": {"reason": None, "date": None},
     },
     "BG": {
         "model": BlacklistedGuild,
         "process": "BlacklistedGuild",
+        "delta": "all",
         "values": ["discord_id"],
         "defaults": {"reason": None, "date": None},
     },
-    "T": {"model": Trade, "process": "Trade", "values": ["player1_id", "player2_id", "date"]},
+    "T": {
+        "model": Trade,
+        "process": "Trade",
+        "timestamp": "date",
+        "values": ["player1_id", "player2_id", "date"],
+    },
     "TO": {
         "model": TradeObject,
         "process": "TradeObject",
@@ -152,9 +216,52 @@ MIGRATIONS: dict[str, dict[str, Any]] = {
     },
 }
 
+# Every codec supports concatenated streams, so independently compressed blocks form a valid file.
+CODECS: dict[str, dict[str, Any]] = {
+    "bz2": {
+        "extension": ".bz2",
+        "open": bz2.open,
+        "compress": bz2.compress,
+        "decompress": bz2.decompress,
+    },
+    "gzip": {
+        "extension": ".gz",
+        "open": gzip.open,
+        "compress": functools.partial(gzip.compress, compresslevel=6),
+        "decompress": gzip.decompress,
+    },
+    "lzma": {
+        "extension": ".xz",
+        "open": lzma.open,
+        "compress": lzma.compress,
+        "decompress": lzma.decompress,
+    },
+    "none": {
+        "extension": "",
+        "open": open,
+        "compress": None,
+        "decompress": None,
+    },
+}
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    pass
+else:
+    CODECS["zstd"] = {
+        "extension": ".zst",
+        "open": zstd.open,
+        "compress": zstd.compress,
+        "decompress": zstd.decompress,
+    }
+
 
 output = []
 
+# Highest ID and timestamp exported from every section, saved to `WATERMARK_FILE` once finished.
+watermarks: dict[str, dict[str, Any]] = {}
+
 
 def reload_embed(start_time: float | None = None, file: str | None = None, status="RUNNING"):
     embed = discord.Embed(
@@ -171,7 +278,14 @@ def reload_embed(start_time: float | None = None, file: str | None = None, statu
             embed.color = discord.Color.red()
 
     if len(output) > 0:
-        embed.add_field(name="Output", value="\n".join(output))
+        # Fields hold at most 1024 characters, the latest lines are shown.
+        output_text = "\n".join(output[-20:])
+        if len(output_text) > 1000:
+            output_text = "...\n" + output_text[-1000:]
+        embed.add_field(name="Output", value=output_text)
+
+    if status != "RUNNING" and metrics.phases:
+        embed.add_field(name="Slowest phases", value="\n".join(metrics.lines()), inline=False)
 
     if file:
         embed.add_field(
@@ -186,6 +300,318 @@ def reload_embed(start_time: float | None = None, file: str | None = None, statu
     return embed
 
 
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """Row counter of a section, rendered into its `output` line with its throughput and ETA."""
+
+    def __init__(self, line: int, label: str, total: int | None = None):
+        self.line = line
+        self.label = label
+        self.total = total
+        self.estimated = False  # The total is the database's estimate, not an exact count.
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def render(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+
+        if self.total is None:
+            parts = [f"{self.done:,} rows"]
+        else:
+            parts = [f"{self.done:,}/{'~' if self.estimated else ''}{self.total:,} rows"]
+        parts.append(f"{rate:,.0f} rows/s")
+        if self.total is not None and rate > 0 and self.done < self.total:
+            parts.append(f"ETA {format_duration((self.total - self.done) / rate)}")
+
+        return f"{self.label}... ({', '.join(parts)})"
+
+
+class ProgressReporter:
+    """
+    Updates the embed in the background.
+
+    Sections only append to `output` or update their `Progress` counters, then call `refresh()`,
+    which doesn't wait. The embed is edited at most every `PROGRESS_INTERVAL` seconds with the
+    latest state, so the export never waits on Discord between chunks.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        self.progress: list[Progress] = []
+        self.changed = asyncio.Event()
+        self.closed = False
+        self.task = asyncio.create_task(self.run())
+
+    def track(self, label: str, total: int | None = None) -> Progress:
+        """Add a progress line for a section to `output`."""
+        output.append(f"{label}...")
+        progress = Progress(len(output) - 1, label, total)
+        self.progress.append(progress)
+        self.refresh()
+        return progress
+
+    def finish(self, progress: Progress, text: str):
+        """Replace a section's progress line with its final text."""
+        self.progress.remove(progress)
+        output[progress.line] = text
+        self.refresh()
+
+    def refresh(self):
+        self.changed.set()
+
+    def embed(self, *args, **kwargs) -> discord.Embed:
+        for progress in self.progress:
+            output[progress.line] = progress.render()
+        return reload_embed(*args, **kwargs)
+
+    async def run(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+
+            try:
+                await self.message.edit(embed=self.embed())
+            except discord.HTTPException:
+                pass  # Rate limited or unavailable, the next update carries the same state.
+
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    async def close(self, *args, **kwargs):
+        """Stop the background updates and show the final state right away, arguments go to `reload_embed()`."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+        try:
+            await self.message.edit(embed=self.embed(*args, **kwargs))
+        except discord.HTTPException:
+            pass  # The export itself is done, only its status message is out of date.
+
+
+class Measurement:
+    """A running phase. Nested phases add their time to it, `rows` can be set before it ends."""
+
+    __slots__ = ("rows", "child_wall", "child_cpu")
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+
+
+class PhaseTotals:
+    __slots__ = ("calls", "rows", "wall", "cpu", "slowest")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.slowest = 0.0
+
+
+class Metrics:
+    """
+    Wall time, CPU time, rows and calls of every phase of the export, per model.
+
+    Time spent in a nested phase only counts for that phase. Phases running at the same time,
+    like sections exported at once, each count their own time, so they can add up to more than
+    the total. Phases on the database count one call per query and keep the slowest one. CPU time
+    is the thread's, so a phase waiting on the database also counts what the event loop ran meanwhile.
+    """
+
+    def __init__(self):
+        self.phases: dict[tuple[str, str], PhaseTotals] = {}
+        self.current: contextvars.ContextVar[Measurement | None] = contextvars.ContextVar("phase", default=None)
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.profile_phase: str | None = None
+        self.profiling = 0
+        self.profiler: cProfile.Profile | None = None
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.traced_peak = 0
+
+    def begin(self):
+        """Start timing the export and pick the phase `PROFILE` profiles."""
+        self.start = time.perf_counter()
+
+        if PROFILE is None:
+            return
+
+        self.profile_phase = PROFILE_PHASE
+
+        if PROFILE_PHASE == "slowest":
+            # The slowest phase of the last run, the first phases are the slowest.
+            try:
+                with open(METRICS_FILE, encoding="utf-8") as f:
+                    self.profile_phase = next(iter(json.load(f)["totals"]), None)
+            except (OSError, ValueError, KeyError):
+                self.profile_phase = None
+
+        if self.profile_phase is None:
+            output.append(f"- No `{METRICS_FILE}` from a previous run to find the slowest phase, nothing is profiled.")
+
+    @contextlib.contextmanager
+    def measure(self, phase: str, model=None, rows: int = 0) -> Iterator[Measurement]:
+        """Time a phase. It mustn't wrap a `yield`, or the consumer's time would count too."""
+        measurement = Measurement(rows)
+        parent = self.current.get()
+        token = self.current.set(measurement)
+        profiling = phase == self.profile_phase and self.start_profile()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield measurement
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+
+            if profiling:
+                self.stop_profile()
+
+            self.current.reset(token)
+
+            if parent is not None:
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+
+            key = (phase, model.__name__ if model is not None else "")
+
+            with self.lock:
+                totals = self.phases.get(key)
+                if totals is None:
+                    totals = self.phases[key] = PhaseTotals()
+
+                totals.calls += 1
+                totals.rows += measurement.rows
+                totals.wall += wall - measurement.child_wall
+                totals.cpu += cpu - measurement.child_cpu
+                totals.slowest = max(totals.slowest, wall)
+
+    def start_profile(self) -> bool:
+        with self.lock:
+            self.profiling += 1
+            if self.profiling > 1:
+                return True
+
+            if PROFILE == "cprofile":
+                self.profiler = self.profiler or cProfile.Profile()
+                try:
+                    self.profiler.enable()
+                except ValueError:
+                    # Another profiler is active, such as one in another thread.
+                    self.profiling -= 1
+                    return False
+            elif PROFILE == "tracemalloc":
+                tracemalloc.start()
+
+        return True
+
+    def stop_profile(self):
+        with self.lock:
+            self.profiling -= 1
+            if self.profiling > 0:
+                return
+
+            if PROFILE == "cprofile":
+                self.profiler.disable()
+            elif PROFILE == "tracemalloc":
+                # The allocations of the call that used the most memory are kept.
+                peak = tracemalloc.get_traced_memory()[1]
+                if peak > self.traced_peak:
+                    self.traced_peak = peak
+                    self.snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+
+    def totals(self) -> dict[str, PhaseTotals]:
+        """The totals of every phase over all models, slowest first."""
+        totals = {}
+
+        for (phase, _), phase_totals in self.phases.items():
+            total = totals.setdefault(phase, PhaseTotals())
+            total.calls += phase_totals.calls
+            total.rows += phase_totals.rows
+            total.wall += phase_totals.wall
+            total.cpu += phase_totals.cpu
+            total.slowest = max(total.slowest, phase_totals.slowest)
+
+        return dict(sorted(totals.items(), key=lambda item: -item[1].wall))
+
+    def lines(self, limit: int = 6) -> list[str]:
+        """The slowest phases, for the final embed."""
+        lines = []
+
+        for phase, totals in list(self.totals().items())[:limit]:
+            line = f"- {phase}: {totals.wall:.2f}s (CPU {totals.cpu:.2f}s"
+            if totals.rows:
+                line += f", {totals.rows / totals.wall if totals.wall else 0:,.0f} rows/s"
+            lines.append(line + ")")
+
+        return lines
+
+    def write(self):
+        """Write every phase to `METRICS_FILE`, and the profile of `profile_phase` to `PROFILE_FILE`."""
+
+        def describe(totals: PhaseTotals) -> dict[str, Any]:
+            return {
+                "calls": totals.calls,
+                "rows": totals.rows,
+                "wall": round(totals.wall, 6),
+                "cpu": round(totals.cpu, 6),
+                "slowest_call": round(totals.slowest, 6),
+                "rows_per_second": round(totals.rows / totals.wall, 1) if totals.rows and totals.wall else None,
+            }
+
+        report = {
+            "generated": datetime.now().isoformat(),
+            "wall": round(time.perf_counter() - self.start, 6),
+            # Linux reports kilobytes, macOS bytes.
+            "peak_rss": (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+                if resource is not None
+                else None
+            ),
+            "totals": {phase: describe(totals) for phase, totals in self.totals().items()},
+            "phases": [
+                {"phase": phase, "model": model, **describe(totals)}
+                for (phase, model), totals in sorted(self.phases.items(), key=lambda item: -item[1].wall)
+            ],
+        }
+
+        with open(METRICS_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        if self.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(50)
+            profile = f"cProfile of the {self.profile_phase} phase\n\n{stream.getvalue()}"
+        elif self.snapshot is not None:
+            statistics = self.snapshot.statistics("lineno")[:30]
+            profile = f"tracemalloc of the {self.profile_phase} phase, peak {self.traced_peak:,} bytes\n\n"
+            profile += "\n".join(str(statistic) for statistic in statistics)
+        else:
+            return
+
+        with open(PROFILE_FILE, "w", encoding="utf-8") as f:
+            f.write(profile + "\n")
+
+
+metrics = Metrics()
+
+
 def convert_size(bytes: int) -> str:
     if bytes < 1024:
         return f"{bytes} bytes"
@@ -199,23 +625,282 @@ def convert_size(bytes: int) -> str:
     return f"{bytes / (1024 ** 3):.2f} GB"
 
 
-async def process(entry: str, migration) -> str:
-    content = []
+def create_pool(workers: int) -> ProcessPoolExecutor | None:
+    if workers <= 0:
+        return None
 
-    first_instance = True
-    values = set(migration["values"] + ["id"])
-    has_defaults = "defaults" in migration
+    # Workers only run stdlib compressors. Forking avoids re-importing the bot's entry point,
+    # which the "spawn" and "forkserver" start methods would do.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
 
-    if has_defaults:
-        values.update(list(migration["defaults"].keys()))
+    return ProcessPoolExecutor(workers)
 
-    values = sorted(values, key=lambda x: (x != "id", x))
 
-    async for model in migration["model"].all().order_by("id").values_list(*values):
-        model_dict = dict(zip(values, model))
+class BlockWriter:
+    """
+    Writer that compresses fixed-size blocks as independent streams.
+
+    Blocks are compressed in a process pool and written in order, so the file is a valid
+    multi-stream file that the codec's `open` reads like a single stream. Sections start on
+    a new block, and `index` records every block and section so they can be read on their own.
+    Waiting for the workers is awaited, so the bot keeps running while blocks are compressed.
+    """
+
+    def __init__(
+        self, file: IO[bytes], codec: str, workers: int, block_size: int = COMPRESSION_BLOCK_SIZE
+    ):
+        self.file = file
+        self.compress = CODECS[codec]["compress"]
+        self.pool = create_pool(workers) if self.compress is not None else None
+        self.block_size = block_size
+        self.window = max(workers, 1) * 2
+
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        self.pending: deque[tuple[Future, int]] = deque()
+
+        self.written = 0  # Uncompressed bytes received.
+        self.submitted = 0  # Blocks compressed or being compressed.
+        self.section: dict[str, Any] | None = None
+
+        # Blocks are `[offset, compressed size, uncompressed size]`, offsets are relative to the
+        # first block. Sections point to a range of blocks and their uncompressed byte range.
+        self.index: dict[str, Any] = {"size": 0, "blocks": [], "sections": {}}
+
+    async def write(self, data: bytes) -> int:
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.written += len(data)
+
+        if self.buffered >= self.block_size:
+            await self.flush_block()
+
+        return len(data)
+
+    async def start_section(self, key: str):
+        await self.flush_block()
+
+        self.section = {"rows": 0, "offset": self.written, "size": 0, "blocks": [self.submitted, 0]}
+        self.index["sections"][key] = self.section
+
+    async def end_section(self, rows: int):
+        await self.flush_block()
+
+        self.section["rows"] = rows
+        self.section["size"] = self.written - self.section["offset"]
+        self.section["blocks"][1] = self.submitted
+        self.section = None
+
+    def write_block(self, data: bytes, size: int):
+        with metrics.measure("write"):
+            self.file.write(data)
+
+        self.index["blocks"].append([self.index["size"], len(data), size])
+        self.index["size"] += len(data)
+
+    async def flush_block(self):
+        if self.buffered == 0:
+            return
+
+        block = b"".join(self.buffer)
+
+        self.buffer.clear()
+        self.buffered = 0
+        self.submitted += 1
+
+        if self.compress is None:
+            self.write_block(block, len(block))
+            return
+
+        if self.pool is None:
+            with metrics.measure("compress"):
+                compressed = await asyncio.to_thread(self.compress, block)
+            self.write_block(compressed, len(block))
+            return
+
+        self.pending.append((self.pool.submit(self.compress, block), len(block)))
+
+        # Write finished blocks and keep at most `window` blocks in flight.
+        while self.pending and (self.pending[0][0].done() or len(self.pending) >= self.window):
+            await self.write_pending()
+
+    async def write_pending(self):
+        """Write the oldest block being compressed, the wait for the workers counts as compression."""
+        future, size = self.pending.popleft()
+        with metrics.measure("compress"):
+            compressed = await asyncio.wrap_future(future)
+        self.write_block(compressed, size)
+
+    async def close(self, abort: bool = False):
+        try:
+            if not abort:
+                await self.flush_block()
+
+                while self.pending:
+                    await self.write_pending()
+        finally:
+            if self.pool is not None:
+                # Shutting down waits for the blocks still being compressed.
+                await asyncio.to_thread(self.pool.shutdown, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close(abort=exc_type is not None)
+
+
+def compare_codecs(sample: bytes) -> list[str]:
+    """Measures the ratio and single-core throughput of every codec on `sample`."""
+    results = []
+    size_mb = len(sample) / 1024**2
+
+    for name, codec in CODECS.items():
+        if codec["compress"] is None:
+            continue
+
+        start = time.perf_counter()
+        compressed = codec["compress"](sample)
+        compress_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        codec["decompress"](compressed)
+        decompress_time = time.perf_counter() - start
+
+        results.append(
+            f"- `{name}`: {len(sample) / max(len(compressed), 1):.2f}x, "
+            f"{size_mb / max(compress_time, 1e-9):.1f} MB/s compress, "
+            f"{size_mb / max(decompress_time, 1e-9):.1f} MB/s decompress"
+        )
+
+    return results
+
+
+async def fetch_rows(query, values: list[str]) -> AsyncIterator[tuple]:
+    """
+    Yields every row of `query` ordered by ID.
+
+    When `QUERY_CHUNK_SIZE` is set, rows are paged through with `id > last_id LIMIT n`
+    queries, so neither the driver nor a long-running transaction holds the whole table.
+    `values` must start with `id`.
+    """
+    if QUERY_CHUNK_SIZE is None:
+        async for row in query.order_by("id").values_list(*values):
+            yield row
+        return
+
+    last_id = None
+
+    while True:
+        page = query if last_id is None else query.filter(id__gt=last_id)
+        with metrics.measure("query", query.model) as phase:
+            rows = await page.order_by("id").limit(QUERY_CHUNK_SIZE).values_list(*values)
+            phase.rows = len(rows)
+
+        for row in rows:
+            yield row
+
+        if len(rows) < QUERY_CHUNK_SIZE:
+            break
+
+        last_id = rows[-1][0]
+
+
+def load_watermarks() -> dict[str, Any] | None:
+    """Return the watermarks saved by the last export, with their timestamps parsed."""
+    try:
+        with open(WATERMARK_FILE, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    for mark in saved["sections"].values():
+        if mark["timestamp"] is not None:
+            mark["timestamp"] = datetime.fromisoformat(mark["timestamp"])
+
+    return saved
+
+
+def save_watermarks(exported: datetime):
+    sections = {
+        key: {
+            "id": mark["id"],
+            "timestamp": mark["timestamp"].isoformat() if mark["timestamp"] is not None else None,
+        }
+        for key, mark in watermarks.items()
+    }
+
+    # Written to a temporary file first, so a crash never leaves a partial file.
+    with open(WATERMARK_FILE + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"exported": exported.isoformat(), "sections": sections}, f)
+    os.replace(WATERMARK_FILE + ".tmp", WATERMARK_FILE)
+
+
+async def section_query(entry: str, migration, since: dict[str, Any] | None):
+    """Returns the query of a section's rows, or of its rows changed since `since` in a delta export."""
+    model = migration["model"]
+    mark = since["sections"].get(entry) if since is not None else None
+
+    if mark is None or mark["id"] is None or migration.get("delta") == "all":
+        return model.all()
+
+    changed = Q(id__gt=mark["id"])
+
+    if "timestamp" in migration and mark["timestamp"] is not None:
+        changed |= Q(**{f"{migration['timestamp']}__gt": mark["timestamp"]})
+
+    if "changed_by" in migration:
+        key, field = migration["changed_by"]
+        source = since["sections"].get(key)
+        query = MIGRATIONS[key]["model"].all()
+
+        if source is not None and source["id"] is not None:
+            query = query.filter(id__gt=source["id"])
+
+        ids = set(await query.values_list(field, flat=True))
+        ids.discard(None)
+
+        if ids:
+            changed |= Q(id__in=list(ids))
+
+    return model.filter(changed)
+
+
+def advance_watermark(entry: str, migration, values: list[str], rows: list[tuple]):
+    mark = watermarks[entry]
+
+    # Rows are ordered by ID.
+    mark["id"] = max(mark["id"] or 0, rows[-1][0])
+
+    if "timestamp" not in migration:
+        return
+
+    index = values.index(migration["timestamp"])
+    stamps = [row[index] for row in rows if row[index] is not None]
+
+    if stamps and (mark["timestamp"] is None or max(stamps) > mark["timestamp"]):
+        mark["timestamp"] = max(stamps)
+
+
+def strip_static_path(value_string: str) -> str:
+    if value_string.startswith("/static/uploads/"):
+        return value_string.replace("/static/uploads/", "", 1)
+
+    if value_string.startswith("/carfigures/core/image_generator/src/"):
+        return value_string.replace("/carfigures/core/image_generator/src/", "", 1)
+
+    return value_string
+
+
+def encode_text(entry: str, migration, values: list[str], rows: list[tuple], first_chunk: bool) -> bytes:
+    content = [f":{entry}"] if first_chunk else []
+    has_defaults = "defaults" in migration
+
+    for model in rows:
         fields = []
 
-        for key, value in model_dict.items():
+        for key, value in zip(values, model):
             if (
                 has_defaults
                 and key in migration["defaults"]
@@ -233,53 +918,326 @@ async def process(entry: str, migration) -> str:
             elif value_string == "False":
                 value_string = "🬁"  # LF
 
-            if value_string.startswith("/static/uploads/"):
-                value_string = value_string.replace("/static/uploads/", "", 1)
-            elif value_string.startswith("/carfigures/core/image_generator/src/"):
-                value_string = value_string.replace("/carfigures/core/image_generator/src/", "", 1)
+            value_string = strip_static_path(value_string)
 
             fields.append(value_string.replace("\n", "🮈"))
 
-        if first_instance:
-            content.append(f":{entry}")
-            first_instance = False
-
         content.append("╵".join(fields))
 
-    output.append(
-        f"- Migrated **{await migration["model"].all().count():,}** {migration["process"]} objects."
+    return ("\n".join(content) + "\n").encode("utf-8")
+
+
+# Format 2 column types and the array typecode their values are packed with, little-endian whatever
+# the host. Strings ("s") are stored as 4-byte character lengths followed by the UTF-8 text,
+# datetimes as UTC microseconds since the epoch and dates as proleptic ordinals.
+COLUMN_TYPES: dict[bytes, str] = {
+    b"?": "B",
+    b"q": "q",
+    b"d": "d",
+    b"t": "q",
+    b"D": "q",
+}
+
+# Per-row column states. Defaults are omitted so the importer falls back to the model's default.
+STATE_DEFAULT = 0
+STATE_NULL = 1
+STATE_VALUE = 2
+
+CHUNK_HEADER = struct.Struct("<IH")  # Row count, column count.
+PAYLOAD_HEADER = struct.Struct("<Q")  # Payload byte length.
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def column_type(field) -> bytes:
+    field_type = getattr(field, "field_type", None)
+
+    if not isinstance(field_type, type):
+        return b"s"
+
+    # bool is a subclass of int, and datetime of date, so they are checked first.
+    if issubclass(field_type, bool):
+        return b"?"
+    if issubclass(field_type, int):
+        return b"q"
+    if issubclass(field_type, float):
+        return b"d"
+    if issubclass(field_type, datetime):
+        return b"t"
+    if issubclass(field_type, date):
+        return b"D"
+
+    return b"s"
+
+
+def to_microseconds(value: datetime) -> int:
+    # Naive datetimes are what Tortoise returns with `use_tz` disabled, which stores them in UTC.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def pack_array(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def pack_column(kind: bytes, values: list) -> bytes:
+    if kind == b"s":
+        strings = [strip_static_path(str(value)) for value in values]
+
+        # Lengths are in characters so the importer can decode the whole payload at once.
+        return struct.pack(f"<{len(strings)}I", *map(len, strings)) + "".join(strings).encode("utf-8")
+
+    if kind == b"?":
+        values = [1 if value else 0 for value in values]
+    elif kind == b"q":
+        values = [int(value) for value in values]
+    elif kind == b"t":
+        values = [to_microseconds(value) for value in values]
+    elif kind == b"D":
+        values = [value.toordinal() for value in values]
+
+    return pack_array(array(COLUMN_TYPES[kind], values))
+
+
+def encode_columns(entry: str, migration, values: list[str], rows: list[tuple]) -> bytes:
+    """
+    Encodes a chunk of rows as a format 2 chunk.
+
+    A chunk is the section name, row and column counts, then for every column its type,
+    one state byte per row and the packed values of the rows in the `STATE_VALUE` state.
+    """
+    defaults = migration.get("defaults", {})
+    fields = migration["model"]._meta.fields_map
+    name = entry.encode("utf-8")
+
+    chunk = [bytes([len(name)]), name, CHUNK_HEADER.pack(len(rows), len(values))]
+
+    for index, key in enumerate(values):
+        kind = column_type(fields.get(key))
+        states = bytearray(len(rows))
+        present = []
+
+        has_default = key in defaults
+        default = defaults.get(key)
+
+        for row_index, row in enumerate(rows):
+            value = row[index]
+
+            if has_default and value == default:
+                continue
+
+            if value is None:
+                states[row_index] = STATE_NULL
+                continue
+
+            states[row_index] = STATE_VALUE
+            present.append(value)
+
+        payload = pack_column(kind, present)
+        chunk += [kind, states, PAYLOAD_HEADER.pack(len(payload)), payload]
+
+    return b"".join(chunk)
+
+
+def encode_chunk(entry: str, migration, values: list[str], rows: list[tuple], first_chunk: bool) -> bytes:
+    if FORMAT_VERSION == 2:
+        return encode_columns(entry, migration, values, rows)
+
+    return encode_text(entry, migration, values, rows, first_chunk)
+
+
+async def estimate_rows(model) -> int | None:
+    """Return PostgreSQL's estimate of the rows of `model`'s table, or None on other databases."""
+    client = Tortoise.get_connection("default")
+    if client.capabilities.dialect != "postgres":
+        return None
+
+    _, rows = await client.execute_query(
+        "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = to_regclass($1)", [model._meta.db_table]
     )
 
-    return "\n".join(content)
+    # Tables that were never analyzed have no estimate (-1).
+    if not rows or rows[0]["estimate"] < 0:
+        return None
+    return rows[0]["estimate"]
 
 
-async def migrate(message, filename: str) -> str | None:
-    with bz2.open(f"{filename}.bz2", "wt", encoding="utf-8") as f:
-        content = [
-            f"// Generated with 'CF-Migrator' v{__version__}\n"
-            "// Please do not modify this file unless you know what you're doing.\n\n"
-        ]
+async def process(
+    entry: str, migration, reporter: ProgressReporter, since: dict[str, Any] | None = None
+) -> AsyncIterator[tuple[int, bytes]]:
+    rows = []
+    count = 0
+
+    previous = since["sections"].get(entry) if since is not None else None
+    watermarks[entry] = dict(previous) if previous is not None else {"id": None, "timestamp": None}
+
+    values = set(migration["values"] + ["id"])
+    has_defaults = "defaults" in migration
+
+    if has_defaults:
+        values.update(list(migration["defaults"].keys()))
+
+    values = sorted(values, key=lambda x: (x != "id", x))
+
+    query = await section_query(entry, migration, since)
+
+    # Counting the rows would scan the table once more, the estimate only reads its statistics.
+    total = await estimate_rows(migration["model"]) if since is None else None
+
+    progress = reporter.track(f"- Exporting {migration['process']}", total)
+    progress.estimated = total is not None
+
+    async for model in fetch_rows(query, values):
+        rows.append(model)
+
+        # Encode rows in bounded chunks so memory doesn't grow with the section size.
+        if len(rows) >= WRITE_CHUNK_SIZE:
+            advance_watermark(entry, migration, values, rows)
+            with metrics.measure("encode", migration["model"], len(rows)):
+                chunk = encode_chunk(entry, migration, values, rows, count == 0)
+            yield len(rows), chunk
+            count += len(rows)
+            rows = []
 
-        error_occured = False
+            progress.done = count
+            reporter.refresh()
 
+    if rows:
+        advance_watermark(entry, migration, values, rows)
+        with metrics.measure("encode", migration["model"], len(rows)):
+            chunk = encode_chunk(entry, migration, values, rows, count == 0)
+        yield len(rows), chunk
+        count += len(rows)
+
+    reporter.finish(progress, f"- Migrated **{count:,}** {migration['process']} objects.")
+
+
+async def stage_section(
+    key: str, migration, reporter: ProgressReporter, since: dict[str, Any] | None, semaphore: asyncio.Semaphore
+) -> tuple[IO[bytes], int]:
+    """Exports a section into its own temporary file once a slot is free."""
+    async with semaphore:
+        staged = tempfile.TemporaryFile("w+b")
+        count = 0
+
+        try:
+            async for rows, chunk in process(key, migration, reporter, since):
+                with metrics.measure("write", migration["model"]):
+                    staged.write(chunk)
+                count += rows
+        except BaseException:
+            staged.close()
+            raise
+
+        staged.seek(0)
+        return staged, count
+
+
+async def write_sections(f: BlockWriter, reporter: ProgressReporter, since: dict[str, Any] | None):
+    if EXPORT_CONCURRENCY <= 1:
         for key, migration in MIGRATIONS.items():
-            try:
-                field = await process(key, migration)
-            except Exception:
-                print(f"An error occured:\n{traceback.format_exc()}")
-                error_occured = True
-                break
+            await f.start_section(key)
+            count = 0
+
+            async for rows, chunk in process(key, migration, reporter, since):
+                await f.write(chunk)
+                count += rows
+
+            await f.end_section(count)
+
+        return
+
+    # Each section runs its own queries, so they're spread over the pool's connections.
+    semaphore = asyncio.Semaphore(EXPORT_CONCURRENCY)
+    tasks = {
+        key: asyncio.create_task(stage_section(key, migration, reporter, since, semaphore))
+        for key, migration in MIGRATIONS.items()
+    }
+
+    try:
+        # Sections may finish in any order, but they are stitched in canonical order.
+        for key, task in tasks.items():
+            staged, count = await task
+
+            with staged:
+                await f.start_section(key)
+                with metrics.measure("stitch", MIGRATIONS[key]["model"]):
+                    # Staged files are read off the event loop, a block at a time.
+                    while chunk := await asyncio.to_thread(staged.read, f.block_size):
+                        await f.write(chunk)
+                await f.end_section(count)
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+        for result in await asyncio.gather(*tasks.values(), return_exceptions=True):
+            if not isinstance(result, BaseException):
+                result[0].close()
 
-            content.append(field)
 
-            await message.edit(embed=reload_embed())
+async def migrate(reporter: ProgressReporter, filename: str) -> str | None:
+    path = f"{filename}{CODECS[COMPRESSION]['extension']}"
+    compress = CODECS[COMPRESSION]["compress"]
+    since = None
 
-        if error_occured:
+    if DELTA:
+        since = load_watermarks()
+
+        if since is None:
+            output.append(f"- No `{WATERMARK_FILE}` found, a full export is needed before a delta export.")
+            return
+
+        output.append(f"- Exporting the changes since the export of {since['exported']}.")
+
+    exported = datetime.now(timezone.utc)
+
+    # Sections are compressed into a temporary file first, so the header can index them.
+    with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path))) as data:
+        try:
+            async with BlockWriter(data, COMPRESSION, COMPRESSION_WORKERS) as f:
+                await write_sections(f, reporter, since)
+
+                if FORMAT_VERSION == 2:
+                    await f.write(b"\x00")  # An empty section name ends the file.
+        except Exception:
+            print(f"An error occured:\n{traceback.format_exc()}")
             return
 
-        f.write("\n".join(content))
+        # The header is a stream of its own, followed by the blocks it indexes.
+        header = (
+            f"// Generated with 'CF-Migrator' v{__version__}\n"
+            "// Please do not modify this file unless you know what you're doing.\n"
+            f"// Format: {FORMAT_VERSION}\n"
+            + (f"// Delta: {since['exported']}\n" if since is not None else "")
+            + f"// Index: {json.dumps(f.index, separators=(',', ':'))}\n\n"
+        ).encode("utf-8")
+
+        def write_file():
+            data.seek(0)
 
-    return f"{filename}.bz2"
+            with open(path, "wb") as file:
+                file.write(header if compress is None else compress(header))
+                shutil.copyfileobj(data, file)
+
+        # Compressing the header and copying the blocks would hold up the bot for the whole file.
+        with metrics.measure("write"):
+            await asyncio.to_thread(write_file)
+
+    save_watermarks(exported)
+
+    if COMPARE_CODECS:
+        with CODECS[COMPRESSION]["open"](path, "rb") as f:
+            sample = f.read(CODEC_SAMPLE_SIZE)
+
+        output.append(f"- Codec comparison on {convert_size(len(sample))} of exported data:")
+        output.extend(await asyncio.to_thread(compare_codecs, sample))
+
+    return path
 
 
 async def main():
@@ -288,16 +1246,21 @@ async def main():
         return
 
     message = await ctx.send(embed=reload_embed())  # type: ignore # noqa: F821
+    reporter = ProgressReporter(message)
+    metrics.begin()
 
     start_time = time.time()
+    path = None
 
-    path = await migrate(message, "migration.txt")
-
-    if path is None:
-        await message.edit(embed=reload_embed(start_time, status="CANCELED"))
-        return
+    try:
+        path = await migrate(reporter, "migration.txt")
+    finally:
+        metrics.write()
 
-    await message.edit(embed=reload_embed(start_time, path, "FINISHED"))
+        if path is None:
+            await reporter.close(start_time, status="CANCELED")
+        else:
+            await reporter.close(start_time, path, "FINISHED")
 
 
 await main()  # type: ignore  # noqa: F704
@@ -1,14 +1,38 @@
 import asyncio
 import bz2
+import contextlib
+import contextvars
+import cProfile
+import functools
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import lzma
+import multiprocessing
 import os
+import pstats
+import re
 import shutil
+import struct
+import sys
+import threading
 import time
-from datetime import datetime, date
+import tracemalloc
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterable, Iterator
 
 import discord
 from tortoise import Tortoise
 from tortoise.fields.data import DatetimeField, DateField, FloatField, IntField
-from tortoise.exceptions import ValidationError
+from tortoise.exceptions import IntegrityError, ValidationError
+from tortoise.transactions import in_transaction
+from tortoise.validators import MaxLengthValidator, MaxValueValidator, MinLengthValidator, MinValueValidator
 
 from ballsdex.core.models import (
     Ball,
@@ -26,224 +50,2201 @@ from ballsdex.core.models import (
 )
 from ballsdex.core.models import DonationPolicy, PrivacyPolicy
 
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 __version__ = "1.0.3-cleaned"
 
-# ----------- ChatGPT Starts Here -------------
-def safe_int(value):
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
+MIGRATION_FILE = "migration.txt"  # The codec is detected from the file's contents, not its extension.
+CHECKPOINT_FILE = "migration_checkpoint.json"  # Progress journal used to resume an interrupted import.
+SKIPPED_LOG_FILE = "skipped_records.jsonl"  # Rows that weren't imported, one JSON event per line.
+PLACEHOLDER_LOG_FILE = "placeholder_assignments.jsonl"  # Rows changed to be imported and the placeholders created.
+LOG_SAMPLE_LIMIT = 10_000  # Events written per event, model and reason, the others are only counted. 0 writes them all.
+LOG_FLUSH_SIZE = 10_000  # Events buffered before being written to the log files.
+DECOMPRESSION_WORKERS = os.cpu_count() or 1  # Processes decompressing bz2 streams, 0 decompresses in the bot process.
+READ_CHUNK_SIZE = 1024**2  # Compressed bytes read from the migration file at a time.
+DECODE_BATCH_SIZE = 10_000  # Rows decoded by the reader thread before being handed to the event loop.
+DECODE_QUEUE_SIZE = 8  # Decoded batches buffered between the reader thread and the event loop.
+QUERY_BATCH_SIZE = 10_000  # Ids per `__in` lookup and rows per bulk insert of placeholder Players.
+INSERT_BATCH_SIZE = 5_000  # Rows inserted per transaction at first, adapted afterwards.
+INSERT_BATCH_LIMITS = (500, 50_000)  # Smallest and largest number of rows inserted per transaction.
+INSERT_TARGET_SECONDS = 1.0  # Time each insert transaction is tuned to take, 0 keeps `INSERT_BATCH_SIZE`.
+VALIDATE_CHUNK_SIZE = 10_000  # Rows validated and built before being handed to the insert stage.
+ID_BITMAP_DENSITY = 64  # Bitmap bits an id set may use per id it holds, ids further out are kept in a plain set.
+INSERT_QUEUE_SIZE = 2  # Built chunks buffered between validation and insertion.
+PROGRESS_INTERVAL = 2.0  # Seconds between embed updates, the states in between are skipped.
+INSERT_BACKEND = "copy"  # "copy" uses PostgreSQL's binary COPY, "bulk_create" the ORM. Other databases use "bulk_create".
+METRICS_FILE = "migration_metrics.json"  # Time, CPU time, rows and queries of every phase, written when the import ends.
+PROFILE = None  # "cprofile" or "tracemalloc" profiles the `PROFILE_PHASE` phase into `PROFILE_FILE`.
+PROFILE_PHASE = "slowest"  # Phase profiled with `PROFILE`, "slowest" is the slowest phase in the last `METRICS_FILE`.
+PROFILE_FILE = "migration_profile.txt"  # Report of the profiled phase.
+
+# ----------- ChatGPT Starts Here -------------
+def safe_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def as_utc(value: datetime) -> datetime:
+    # Format 2 decodes datetimes as aware UTC values, and naive ones are exported in UTC.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def safe_datetime(value):
+    if value in (None, "", "None"):
+        return None
+    if isinstance(value, datetime):
+        return as_utc(value)
+    try:
+        f = float(value)
+        if 0 <= f <= 4_102_444_800:
+            return datetime.fromtimestamp(f, timezone.utc)
+    except (TypeError, ValueError, OSError):
+        pass
+    try:
+        return as_utc(datetime.fromisoformat(str(value)))
+    except (ValueError, TypeError):
+        return None
+    
+def safe_date(value):
+    if value in (None, "", "None"):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        f = float(value)
+        if f > 10_000_000_000:
+            return date.fromtimestamp(f)
+        return None
+    except (TypeError, ValueError):
+        pass
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+# ----------- ChatGPT Ends Here -------------
+
+SECTIONS = {
+    "R": [Regime, ["id", "background", "name"]],
+    "E": [Economy, ["id", "icon", "name"]],
+    "S-EV": [Special, ["id", "background", "catch_phrase", "emoji", "end_date", "hidden", "name", "rarity", "start_date", "tradeable"]],
+    "S-EX": [Special, ["id", "catch_phrase", "emoji", "background", "name", "rarity"]],
+    "B": [Ball, ["id", "capacity_description", "capacity_name", "credits", "regime_id", "catch_names", "collection_card", "economy_id", "created_at", "emoji_id", "enabled", "country", "attack", "rarity", "short_name", "wild_card", "tradeable", "health"]],
+    "BI": [BallInstance, ["id", "ball_id", "catch_date", "special_id", "favorite", "attack_bonus", "player_id", "server_id", "spawned_time", "trade_player_id", "tradeable", "health_bonus"]],
+    "P": [Player, ["id", "discord_id", "donation_policy", "privacy_policy"]],
+    "GC": [GuildConfig, ["id", "enabled", "guild_id", "spawn_channel"]],
+    "F": [Friendship, ["id", "player1_id", "player2_id", "since"]],
+    "BU": [BlacklistedID, ["id", "date", "discord_id", "reason"]],
+    "BG": [BlacklistedGuild, ["id", "date", "discord_id", "reason"]],
+    "T": [Trade, ["id", "date", "player1_id", "player2_id"]],
+    "TO": [TradeObject, ["id", "ballinstance_id", "player_id", "trade_id"]],
+}
+
+# Stream header ("BZh" + block size) followed by the first block's magic number.
+BZ2_STREAM_HEADER = re.compile(rb"BZh[1-9]1AY&SY")
+
+CODECS = {
+    "bz2": {
+        "extension": ".bz2",
+        "magic": b"BZh",
+        "decompressor": bz2.BZ2Decompressor,
+        "decompress": bz2.decompress,
+    },
+    "gzip": {
+        "extension": ".gz",
+        "magic": b"\x1f\x8b",
+        "decompressor": functools.partial(zlib.decompressobj, wbits=31),
+        "decompress": gzip.decompress,
+    },
+    "lzma": {
+        "extension": ".xz",
+        "magic": b"\xfd7zXZ\x00",
+        "decompressor": lzma.LZMADecompressor,
+        "decompress": lzma.decompress,
+    },
+}
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    pass
+else:
+    CODECS["zstd"] = {
+        "extension": ".zst",
+        "magic": b"\x28\xb5\x2f\xfd",
+        "decompressor": zstd.ZstdDecompressor,
+        "decompress": zstd.decompress,
+    }
+
+
+def find_migration_file() -> str | None:
+    for extension in [codec["extension"] for codec in CODECS.values()] + [""]:
+        if os.path.isfile(MIGRATION_FILE + extension):
+            return MIGRATION_FILE + extension
+    return None
+
+
+def detect_codec(data: bytes) -> str | None:
+    """Return the codec matching the file's magic bytes, or None for an uncompressed file."""
+    for name, codec in CODECS.items():
+        if data.startswith(codec["magic"]):
+            return name
+    return None
+
+
+def create_pool(workers: int) -> ProcessPoolExecutor | None:
+    if workers <= 0:
+        return None
+
+    # Workers only run stdlib decompressors. Forking avoids re-importing the bot's entry point,
+    # which the "spawn" and "forkserver" start methods would do.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+
+    return ProcessPoolExecutor(workers)
+
+
+def decompress_chunks(f: BinaryIO, codec: str) -> Iterator[bytes]:
+    """Decompress a file of concatenated streams one read at a time."""
+    factory = CODECS[codec]["decompressor"]
+    decompressor = factory()
+    fed = False
+
+    while chunk := f.read(READ_CHUNK_SIZE):
+        while chunk:
+            fed = True
+            yield decompressor.decompress(chunk)
+
+            if not decompressor.eof:
+                break
+
+            chunk = decompressor.unused_data
+            decompressor = factory()
+            fed = False
+
+    if fed and not decompressor.eof:
+        raise EOFError("The migration file is truncated.")
+
+
+def decompress_bz2_parallel(f: BinaryIO, pool: ProcessPoolExecutor) -> Iterator[bytes]:
+    """Decompress the streams of a multi-stream bz2 file in a process pool, in order."""
+    window = DECOMPRESSION_WORKERS * 2
+    pending = deque()  # (file offset, future)
+    buffer = b""
+    offset = 0
+    scan_from = 1
+    eof = False
+
+    while not eof or pending:
+        if not eof:
+            chunk = f.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+
+            # Every stream header after the start of the buffer closes the stream before it.
+            while match := BZ2_STREAM_HEADER.search(buffer, scan_from):
+                pending.append((offset, pool.submit(bz2.decompress, buffer[: match.start()])))
+                offset += match.start()
+                buffer = buffer[match.start() :]
+                scan_from = 1
+
+            # A header may straddle the next read, so rescan the last 9 bytes (header length - 1).
+            scan_from = max(1, len(buffer) - 9)
+
+            if eof and buffer:
+                pending.append((offset, pool.submit(bz2.decompress, buffer)))
+                buffer = b""
+
+        while pending and (eof or pending[0][1].done() or len(pending) >= window):
+            start, future = pending.popleft()
+
+            try:
+                yield future.result()
+            except (OSError, ValueError, EOFError):
+                # The header pattern also matched inside compressed data. Everything before
+                # `start` was decoded fine, so continue sequentially from there.
+                for _, other in pending:
+                    other.cancel()
+
+                f.seek(start)
+                yield from decompress_chunks(f, "bz2")
+                return
+
+
+# Format 2 column types and the array typecode their values are packed with, little-endian whatever
+# the host. Strings ("s") are stored as 4-byte character lengths followed by the UTF-8 text,
+# datetimes as UTC microseconds since the epoch and dates as proleptic ordinals.
+COLUMN_TYPES = {
+    b"?": "B",
+    b"q": "q",
+    b"d": "d",
+    b"t": "q",
+    b"D": "q",
+}
+
+# Per-row column states. Defaulted values are omitted so the model's default applies.
+STATE_DEFAULT = 0
+STATE_NULL = 1
+STATE_VALUE = 2
+
+CHUNK_HEADER = struct.Struct("<IH")  # Row count, column count.
+PAYLOAD_HEADER = struct.Struct("<Q")  # Payload byte length.
+FORMAT_HEADER = re.compile(r"// Format: (\d+)")
+INDEX_HEADER = re.compile(r"// Index: (.+)")
+DELTA_HEADER = re.compile(r"// Delta: (.+)")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+OMITTED = object()
+
+
+class ByteStream:
+    """Reads lines and exact byte counts from an iterator of decompressed blocks."""
+
+    def __init__(self, blocks: Iterator[bytes]):
+        self.blocks = blocks
+        self.buffer = b""
+        self.offset = 0
+
+    def fill(self, size: int) -> bool:
+        while len(self.buffer) - self.offset < size:
+            with metrics.measure("decompress"):
+                block = next(self.blocks, None)
+            if block is None:
+                return False
+            self.buffer = self.buffer[self.offset :] + block
+            self.offset = 0
+        return True
+
+    def peek(self, size: int) -> bytes:
+        self.fill(size)
+        return self.buffer[self.offset : self.offset + size]
+
+    def read(self, size: int) -> bytes:
+        if not self.fill(size):
+            raise EOFError("The migration file is truncated.")
+        data = self.buffer[self.offset : self.offset + size]
+        self.offset += size
+        return data
+
+    def readline(self) -> bytes:
+        while (end := self.buffer.find(b"\n", self.offset)) == -1:
+            if not self.fill(len(self.buffer) - self.offset + 1):
+                end = len(self.buffer) - 1
+                break
+        line = self.buffer[self.offset : end + 1]
+        self.offset = end + 1
+        return line
+
+    def remaining(self) -> Iterator[bytes]:
+        if self.offset < len(self.buffer):
+            yield self.buffer[self.offset :]
+        self.buffer = b""
+        self.offset = 0
+
+        while True:
+            with metrics.measure("decompress"):
+                block = next(self.blocks, None)
+            if block is None:
+                return
+            yield block
+
+    def close(self):
+        self.blocks.close()
+
+
+class MigrationReader:
+    """
+    Incrementally decompresses the migration file.
+
+    `open()` reads the header to find the file's format, then `text_lines()` (format 1) or
+    `column_chunks()` (format 2) decode the rest. `consumed` counts the compressed bytes
+    read so far, so progress is known without decompressing the whole file first.
+
+    Files with an index header list their compressed blocks and the blocks of every section,
+    so blocks are decompressed in parallel whatever the codec and sections can be read on
+    their own with `section_stream()`. Delta exports name the export they follow in `delta`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.consumed = 0
+        self.version = 1
+        self.header_lines = 0
+        self.index: dict[str, Any] | None = None
+        self.delta: str | None = None
+        self.data_start = 0
+
+        with open(path, "rb") as f:
+            self.codec = detect_codec(f.read(8))
+
+    @property
+    def progress(self) -> float:
+        return min(self.consumed / self.size, 1.0) if self.size else 1.0
+
+    @property
+    def total_rows(self) -> int | None:
+        """The number of rows in the file, if it has an index."""
+        if self.index is None:
+            return None
+        return sum(section["rows"] for section in self.index["sections"].values())
+
+    def blocks(self, f: BinaryIO) -> Iterator[bytes]:
+        codec = self.codec
+
+        if codec is None:
+            while chunk := f.read(READ_CHUNK_SIZE):
+                yield chunk
+            return
+
+        # Only bz2 has a stream header distinctive enough to split the file on.
+        pool = create_pool(DECOMPRESSION_WORKERS) if codec == "bz2" else None
+
+        if pool is None:
+            yield from decompress_chunks(f, codec)
+            return
+
+        with pool:
+            yield from decompress_bz2_parallel(f, pool)
+
+    def decompressed(self) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            for block in self.blocks(f):
+                self.consumed = f.tell()
+                yield block
+
+    def header_blocks(self) -> Iterator[bytes]:
+        """Decompress the first stream of the file, which holds the whole header of indexed files."""
+        with open(self.path, "rb") as f:
+            if self.codec is None:
+                while chunk := f.read(READ_CHUNK_SIZE):
+                    yield chunk
+                return
+
+            decompressor = CODECS[self.codec]["decompressor"]()
+
+            while not decompressor.eof and (chunk := f.read(READ_CHUNK_SIZE)):
+                yield decompressor.decompress(chunk)
+
+    def indexed_blocks(self, first: int, end: int) -> Iterator[bytes]:
+        """Decompress the indexed blocks `[first, end)` in a process pool, in order."""
+        blocks = self.index["blocks"][first:end]
+        decompress = CODECS[self.codec]["decompress"] if self.codec is not None else None
+        pool = create_pool(DECOMPRESSION_WORKERS) if decompress is not None and len(blocks) > 1 else None
+        window = max(DECOMPRESSION_WORKERS, 1) * 2
+        pending = deque()  # (compressed size, future)
+
+        try:
+            with open(self.path, "rb") as f:
+                for offset, length, _ in blocks:
+                    f.seek(self.data_start + offset)
+                    block = f.read(length)
+                    if len(block) < length:
+                        raise EOFError("The migration file is truncated.")
+
+                    if pool is None:
+                        self.consumed += length
+                        yield block if decompress is None else decompress(block)
+                        continue
+
+                    pending.append((length, pool.submit(decompress, block)))
+
+                    while pending and (pending[0][1].done() or len(pending) >= window):
+                        done, future = pending.popleft()
+                        self.consumed += done
+                        yield future.result()
+
+            while pending:
+                done, future = pending.popleft()
+                self.consumed += done
+                yield future.result()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    def read_header(self, stream: ByteStream):
+        self.header_lines = 0
+
+        # The header is made of comment lines. Files without a format line are format 1.
+        while stream.peek(2) == b"//":
+            line = stream.readline().decode().rstrip()
+            self.header_lines += 1
+
+            if match := FORMAT_HEADER.fullmatch(line):
+                self.version = int(match.group(1))
+            elif match := INDEX_HEADER.fullmatch(line):
+                self.index = json.loads(match.group(1))
+            elif match := DELTA_HEADER.fullmatch(line):
+                self.delta = match.group(1)
+
+        if self.version not in (1, 2):
+            stream.close()
+            raise Exception(
+                f"Unsupported migration file format {self.version}, please update CF-Migrator."
+            )
+
+        # The blank line separating the header from the sections.
+        if stream.peek(1) == b"\n":
+            stream.readline()
+            self.header_lines += 1
+
+    def inspect(self):
+        """Read the header only, to know the file's format, index and whether it's a delta."""
+        stream = ByteStream(self.header_blocks())
+        self.read_header(stream)
+        stream.close()
+
+    def open(self) -> ByteStream:
+        self.inspect()
+
+        if self.index is None:
+            # Files without an index are read from the start, header included.
+            self.version = 1
+
+            stream = ByteStream(self.decompressed())
+            self.read_header(stream)
+            return stream
+
+        # The indexed blocks are at the end of the file, right after the header.
+        self.data_start = self.size - self.index["size"]
+        if self.data_start < 0:
+            raise EOFError("The migration file is truncated.")
+
+        self.consumed = self.data_start
+        return ByteStream(self.indexed_blocks(0, len(self.index["blocks"])))
+
+    def section_stream(self, section: str) -> ByteStream | None:
+        """Return a stream over a single section of an indexed file, after `open()`."""
+        if self.index is None or section not in self.index["sections"]:
+            return None
+        return ByteStream(self.indexed_blocks(*self.index["sections"][section]["blocks"]))
+
+    def lines(self, stream: ByteStream) -> Iterator[bytes]:
+        remainder = b""
+
+        for block in stream.remaining():
+            lines = (remainder + block).split(b"\n")
+            remainder = lines.pop()
+            yield from lines
+
+        if remainder:
+            yield remainder
+
+    def text_lines(self, stream: ByteStream) -> Iterator[tuple[int, str, str]]:
+        """Yield the data lines of a format 1 file as `(line number, section, line)`."""
+        section = ""
+
+        for index, line in enumerate(self.lines(stream), start=self.header_lines + 1):
+            line = line.decode().rstrip()
+
+            if line.startswith("//") or line == "":
+                continue
+
+            if line.startswith(":"):
+                section = line[1:]
+                if section not in SECTIONS:
+                    raise Exception(f"Invalid section '{section}' detected on line {index}")
+                continue
+
+            if section == "":
+                continue
+
+            yield index, section, line
+
+    def column_chunks(self, stream: ByteStream) -> Iterator[tuple[str, int, list[tuple[bytes, bytes, bytes]]]]:
+        """Yield the chunks of a format 2 file as `(section, rows, [(type, states, payload)])`."""
+        # The file ends with an empty section name. A single section's stream just ends.
+        while stream.fill(1) and (size := stream.read(1)[0]):
+            section = stream.read(size).decode()
+            if section not in SECTIONS:
+                raise Exception(f"Invalid section '{section}' detected")
+
+            rows, column_count = CHUNK_HEADER.unpack(stream.read(CHUNK_HEADER.size))
+            columns = []
+
+            for _ in range(column_count):
+                kind = stream.read(1)
+                states = stream.read(rows)
+                (length,) = PAYLOAD_HEADER.unpack(stream.read(PAYLOAD_HEADER.size))
+                columns.append((kind, states, stream.read(length)))
+
+            yield section, rows, columns
+
+
+# Sentinel values of format 1 text fields.
+TEXT_VALUES = {"None": None, "🬀": True, "🬁": False}
+
+
+def field_converter(field) -> tuple[Callable, bytes] | None:
+    """Return the converter of `field`'s format 1 text and its format 2 column type, or None for text."""
+    if isinstance(field, IntField):
+        return safe_int, b"q"
+    elif isinstance(field, FloatField):
+        return float, b"d"
+    elif isinstance(field, DatetimeField):
+        return safe_datetime, b"t"
+    elif isinstance(field, DateField):
+        return safe_date, b"D"
+    return None
+
+
+def text_converter(field) -> Callable[[str], Any]:
+    converter = field_converter(field)
+
+    if converter is None:
+        def convert(value: str):
+            if value in TEXT_VALUES:
+                return TEXT_VALUES[value]
+            return value.replace("🮈", "\n")
+
+        return convert
+
+    cast = converter[0]
+
+    def convert(value: str):
+        if value in TEXT_VALUES:
+            value = TEXT_VALUES[value]
+            if value is None:
+                return None
+        return cast(value)
+
+    return convert
+
+
+@functools.cache
+def text_decoders(section: str) -> tuple[tuple[str, Callable[[str], Any] | None], ...]:
+    """Build the converters of a section's columns once. Fields the model doesn't have get None."""
+    model, names = SECTIONS[section]
+    fields = model._meta.fields_map
+
+    return tuple((name, text_converter(fields[name]) if name in fields else None) for name in names)
+
+
+def decode_line(index: int, section: str, line: str, skipped_log) -> dict | None:
+    model_dict = {}
+
+    for attribute_index, ((name, convert), value) in enumerate(
+        zip(text_decoders(section), line.split("╵")), start=1
+    ):
+        if value == "":
+            if name == "id":
+                skipped_log.record("skipped", SECTIONS[section][0], None, "empty_id", line=index)
+                return None
+            continue
+
+        if convert is None:
+            raise Exception(f"Unknown value '{name}' detected on line {index:,} - attribute {attribute_index:,} in {SECTIONS[section][0].__name__} object")
+
+        model_dict[name] = convert(value)
+
+    return model_dict
+
+
+def unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def unpack_column(kind: bytes, count: int, payload: bytes) -> array | list:
+    """Unpack a format 2 column's values. Numbers stay packed, see `COLUMN_DECODERS`."""
+    if kind == b"s":
+        lengths = struct.unpack_from(f"<{count}I", payload)
+        text = payload[count * 4 :].decode("utf-8")
+        values = []
+        position = 0
+        for length in lengths:
+            values.append(sys.intern(text[position : position + length]))
+            position += length
+        return values
+
+    return unpack_array(COLUMN_TYPES[kind], payload)
+
+
+# Turn a packed format 2 value into the Python value of its column type.
+COLUMN_DECODERS = {
+    b"?": bool,
+    b"t": lambda value: EPOCH + timedelta(microseconds=value),
+    b"D": date.fromordinal,
+}
+
+
+def compact_column(values: list) -> array | list:
+    """Pack integer values in an array and share repeated strings."""
+    if values and all(type(value) is int for value in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    return [sys.intern(value) if type(value) is str else value for value in values]
+
+
+class RowBlock:
+    """
+    Decoded rows of one section, stored by column.
+
+    Holding tens of millions of rows as dicts costs hundreds of bytes each, so a block keeps the
+    arrays a chunk was packed in and only builds dicts for the rows being validated. Every column
+    is `(states, values, decode)`: the STATE_* of every row, or None when every row has a value,
+    the values of the rows that have one, and the function turning them into Python values, if any.
+    """
+
+    __slots__ = ("section", "rows", "columns")
+
+    def __init__(self, section: str, rows: int, columns: dict[str, tuple[bytes | None, array | list, Callable | None]]):
+        self.section = section
+        self.rows = rows
+        self.columns = columns
+
+    @classmethod
+    def from_dicts(cls, section: str, rows: list[dict]) -> "RowBlock":
+        """Pack rows decoded one at a time, like format 1 lines."""
+        columns = {}
+
+        for name in SECTIONS[section][1]:
+            if not any(name in row for row in rows):
+                continue
+
+            states = bytes(
+                STATE_DEFAULT if name not in row else STATE_NULL if row[name] is None else STATE_VALUE for row in rows
+            )
+            values = compact_column([row[name] for row in rows if row.get(name) is not None])
+            columns[name] = (None if len(values) == len(rows) else states, values, None)
+
+        return cls(section, len(rows), columns)
+
+    def column(self, name: str, start: int = 0, stop: int | None = None) -> list:
+        """Values of `name` from row `start` to `stop`, with None for nulls and OMITTED for defaults."""
+        stop = self.rows if stop is None else stop
+
+        if name not in self.columns:
+            return [OMITTED] * (stop - start)
+
+        states, values, decode = self.columns[name]
+
+        if states is None:
+            values = values[start:stop]
+            return list(values) if decode is None else list(map(decode, values))
+
+        offset = states.count(STATE_VALUE, 0, start)
+        values = values[offset : offset + states.count(STATE_VALUE, start, stop)]
+        values = iter(values) if decode is None else map(decode, values)
+        return [next(values) if state == STATE_VALUE else None if state == STATE_NULL else OMITTED for state in states[start:stop]]
+
+    def dicts(self, start: int = 0, stop: int | None = None) -> list[dict]:
+        """Build the rows from `start` to `stop` as the keyword arguments of their model."""
+        names = list(self.columns)
+        rows = []
+
+        for values in zip(*[self.column(name, start, stop) for name in names]):
+            model_dict = {name: value for name, value in zip(names, values) if value is not OMITTED}
+            # Claude AI - Track which section this came from for duplicate handling
+            model_dict['_section'] = self.section
+            rows.append(model_dict)
+
+        return rows
+
+    def select(self, keep: list[int]) -> "RowBlock":
+        """Return a block of the rows at the `keep` positions."""
+        rows = self.dicts()
+        return RowBlock.from_dicts(self.section, [rows[index] for index in keep])
+
+
+class ParsedRows:
+    """All decoded rows of a model, in the blocks they were read in."""
+
+    def __init__(self):
+        self.blocks: list[RowBlock] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, block: RowBlock):
+        self.blocks.append(block)
+        self.count += block.rows
+
+    def values(self, name: str) -> Iterator:
+        """Yield the value of `name` for every row, None where it's null or defaulted."""
+        for block in self.blocks:
+            for value in block.column(name):
+                yield None if value is OMITTED else value
+
+    def chunks(self, size: int) -> Iterator[list[dict]]:
+        """Yield the rows as dicts, `size` rows at a time."""
+        chunk = []
+
+        for block in self.blocks:
+            start = 0
+            while start < block.rows:
+                stop = min(start + size - len(chunk), block.rows)
+                chunk += block.dicts(start, stop)
+                start = stop
+
+                if len(chunk) == size:
+                    yield chunk
+                    chunk = []
+
+        if chunk:
+            yield chunk
+
+
+@functools.cache
+def column_converter(kind: bytes, field) -> Callable | None:
+    """Return the conversion a format 2 column needs for `field`, or None if its values fit as-is."""
+    converter = field_converter(field)
+
+    if converter is None:
+        # Other fields get the text (or boolean) format 1 would have given them.
+        return None if kind in (b"s", b"?") else str
+
+    cast, target = converter
+
+    if kind == target:
+        return None
+
+    return lambda value: cast(value if isinstance(value, bool) else str(value))
+
+
+def decode_chunk(section: str, rows: int, columns: list[tuple[bytes, bytes, bytes]], skipped_log) -> RowBlock:
+    model, names = SECTIONS[section]
+    fields = model._meta.fields_map
+    decoded = {}
+
+    for attribute_index, (name, (kind, states, payload)) in enumerate(zip(names, columns), start=1):
+        count = states.count(STATE_VALUE)
+
+        if states.count(STATE_DEFAULT) == rows:
+            continue
+
+        if name not in fields:
+            raise Exception(f"Unknown value '{name}' detected in section {section} - attribute {attribute_index:,} in {model.__name__} object")
+
+        values = unpack_column(kind, count, payload)
+        decode = COLUMN_DECODERS.get(kind)
+        converter = column_converter(kind, fields[name])
+
+        if converter is not None:
+            values = [converter(value) for value in (values if decode is None else map(decode, values))]
+            decode = None
+
+        decoded[name] = (None if count == rows else states, values, decode)
+
+    if not decoded:
+        return RowBlock(section, 0, decoded)
+
+    block = RowBlock(section, rows, decoded)
+    id_states = decoded["id"][0] if "id" in decoded else bytes(rows)
+
+    if id_states is None or STATE_DEFAULT not in id_states:
+        return block
+
+    keep = []
+    for row, state in enumerate(id_states):
+        if state == STATE_DEFAULT:
+            skipped_log.record("skipped", model, None, "empty_id", section=section, row=row + 1)
+        else:
+            keep.append(row)
+
+    return block.select(keep)
+
+
+def decode_batches(reader: MigrationReader, skipped_log) -> Iterator[RowBlock]:
+    stream = reader.open()
+
+    try:
+        if reader.version == 2:
+            # Format 2 files are already split into chunks by the exporter.
+            for section, rows, columns in reader.column_chunks(stream):
+                with metrics.measure("decode", SECTIONS[section][0], rows):
+                    block = decode_chunk(section, rows, columns, skipped_log)
+                if block.rows:
+                    yield block
+            return
+
+        for section, lines in itertools.groupby(reader.text_lines(stream), key=lambda line: line[1]):
+            while True:
+                # Batches are timed on their own, the time spent waiting for the consumer isn't decoding.
+                with metrics.measure("decode", SECTIONS[section][0]) as phase:
+                    batch = list(itertools.islice(lines, DECODE_BATCH_SIZE))
+                    rows = [decode_line(index, section, line, skipped_log) for index, _, line in batch]
+                    block = RowBlock.from_dicts(section, [row for row in rows if row is not None])
+                    phase.rows = block.rows
+
+                if not batch:
+                    break
+
+                if block.rows:
+                    yield block
+    finally:
+        stream.close()
+
+
+async def iterate_in_thread(iterator: Iterator, maxsize: int) -> AsyncIterator:
+    """Run a blocking iterator in a worker thread and hand its items over through a bounded queue."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(item: Any):
+        # Blocks the worker thread while the queue is full.
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce():
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    return
+                put((item, None))
+        except BaseException as e:
+            put((None, e))
+        else:
+            put((done, None))
+
+    worker = loop.run_in_executor(None, produce)
+
+    try:
+        while True:
+            item, error = await queue.get()
+
+            if error is not None:
+                raise error
+            if item is done:
+                break
+
+            yield item
+    finally:
+        stop.set()
+
+        # Unblock a pending put so the worker notices `stop` and exits.
+        while not worker.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.01)
+
+        await worker
+
+
+class EventLog:
+    """
+    Log of the rows the import skipped or changed, with one JSON event per line.
+
+    Events look like `{"event": "skipped", "model": "Ball", "id": 5, "reason": "invalid_fk", ...}`,
+    so the logs can be filtered with `jq` or loaded as a table. They're buffered and written
+    `LOG_FLUSH_SIZE` at a time. Every event is counted per event, model and reason, but only the first
+    `LOG_SAMPLE_LIMIT` of each are written; the counts are written as `total` events at the end.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+        self.buffer: list[dict] = [{"event": "header", "generated": datetime.now().isoformat()}]
+        self.counts: dict[tuple[str, str, str], int] = {}
+
+    def record(self, event: str, model, id, reason: str, **details):
+        key = (event, model.__name__, reason)
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+
+        if 0 < LOG_SAMPLE_LIMIT < count:
+            return
+
+        self.write({"event": event, "model": model.__name__, "id": id, "reason": reason, **details})
+
+    def write(self, event: dict):
+        """Write an event as is, without counting it."""
+        self.buffer.append(event)
+
+        if len(self.buffer) >= LOG_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("".join(json.dumps(event, default=str) + "\n" for event in self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        for (event, model, reason), count in self.counts.items():
+            written = count if LOG_SAMPLE_LIMIT <= 0 else min(count, LOG_SAMPLE_LIMIT)
+            self.write({"event": "total", "of": event, "model": model, "reason": reason, "count": count, "written": written})
+
+        self.flush()
+        self.file.close()
+
+
+class LogBuffer:
+    """Collects the events recorded by the reader thread until the event loop records them."""
+
+    def __init__(self):
+        self.events = deque()
+
+    def record(self, *args, **details):
+        self.events.append((args, details))
+
+    def flush_to(self, log: EventLog):
+        while self.events:
+            args, details = self.events.popleft()
+            log.record(*args, **details)
+
+
+class SectionReader:
+    """
+    Decode stage of the import pipeline.
+
+    Decodes the migration file in the background and fills `data` while earlier models are
+    validated and inserted. A model is ready once all of its sections are read: with an index,
+    as soon as decoding moves past them, otherwise at the end of the file.
+    """
+
+    def __init__(self, reporter: "ProgressReporter", reader: MigrationReader, skipped_log: EventLog):
+        self.reporter = reporter
+        self.reader = reader
+        self.skipped_log = skipped_log
+        self.log = LogBuffer()
+        self.data = {}
+        self.ready = {model: asyncio.Event() for model, _ in SECTIONS.values()}
+        self.progress = reporter.track("- Reading migration file")
+        self.task = asyncio.create_task(self.run())
+
+    def section_started(self, section: str):
+        if self.reader.index is None or section not in self.reader.index["sections"]:
+            return
+
+        order = list(self.reader.index["sections"])
+        done = set(order[: order.index(section)])
+
+        for model, event in self.ready.items():
+            sections = [key for key, (section_model, _) in SECTIONS.items() if section_model is model and key in order]
+            if all(key in done for key in sections):
+                event.set()
+
+    async def run(self):
+        rows = 0
+        section = None
+        # `data` is emptied as models are inserted, so the models read are counted on their own.
+        models = set()
+
+        # Decompression and decoding run in a worker thread so the event loop stays responsive.
+        async for block in iterate_in_thread(decode_batches(self.reader, self.log), DECODE_QUEUE_SIZE):
+            if block.section != section:
+                section = block.section
+                self.section_started(section)
+
+            self.data.setdefault(SECTIONS[section][0], ParsedRows()).append(block)
+            models.add(SECTIONS[section][0])
+            self.log.flush_to(self.skipped_log)
+            rows += block.rows
+
+            # The total is known once the header is read, if the file has an index.
+            self.progress.done = rows
+            self.progress.total = self.reader.total_rows
+            if self.progress.total is None:
+                self.progress.detail = f"{self.reader.progress:.1%}"
+            self.reporter.refresh()
+
+        self.log.flush_to(self.skipped_log)
+
+        for event in self.ready.values():
+            event.set()
+
+        self.reporter.finish(
+            self.progress, f"- Finished reading migration file ({rows:,} rows, {len(models)} model types)."
+        )
+
+    async def wait(self, models: list):
+        """Wait until every section of `models` is decoded."""
+        for model in models:
+            if self.ready[model].is_set():
+                continue
+
+            waiter = asyncio.ensure_future(self.ready[model].wait())
+            await asyncio.wait([waiter, self.task], return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+
+            if self.task.done():
+                self.task.result()  # Raises the decoding error, if any.
+
+    async def close(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+output = []
+
+def reload_embed(start_time: float | None = None, status="RUNNING"):
+    embed = discord.Embed(title="BD-Migrator Process", description=f"Status: **{status}**")
+    
+    if status == "RUNNING":
+        embed.color = discord.Color.yellow()
+    elif status == "FINISHED":
+        embed.color = discord.Color.green()
+    elif status == "CANCELED":
+        embed.color = discord.Color.red()
+
+    if len(output) > 0:
+        recent_output = output[-20:] if len(output) > 20 else output
+        output_text = "\n".join(recent_output)
+        if len(output_text) > 1000:
+            output_text = "...\n" + output_text[-1000:]
+        embed.add_field(name="Output", value=output_text)
+
+    if status != "RUNNING" and metrics.phases:
+        embed.add_field(name="Slowest phases", value="\n".join(metrics.lines()), inline=False)
+
+    if start_time is not None:
+        embed.set_footer(text=f"Ended migration in {round((time.time() - start_time), 3)}s")
+
+    return embed
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+class Progress:
+    """Row counter of a step, rendered into its `output` line with its throughput and ETA."""
+
+    def __init__(self, line: int, label: str, total: int | None = None):
+        self.line = line
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.detail = ""
+        self.start = time.perf_counter()
+
+    def render(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+
+        parts = [f"{self.done:,}/{self.total:,} rows" if self.total is not None else f"{self.done:,} rows"]
+        if self.detail:
+            parts.append(self.detail)
+        parts.append(f"{rate:,.0f} rows/s")
+        if self.total is not None and rate > 0 and self.done < self.total:
+            parts.append(f"ETA {format_duration((self.total - self.done) / rate)}")
+
+        return f"{self.label}... ({', '.join(parts)})"
+
+
+class ProgressReporter:
+    """
+    Updates the embed in the background.
+
+    Steps only append to `output` or update their `Progress` counters, then call `refresh()`, which
+    doesn't wait. The embed is edited at most every `PROGRESS_INTERVAL` seconds with the latest
+    state, so intermediate states are coalesced and the hot loops never wait on Discord.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        self.progress: list[Progress] = []
+        self.changed = asyncio.Event()
+        self.closed = False
+        self.task = asyncio.create_task(self.run())
+
+    def track(self, label: str, total: int | None = None) -> Progress:
+        """Add a progress line for a step to `output`."""
+        output.append(f"{label}...")
+        progress = Progress(len(output) - 1, label, total)
+        self.progress.append(progress)
+        self.refresh()
+        return progress
+
+    def finish(self, progress: Progress, text: str):
+        """Replace a step's progress line with its final text."""
+        self.progress.remove(progress)
+        output[progress.line] = text
+        self.refresh()
+
+    def refresh(self):
+        self.changed.set()
+
+    def embed(self, *args) -> discord.Embed:
+        for progress in self.progress:
+            output[progress.line] = progress.render()
+        return reload_embed(*args)
+
+    async def run(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+
+            try:
+                await self.message.edit(embed=self.embed())
+            except discord.HTTPException:
+                pass  # Rate limited or unavailable, the next update carries the same state.
+
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    async def close(self, *args):
+        """Stop the background updates and show the final state right away, `args` go to `reload_embed()`."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+        try:
+            await self.message.edit(embed=self.embed(*args))
+        except discord.HTTPException:
+            pass  # Only the status message is out of date, the import's outcome stands.
+
+
+class Measurement:
+    """A running phase. Nested phases add their time to it, `rows` can be set before it ends."""
+
+    __slots__ = ("rows", "child_wall", "child_cpu")
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+
+
+class PhaseTotals:
+    __slots__ = ("calls", "rows", "wall", "cpu", "slowest")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.slowest = 0.0
+
+
+class Metrics:
+    """
+    Wall time, CPU time, rows and calls of every phase of the import, per model.
+
+    Time spent in a nested phase only counts for that phase. Phases running at the same time, like
+    decoding while earlier models are built, each count their own time, so they can add up to more
+    than the total. Phases on the database count one call per query and keep the slowest one. CPU
+    time is the thread's, so a phase waiting on the database also counts what the event loop ran
+    meanwhile.
+    """
+
+    def __init__(self):
+        self.phases: dict[tuple[str, str], PhaseTotals] = {}
+        self.current: contextvars.ContextVar[Measurement | None] = contextvars.ContextVar("phase", default=None)
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.profile_phase: str | None = None
+        self.profiling = 0
+        self.profiler: cProfile.Profile | None = None
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.traced_peak = 0
+
+    def begin(self):
+        """Start timing the import and pick the phase `PROFILE` profiles."""
+        self.start = time.perf_counter()
+
+        if PROFILE is None:
+            return
+
+        self.profile_phase = PROFILE_PHASE
+
+        if PROFILE_PHASE == "slowest":
+            # The slowest phase of the last run, the first phases are the slowest.
+            try:
+                with open(METRICS_FILE, encoding="utf-8") as f:
+                    self.profile_phase = next(iter(json.load(f)["totals"]), None)
+            except (OSError, ValueError, KeyError):
+                self.profile_phase = None
+
+        if self.profile_phase is None:
+            output.append(f"- No `{METRICS_FILE}` from a previous run to find the slowest phase, nothing is profiled.")
+
+    @contextlib.contextmanager
+    def measure(self, phase: str, model=None, rows: int = 0) -> Iterator[Measurement]:
+        """Time a phase. It mustn't wrap a `yield`, or the consumer's time would count too."""
+        measurement = Measurement(rows)
+        parent = self.current.get()
+        token = self.current.set(measurement)
+        profiling = phase == self.profile_phase and self.start_profile()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        try:
+            yield measurement
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+
+            if profiling:
+                self.stop_profile()
+
+            self.current.reset(token)
+
+            if parent is not None:
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+
+            key = (phase, model.__name__ if model is not None else "")
+
+            with self.lock:
+                totals = self.phases.get(key)
+                if totals is None:
+                    totals = self.phases[key] = PhaseTotals()
+
+                totals.calls += 1
+                totals.rows += measurement.rows
+                totals.wall += wall - measurement.child_wall
+                totals.cpu += cpu - measurement.child_cpu
+                totals.slowest = max(totals.slowest, wall)
+
+    def start_profile(self) -> bool:
+        with self.lock:
+            self.profiling += 1
+            if self.profiling > 1:
+                return True
+
+            if PROFILE == "cprofile":
+                self.profiler = self.profiler or cProfile.Profile()
+                try:
+                    self.profiler.enable()
+                except ValueError:
+                    # Another profiler is active, such as one in another thread.
+                    self.profiling -= 1
+                    return False
+            elif PROFILE == "tracemalloc":
+                tracemalloc.start()
+
+        return True
+
+    def stop_profile(self):
+        with self.lock:
+            self.profiling -= 1
+            if self.profiling > 0:
+                return
+
+            if PROFILE == "cprofile":
+                self.profiler.disable()
+            elif PROFILE == "tracemalloc":
+                # The allocations of the call that used the most memory are kept.
+                peak = tracemalloc.get_traced_memory()[1]
+                if peak > self.traced_peak:
+                    self.traced_peak = peak
+                    self.snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+
+    def totals(self) -> dict[str, PhaseTotals]:
+        """The totals of every phase over all models, slowest first."""
+        totals = {}
+
+        for (phase, _), phase_totals in self.phases.items():
+            total = totals.setdefault(phase, PhaseTotals())
+            total.calls += phase_totals.calls
+            total.rows += phase_totals.rows
+            total.wall += phase_totals.wall
+            total.cpu += phase_totals.cpu
+            total.slowest = max(total.slowest, phase_totals.slowest)
+
+        return dict(sorted(totals.items(), key=lambda item: -item[1].wall))
+
+    def lines(self, limit: int = 6) -> list[str]:
+        """The slowest phases, for the final embed."""
+        lines = []
+
+        for phase, totals in list(self.totals().items())[:limit]:
+            line = f"- {phase}: {totals.wall:.2f}s (CPU {totals.cpu:.2f}s"
+            if totals.rows:
+                line += f", {totals.rows / totals.wall if totals.wall else 0:,.0f} rows/s"
+            lines.append(line + ")")
+
+        return lines
+
+    def write(self):
+        """Write every phase to `METRICS_FILE`, and the profile of `profile_phase` to `PROFILE_FILE`."""
+
+        def describe(totals: PhaseTotals) -> dict[str, Any]:
+            return {
+                "calls": totals.calls,
+                "rows": totals.rows,
+                "wall": round(totals.wall, 6),
+                "cpu": round(totals.cpu, 6),
+                "slowest_call": round(totals.slowest, 6),
+                "rows_per_second": round(totals.rows / totals.wall, 1) if totals.rows and totals.wall else None,
+            }
+
+        report = {
+            "generated": datetime.now().isoformat(),
+            "wall": round(time.perf_counter() - self.start, 6),
+            # Linux reports kilobytes, macOS bytes.
+            "peak_rss": (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+                if resource is not None
+                else None
+            ),
+            "totals": {phase: describe(totals) for phase, totals in self.totals().items()},
+            "phases": [
+                {"phase": phase, "model": model, **describe(totals)}
+                for (phase, model), totals in sorted(self.phases.items(), key=lambda item: -item[1].wall)
+            ],
+        }
+
+        with open(METRICS_FILE, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        if self.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(50)
+            profile = f"cProfile of the {self.profile_phase} phase\n\n{stream.getvalue()}"
+        elif self.snapshot is not None:
+            statistics = self.snapshot.statistics("lineno")[:30]
+            profile = f"tracemalloc of the {self.profile_phase} phase, peak {self.traced_peak:,} bytes\n\n"
+            profile += "\n".join(str(statistic) for statistic in statistics)
+        else:
+            return
+
+        with open(PROFILE_FILE, "w", encoding="utf-8") as f:
+            f.write(profile + "\n")
+
+
+metrics = Metrics()
+
+
+class IdSet:
+    """
+    Set of imported ids, kept as a bitmap over the ids from 0.
+
+    A Python set takes 60 bytes or more per id, which adds up for tens of millions of instances.
+    Primary keys are mostly dense, so each id is a single bit here. Ids the bitmap can't grow to
+    cheaply (see `ID_BITMAP_DENSITY`), negative ones and non-integers go in a plain set instead.
+    """
+
+    __slots__ = ("bits", "sparse", "count")
+
+    MIN_BITS = 1 << 16
+
+    def __init__(self, ids: Iterable = ()):
+        self.bits = bytearray()
+        self.sparse = set()
+        self.count = 0
+        self.update(ids)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, pk) -> bool:
+        if isinstance(pk, int) and 0 <= pk < len(self.bits) * 8:
+            return self.bits[pk >> 3] >> (pk & 7) & 1 == 1
+        return pk in self.sparse
+
+    def isin(self, values: Iterable) -> list[bool]:
+        """Test a whole column of values at once."""
+        bits, size, sparse = self.bits, len(self.bits) * 8, self.sparse
+        return [
+            bits[pk >> 3] >> (pk & 7) & 1 == 1 if isinstance(pk, int) and 0 <= pk < size else pk in sparse
+            for pk in values
+        ]
+
+    def grow(self, size: int):
+        """Extend the bitmap to at least `size` bytes, moving the ids it now covers out of the plain set."""
+        size = max(size, len(self.bits) * 2, self.MIN_BITS // 8)
+        self.bits.extend(bytes(size - len(self.bits)))
+
+        for pk in [pk for pk in self.sparse if isinstance(pk, int) and 0 <= pk < size * 8]:
+            self.sparse.remove(pk)
+            self.bits[pk >> 3] |= 1 << (pk & 7)
+
+    def add(self, pk):
+        dense = isinstance(pk, int) and pk >= 0
+
+        if dense and pk >= len(self.bits) * 8:
+            if pk in self.sparse:
+                return
+            if pk >= max((self.count + 1) * ID_BITMAP_DENSITY, self.MIN_BITS):
+                dense = False
+            else:
+                self.grow(pk // 8 + 1)
+
+        if not dense:
+            if pk not in self.sparse:
+                self.sparse.add(pk)
+                self.count += 1
+            return
+
+        mask = 1 << (pk & 7)
+        if not self.bits[pk >> 3] & mask:
+            self.bits[pk >> 3] |= mask
+            self.count += 1
+
+    def discard(self, pk):
+        if pk not in self:
+            return
+
+        self.count -= 1
+
+        if isinstance(pk, int) and 0 <= pk < len(self.bits) * 8:
+            self.bits[pk >> 3] &= ~(1 << (pk & 7)) & 0xFF
+        else:
+            self.sparse.discard(pk)
+
+    def update(self, ids: Iterable):
+        if not isinstance(ids, IdSet):
+            ids = list(ids)
+            limit = max((self.count + len(ids)) * ID_BITMAP_DENSITY, self.MIN_BITS)
+            top = max((pk for pk in ids if isinstance(pk, int) and 0 <= pk < limit), default=-1)
+
+            if top >= len(self.bits) * 8:
+                self.grow(top // 8 + 1)
+
+            bits, size = self.bits, len(self.bits) * 8
+            for pk in ids:
+                if isinstance(pk, int) and 0 <= pk < size:
+                    bits[pk >> 3] |= 1 << (pk & 7)
+                else:
+                    self.sparse.add(pk)
+
+            self.count = int.from_bytes(bits, "little").bit_count() + len(self.sparse)
+            return
+
+        # Another id set's bitmap is merged as a whole.
+        if len(ids.bits) > len(self.bits):
+            self.grow(len(ids.bits))
+
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(ids.bits, "little")
+        self.bits[:] = merged.to_bytes(len(self.bits), "little")
+        self.count = merged.bit_count() + len(self.sparse)
+
+        for pk in ids.sparse:
+            self.add(pk)
+
+    def __isub__(self, ids: Iterable) -> "IdSet":
+        for pk in ids:
+            self.discard(pk)
+        return self
+
+
+class ForeignKeyResolver:
+    """
+    Answers foreign key checks from memory.
+
+    The ids of a referenced model are loaded with a single query the first time a value isn't
+    among the imported ids. Rows inserted afterwards are tracked in `inserted_ids` by `load()`.
+    """
+
+    def __init__(self):
+        self.ids: dict[Any, IdSet] = {}
+        self.ignored: dict[Any, set] = {}
+
+    async def exists(self, model, pk) -> bool:
+        if model not in self.ids:
+            with metrics.measure("fk_lookup", model) as phase:
+                self.ids[model] = IdSet(await model.all().values_list("id", flat=True))
+                phase.rows = len(self.ids[model])
+            self.ids[model] -= self.ignored.get(model, set())
+        return pk in self.ids[model]
+
+    def ignore(self, model, ids: Iterable[int]):
+        """Leave rows the import created itself, like placeholders, out of `model`'s ids."""
+        ids = set(ids)
+        self.ignored.setdefault(model, set()).update(ids)
+        if model in self.ids:
+            self.ids[model] -= ids
+
+
+def to_placeholder_discord_id(missing_player_id: int) -> int:
+    # Claude AI - Use a valid 18-digit discord_id in a reserved range
+    # 900000000000000000 + missing_player_id keeps it 18 digits for IDs up to 99999999999999999
+    # We clamp to ensure it stays 17-19 digits
+    return 900000000000000000 + (missing_player_id % 99999999999999999)
+
+
+def placeholder_policies() -> tuple[DonationPolicy, PrivacyPolicy]:
+    # Use the first valid enum value for each policy field
+    try:
+        donation = DonationPolicy.ALWAYS_ACCEPT
+    except AttributeError:
+        donation = list(DonationPolicy)[0]
+    try:
+        privacy = PrivacyPolicy.ALLOW_ALL
+    except AttributeError:
+        privacy = list(PrivacyPolicy)[0]
+    return donation, privacy
+
+
+async def get_or_create_placeholder_player(missing_player_id, placeholder_log: EventLog, created_placeholders):
+    """Create a unique placeholder Player for a specific missing player ID."""
+    placeholder_key = f"Player_{missing_player_id}"
+    if placeholder_key in created_placeholders:
+        return created_placeholders[placeholder_key]
+    
+    placeholder_discord_id = to_placeholder_discord_id(missing_player_id)
+    
+    placeholder_player = await Player.filter(discord_id=placeholder_discord_id).first()
+    
+    if not placeholder_player:
+        donation, privacy = placeholder_policies()
+        
+        placeholder_player = await Player.create(
+            discord_id=placeholder_discord_id,
+            donation_policy=donation,
+            privacy_policy=privacy,
+        )
+        placeholder_log.record(
+            "placeholder", Player, placeholder_player.pk, "created",
+            discord_id=placeholder_discord_id, missing_id=missing_player_id,
+        )
+    
+    created_placeholders[placeholder_key] = placeholder_player.pk
+    return placeholder_player.pk
+
+
+async def find_missing_players(data: dict, models: list, inserted_ids: dict, fk_resolver: ForeignKeyResolver) -> dict[int, None]:
+    """Collect the Player ids referenced by `models` that will need a placeholder, in order of appearance."""
+    known = inserted_ids.get(Player, IdSet())
+    missing = {}
+
+    for model in models:
+        # Rows only hold the `_id` column of a relation, see `SECTIONS`.
+        player_fields = [
+            (field_name + "_id", getattr(field_obj, "null", False))
+            for field_name, field_obj in model._meta.fields_map.items()
+            if getattr(field_obj, "related_model", None) is Player
+        ]
+
+        if not player_fields or model not in data:
+            continue
+
+        # A block at a time, so the columns of a whole model are never built at once.
+        for block in data[model].blocks:
+            columns = [block.column(field_name) for field_name, _ in player_fields]
+            imported = [known.isin(column) for column in columns]
+
+            for index, row_id in enumerate(block.column("id")):
+                if row_id is None or row_id is OMITTED:
+                    continue
+
+                for (_, nullable), column, found in zip(player_fields, columns, imported):
+                    fk_value = column[index]
+
+                    if fk_value is None or fk_value is OMITTED or fk_value in missing:
+                        continue
+
+                    # Zero gets a placeholder unless the field is nullable, see `load()`.
+                    if fk_value == 0:
+                        if not nullable:
+                            missing[fk_value] = None
+                    elif not found[index] and not await fk_resolver.exists(Player, fk_value):
+                        missing[fk_value] = None
+
+            await asyncio.sleep(0)
+
+    return missing
+
+
+async def create_placeholder_players(missing_player_ids: dict[int, None], placeholder_log: EventLog, created_placeholders) -> int:
+    """Create the placeholder Players of all missing player IDs with a single bulk insert."""
+    discord_ids = {
+        missing_player_id: to_placeholder_discord_id(missing_player_id)
+        for missing_player_id in missing_player_ids
+        if f"Player_{missing_player_id}" not in created_placeholders
+    }
+    unique = list(dict.fromkeys(discord_ids.values()))
+
+    # Placeholders left over from a previous run are reused.
+    existing = {}
+    for i in range(0, len(unique), QUERY_BATCH_SIZE):
+        batch = unique[i : i + QUERY_BATCH_SIZE]
+        existing.update(await Player.filter(discord_id__in=batch).values_list("discord_id", "id"))
+
+    new = [discord_id for discord_id in unique if discord_id not in existing]
+
+    if new:
+        donation, privacy = placeholder_policies()
+        await Player.bulk_create(
+            [Player(discord_id=discord_id, donation_policy=donation, privacy_policy=privacy) for discord_id in new],
+            batch_size=QUERY_BATCH_SIZE,
+        )
+
+    # Bulk inserts don't return primary keys, so they're fetched back.
+    created = {}
+    for i in range(0, len(new), QUERY_BATCH_SIZE):
+        batch = new[i : i + QUERY_BATCH_SIZE]
+        created.update(await Player.filter(discord_id__in=batch).values_list("discord_id", "id"))
+
+    for missing_player_id, discord_id in discord_ids.items():
+        if discord_id in created and discord_id not in existing:
+            existing[discord_id] = created[discord_id]
+            placeholder_log.record(
+                "placeholder", Player, created[discord_id], "created", discord_id=discord_id, missing_id=missing_player_id
+            )
+
+        created_placeholders[f"Player_{missing_player_id}"] = existing[discord_id]
+
+    return len(new)
+
+
+def player_references() -> list[tuple[Any, str]]:
+    """Return every model with a foreign key to Player, and the column holding it."""
+    return [
+        (model, f"{field_name}_id")
+        for model in Tortoise.apps.get("models", {}).values()
+        for field_name, field in model._meta.fields_map.items()
+        if getattr(field, "related_model", None) is Player
+    ]
+
+
+async def remove_unused_placeholders(created_placeholders: dict[str, int], placeholder_log: EventLog) -> int:
+    """
+    Delete the placeholder Players no row references anymore.
+
+    Placeholders are created before the rows referencing them are validated, so the rows skipped
+    for another reason, such as an invalid Ball, leave theirs unused.
+    """
+    unused = set(created_placeholders.values())
+
+    for model, column in player_references():
+        ids = list(unused)
+        for i in range(0, len(ids), QUERY_BATCH_SIZE):
+            batch = ids[i : i + QUERY_BATCH_SIZE]
+            unused -= set(await model.filter(**{f"{column}__in": batch}).values_list(column, flat=True))
+
+    ids = sorted(unused)
+    for i in range(0, len(ids), QUERY_BATCH_SIZE):
+        await Player.filter(id__in=ids[i : i + QUERY_BATCH_SIZE]).delete()
+
+    for key, pk in list(created_placeholders.items()):
+        if pk in unused:
+            del created_placeholders[key]
+            placeholder_log.record("placeholder", Player, pk, "removed", missing_id=int(key.removeprefix("Player_")))
+
+    return len(ids)
+
+
+# A placeholder being moved holds this discord_id plus its new id until its old row is deleted.
+# It's valid for Discord ID validators and unique, but past any real ID.
+MOVING_DISCORD_ID = 9000000000000000000
+
+
+async def relocate_placeholders(rows: ParsedRows, placeholder_log: EventLog) -> int:
+    """
+    Move the placeholder Players holding the ids of a delta's Players to new ids.
+
+    Placeholders take the ids after the last imported Player, which the next Players of the exported
+    bot take too. Discord ids don't change, so an id holding another discord_id is a placeholder.
+    """
+    incoming = {pk: discord_id for pk, discord_id in zip(rows.values("id"), rows.values("discord_id")) if pk is not None}
+    ids = list(incoming)
+    existing = []
+
+    for i in range(0, len(ids), QUERY_BATCH_SIZE):
+        existing += await Player.filter(id__in=ids[i : i + QUERY_BATCH_SIZE]).values_list("id", "discord_id")
+
+    taken = [(pk, discord_id) for pk, discord_id in existing if discord_id != incoming[pk]]
+    if not taken:
+        return 0
+
+    references = player_references()
+    last_id = await Player.all().order_by("-id").first().values_list("id", flat=True)
+    next_id = max(last_id, *ids) + 1
+    donation, privacy = placeholder_policies()
+
+    async with in_transaction("default"):
+        for pk, discord_id in taken:
+            # The discord_id is unique, the copy takes it once the placeholder's old row is deleted.
+            await Player.create(
+                id=next_id,
+                discord_id=MOVING_DISCORD_ID + next_id,
+                donation_policy=donation,
+                privacy_policy=privacy,
+            )
+
+            for model, column in references:
+                await model.filter(**{column: pk}).update(**{column: next_id})
+
+            await Player.filter(id=pk).delete()
+            await Player.filter(id=next_id).update(discord_id=discord_id)
+            # A Player of the delta has its previous id.
+            placeholder_log.record("placeholder", Player, next_id, "moved", discord_id=discord_id, previous_id=pk)
+            next_id += 1
+
+    return len(taken)
+
+
+def copy_records(model, instances: list) -> tuple[list[str], list[tuple]]:
+    """Return the columns of `model` and the database values of `instances`, as `bulk_create` would insert them."""
+    fields = [
+        (model._meta.fields_map[field_name], field_name, column)
+        for field_name, column in model._meta.fields_db_projection.items()
+    ]
+    records = [
+        tuple(field.to_db_value(getattr(instance, field_name), instance) for field, field_name, _ in fields)
+        for instance in instances
+    ]
+    return [column for _, _, column in fields], records
+
+
+def update_columns(model) -> list[str]:
+    """Return the columns an upsert overwrites, every column but the primary key."""
+    return [column for column in model._meta.fields_db_projection.values() if column != model._meta.db_pk_column]
+
+
+async def copy_upsert(connection, model, columns: list[str], records: list[tuple]):
+    """COPY can't update rows, so they're copied to a staging table and upserted from there."""
+    table = model._meta.db_table
+    staging = f"{table}_upsert"
+    names = ", ".join(f'"{column}"' for column in columns)
+    updates = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in update_columns(model))
+
+    await connection.execute(f'CREATE TEMPORARY TABLE "{staging}" (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DROP')
+    await connection.copy_records_to_table(staging, records=records, columns=columns)
+    await connection.execute(
+        f'INSERT INTO "{table}" ({names}) SELECT {names} FROM "{staging}" '
+        f'ON CONFLICT ("{model._meta.db_pk_column}") DO UPDATE SET {updates}'
+    )
+
+
+async def copy_chunk(model, chunk: list, upsert: bool = False) -> bool:
+    """Insert `chunk` with a binary COPY in its own transaction. Returns False if the database can't."""
+    client = Tortoise.get_connection("default")
+    if asyncpg is None or client.capabilities.dialect != "postgres":
+        return False
+
+    with metrics.measure("copy_encode", model, len(chunk)):
+        columns, records = copy_records(model, chunk)
+
+    async with client.acquire_connection() as connection:
+        # Other PostgreSQL drivers (psycopg) don't have asyncpg's COPY helpers.
+        if not hasattr(connection, "copy_records_to_table"):
+            return False
+
+        try:
+            async with connection.transaction():
+                if upsert:
+                    await copy_upsert(connection, model, columns, records)
+                else:
+                    await connection.copy_records_to_table(model._meta.db_table, records=records, columns=columns)
+        except (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError) as e:
+            # Errors are raised by asyncpg directly, not translated by Tortoise.
+            raise IntegrityError(str(e)) from e
+
+    return True
+
+
+async def insert_chunk(model, chunk: list, skipped_log: EventLog, failed: set, upsert: bool = False):
+    """Insert `chunk`, or update the rows that already exist when `upsert` is set."""
+    try:
+        with metrics.measure("insert", model) as phase:
+            if INSERT_BACKEND != "copy" or not await copy_chunk(model, chunk, upsert):
+                async with in_transaction("default"):
+                    if upsert:
+                        await model.bulk_create(chunk, on_conflict=[model._meta.db_pk_column], update_fields=update_columns(model))
+                    else:
+                        await model.bulk_create(chunk)
+            phase.rows = len(chunk)
+    except (IntegrityError, ValidationError, ValueError) as e:
+        if len(chunk) == 1:
+            skipped_log.record("skipped", model, chunk[0].pk, "insert_failed", error=str(e)[:200])
+            failed.add(chunk[0].pk)
+            return
+
+        # Split the chunk until the rows at fault are found, the others are still inserted.
+        middle = len(chunk) // 2
+        await insert_chunk(model, chunk[:middle], skipped_log, failed, upsert)
+        await insert_chunk(model, chunk[middle:], skipped_log, failed, upsert)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Journal of an import's progress, saved after every committed insert transaction.
+
+    It records the migration file's hash, the placeholder Players created so far and, per model,
+    how many of its built instances were committed, in build order, and which ids failed.
+    Instances are rebuilt the same way from the same file, so a resumed import validates
+    everything again but only inserts what wasn't committed yet.
+    """
+
+    def __init__(self, file_hash: str, state: dict | None = None):
+        self.state = state or {"hash": file_hash, "placeholders": {}, "models": {}}
+        self.resumed = state is not None
+
+    @classmethod
+    def load(cls, file_hash: str) -> "Checkpoint | None":
+        """Return the checkpoint of an interrupted import of the same file, if there is one."""
+        try:
+            with open(CHECKPOINT_FILE, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if state.get("hash") != file_hash:
+            return None
+
+        return cls(file_hash, state)
+
+    @property
+    def placeholders(self) -> dict[str, int]:
+        """`created_placeholders` of the import, saved along with the rest."""
+        return self.state["placeholders"]
+
+    def model(self, model) -> dict:
+        return self.state["models"].setdefault(model.__name__, {"committed": 0, "failed": [], "done": False})
+
+    def save(self):
+        # Written to a temporary file first, so a crash never leaves a partial journal.
+        with open(CHECKPOINT_FILE + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(CHECKPOINT_FILE + ".tmp", CHECKPOINT_FILE)
+
+    def remove(self):
+        if os.path.exists(CHECKPOINT_FILE):
+            os.remove(CHECKPOINT_FILE)
+
+
+class InsertStage:
+    """
+    Insert stage of the import pipeline.
+
+    Chunks of instances handed over with `put()` are inserted by a background task while the
+    next chunk is validated. Each transaction inserts up to `batch_size` rows, adapted so it
+    takes about `INSERT_TARGET_SECONDS`. The ids of the rows that failed are kept in `failed`.
+
+    Every committed transaction is recorded in the checkpoint. When resuming, the instances
+    committed by the interrupted import are skipped. With `upsert`, rows that already exist
+    are updated instead.
+    """
+
+    def __init__(self, reporter: ProgressReporter, model, skipped_log: EventLog, total: int, checkpoint: Checkpoint, upsert: bool = False):
+        self.reporter = reporter
+        self.model = model
+        self.skipped_log = skipped_log
+        self.checkpoint = checkpoint
+        self.journal = checkpoint.model(model)
+        self.progress = reporter.track(f"- Processing {model.__name__}", total)  # Counts validated rows.
+        self.inserted = self.journal["committed"]
+        self.skip = self.journal["committed"]
+        self.upsert = upsert
+        # Upserting a row twice is harmless, so only inserts check what the last transaction left.
+        self.resuming = checkpoint.resumed and not self.journal["done"] and not upsert
+        self.batch_size = INSERT_BATCH_SIZE
+        self.failed = set(self.journal["failed"])
+        self.queue = asyncio.Queue(INSERT_QUEUE_SIZE)
+        self.task: asyncio.Task | None = None
+
+    def report(self):
+        self.progress.detail = f"saved {self.inserted - len(self.failed):,}"
+        self.reporter.refresh()
+
+    async def insert(self, instances: list):
+        if self.journal["done"]:
+            return
+
+        if self.skip:
+            skipped = min(self.skip, len(instances))
+            instances = instances[skipped:]
+            self.skip -= skipped
+
+        if self.resuming and instances:
+            # The import may have stopped between a commit and its journal entry, which can
+            # only concern the next transaction.
+            self.resuming = False
+            ids = [instance.pk for instance in instances[: INSERT_BATCH_LIMITS[1]]]
+            existing = set(await self.model.filter(pk__in=ids).values_list("id", flat=True))
+            if existing:
+                instances = [instance for instance in instances if instance.pk not in existing]
+                self.inserted += len(existing)
+
+        position = 0
+
+        while position < len(instances):
+            chunk = instances[position : position + self.batch_size]
 
-def safe_datetime(value):
-    if value in (None, "", "None"):
-        return None
-    if isinstance(value, datetime):
-        return value
-    try:
-        f = float(value)
-        if 0 <= f <= 4_102_444_800:
-            return datetime.fromtimestamp(f)
-    except (TypeError, ValueError, OSError):
-        pass
-    try:
-        return datetime.fromisoformat(str(value))
-    except (ValueError, TypeError):
-        return None
-    
-def safe_date(value):
-    if value in (None, "", "None"):
-        return None
-    if isinstance(value, date):
-        return value
-    try:
-        f = float(value)
-        if f > 10_000_000_000:
-            return date.fromtimestamp(f)
-        return None
-    except (TypeError, ValueError):
-        pass
-    try:
-        return date.fromisoformat(value)
-    except ValueError:
-        return None
-# ----------- ChatGPT Ends Here -------------
+            start = time.perf_counter()
+            try:
+                await insert_chunk(self.model, chunk, self.skipped_log, self.failed, self.upsert)
+            except Exception as e:
+                error_msg = f"ERROR: {type(e).__name__}: {str(e)[:500]}"
+                self.skipped_log.record(
+                    "error", self.model, chunk[0].pk, "bulk_create_failed",
+                    error=error_msg, first_items=[failed_item.__dict__ for failed_item in chunk[:3]],
+                )
+                self.skipped_log.flush()
 
-SECTIONS = {
-    "R": [Regime, ["id", "background", "name"]],
-    "E": [Economy, ["id", "icon", "name"]],
-    "S-EV": [Special, ["id", "background", "catch_phrase", "emoji", "end_date", "hidden", "name", "rarity", "start_date", "tradeable"]],
-    "S-EX": [Special, ["id", "catch_phrase", "emoji", "background", "name", "rarity"]],
-    "B": [Ball, ["id", "capacity_description", "capacity_name", "credits", "regime_id", "catch_names", "collection_card", "economy_id", "created_at", "emoji_id", "enabled", "country", "attack", "rarity", "short_name", "wild_card", "tradeable", "health"]],
-    "BI": [BallInstance, ["id", "ball_id", "catch_date", "special_id", "favorite", "attack_bonus", "player_id", "server_id", "spawned_time", "trade_player_id", "tradeable", "health_bonus"]],
-    "P": [Player, ["id", "discord_id", "donation_policy", "privacy_policy"]],
-    "GC": [GuildConfig, ["id", "enabled", "guild_id", "spawn_channel"]],
-    "F": [Friendship, ["id", "player1_id", "player2_id", "since"]],
-    "BU": [BlacklistedID, ["id", "date", "discord_id", "reason"]],
-    "BG": [BlacklistedGuild, ["id", "date", "discord_id", "reason"]],
-    "T": [Trade, ["id", "date", "player1_id", "player2_id"]],
-    "TO": [TradeObject, ["id", "ballinstance_id", "player_id", "trade_id"]],
-}
+                output.append(f"- CRITICAL ERROR: Bulk create failed for {self.model.__name__}: {error_msg}")
+                output.append(f"- Check `{SKIPPED_LOG_FILE}` for details.")
+                self.reporter.refresh()
+                raise
+            elapsed = time.perf_counter() - start
 
-def read_bz2(path: str):
-    with bz2.open(path, "rb") as bz2f:
-        return bz2f.read().splitlines()
+            position += len(chunk)
+            self.inserted += len(chunk)
 
-output = []
+            self.journal["committed"] = self.inserted
+            self.journal["failed"] = list(self.failed)
+            self.checkpoint.save()
 
-def reload_embed(start_time: float | None = None, status="RUNNING"):
-    embed = discord.Embed(title="BD-Migrator Process", description=f"Status: **{status}**")
-    
-    if status == "RUNNING":
-        embed.color = discord.Color.yellow()
-    elif status == "FINISHED":
-        embed.color = discord.Color.green()
-    elif status == "CANCELED":
-        embed.color = discord.Color.red()
+            if INSERT_TARGET_SECONDS > 0 and elapsed > 0:
+                # Grow or shrink by at most 2x at a time, latency is noisy.
+                scale = min(max(INSERT_TARGET_SECONDS / elapsed, 0.5), 2.0)
+                self.batch_size = min(max(int(self.batch_size * scale), INSERT_BATCH_LIMITS[0]), INSERT_BATCH_LIMITS[1])
 
-    if len(output) > 0:
-        recent_output = output[-20:] if len(output) > 20 else output
-        output_text = "\n".join(recent_output)
-        if len(output_text) > 1000:
-            output_text = "...\n" + output_text[-1000:]
-        embed.add_field(name="Output", value=output_text)
+            self.report()
 
-    if start_time is not None:
-        embed.set_footer(text=f"Ended migration in {round((time.time() - start_time), 3)}s")
+    async def run(self):
+        while (instances := await self.queue.get()) is not None:
+            await self.insert(instances)
 
-    return embed
+    async def put(self, instances: list | None):
+        """Queue `instances` for insertion, waiting while the queue is full."""
+        put = asyncio.ensure_future(self.queue.put(instances))
+        await asyncio.wait([put, self.task], return_when=asyncio.FIRST_COMPLETED)
 
+        if self.task.done():
+            put.cancel()
+            self.task.result()  # Raises the insert error, if any.
 
-async def get_or_create_placeholder_player(missing_player_id, placeholder_log, created_placeholders):
-    """Create a unique placeholder Player for a specific missing player ID."""
-    placeholder_key = f"Player_{missing_player_id}"
-    if placeholder_key in created_placeholders:
-        return created_placeholders[placeholder_key]
-    
-    # Claude AI - Use a valid 18-digit discord_id in a reserved range
-    # 900000000000000000 + missing_player_id keeps it 18 digits for IDs up to 99999999999999999
-    # We clamp to ensure it stays 17-19 digits
-    placeholder_discord_id = 900000000000000000 + (missing_player_id % 99999999999999999)
-    
-    placeholder_player = await Player.filter(discord_id=placeholder_discord_id).first()
-    
-    if not placeholder_player:
-        # Use the first valid enum value for each policy field
-        try:
-            donation = DonationPolicy.ALWAYS_ACCEPT
-        except AttributeError:
-            donation = list(DonationPolicy)[0]
-        try:
-            privacy = PrivacyPolicy.ALLOW_ALL
-        except AttributeError:
-            privacy = list(PrivacyPolicy)[0]
-        
-        placeholder_player = await Player.create(
-            discord_id=placeholder_discord_id,
-            donation_policy=donation,
-            privacy_policy=privacy,
-        )
-        placeholder_log.write(f"Created placeholder Player (discord_id={placeholder_discord_id}, DB ID={placeholder_player.pk}) for missing Player ID {missing_player_id}\n")
-    
-    created_placeholders[placeholder_key] = placeholder_player.pk
-    return placeholder_player.pk
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self.run())
+        return self
 
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            return
 
-async def load(message):
-    lines = read_bz2("migration.txt.bz2")
-    section = ""
-    data = {}
-    exclusive_id_map = {}  # Claude AI - Map original Exclusive IDs to offset IDs
+        await self.put(None)
+        await self.task
 
-    skipped_log = open("skipped_records.log", "w", encoding="utf-8")
-    skipped_log.write("=== MIGRATION SKIPPED RECORDS LOG ===\n")
-    skipped_log.write(f"Generated: {datetime.now()}\n\n")
-    
-    placeholder_log = open("placeholder_assignments.log", "w", encoding="utf-8")
-    placeholder_log.write("=== PLACEHOLDER ASSIGNMENTS LOG ===\n")
-    placeholder_log.write(f"Generated: {datetime.now()}\n")
-    placeholder_log.write("Records assigned to placeholder entities:\n\n")
-    
-    created_placeholders = {}
+        self.journal["done"] = True
+        self.checkpoint.save()
 
-    output.append(f"- Reading migration file with {len(lines):,} lines...")
-    await message.edit(embed=reload_embed())
 
-    for index, line in enumerate(lines, start=1):
-        line = line.decode().rstrip()
+# Values given to these fields when a row leaves them empty, whether or not the field is required.
+ROW_DEFAULTS = {"short_name": "Unknown", "country": "Unknown", "enabled": True, "tradeable": True}
 
-        if index % 10000 == 0:
-            output[-1] = f"- Reading migration file... (line {index:,}/{len(lines):,})"
-            await message.edit(embed=reload_embed())
+# Valid 19-digit Discord ID given to emoji_id values that aren't 17 to 19 digits long.
+EMOJI_PLACEHOLDER = 1234567890123456789
 
-        if line.startswith("//") or line == "":
-            continue
+STRING_FIELD_TYPES = ("CharField", "TextField")
 
-        if line.startswith(":"):
-            section = line[1:]
-            if section not in SECTIONS:
-                raise Exception(f"Invalid section '{section}' detected on line {index}")
-            continue
 
-        if section == "":
-            continue
+def is_nullable(field) -> bool:
+    return field is not None and getattr(field, "null", False)
 
-        section_full = SECTIONS[section]
 
-        if section_full[0] not in data:
-            data[section_full[0]] = []
+def required_default(field_name: str, field_type: str) -> Callable[[], Any]:
+    """Return the factory of the value given to a required field that is still None once built."""
+    if field_name == "emoji_id":
+        return lambda: EMOJI_PLACEHOLDER
+    if field_type in STRING_FIELD_TYPES:
+        return lambda: "Unknown"
+    if field_type == "IntField":
+        return lambda: 0
+    if field_type == "FloatField":
+        return lambda: 0.0
+    if field_type == "BooleanField":
+        return lambda: False
+    if field_type in ("DatetimeField", "DateField"):
+        return datetime.now
+    return lambda: "Unknown"
 
-        model_dict = {}
-        fields = section_full[0]._meta.fields_map
-        attribute_index = 0
 
-        for value, line_data in zip(section_full[1], line.split("╵")):
-            attribute_index += 1
+class ModelRules:
+    """
+    Validation and normalization rules of a model, compiled once from its metadata.
 
-            if value == "id" and line_data == "":
-                skipped_log.write(f"Line {index} - {section_full[0].__name__}: SKIPPED - Empty ID field\n")
-                model_dict = None
-                break
-            
-            if line_data == "":
+    `insert_models()` applies them to every row in a single pass: foreign key checks on the row,
+    required fields left empty, emoji_id length, then required fields and zero foreign keys on the
+    built instance. Field validators are then checked a column at a time by `validate_columns()`.
+    """
+
+    def __init__(self, model):
+        fields_map = model._meta.fields_map
+
+        # Tortoise stores FKs as 'player' in fields_map but migration data uses 'player_id', both are checked.
+        self.fk_fields = {}
+        for field_name, field_obj in fields_map.items():
+            if getattr(field_obj, "related_model", None) is not None:
+                self.fk_fields[field_name] = field_obj.related_model
+                self.fk_fields[field_name + "_id"] = field_obj.related_model
+
+        # (name, related model, whether a zero becomes None)
+        self.foreign_keys = [
+            (name, related_model, is_nullable(fields_map.get(name[:-3] if name.endswith("_id") else name)))
+            for name, related_model in self.fk_fields.items()
+        ]
+        self.instance_foreign_keys = [key for key in self.foreign_keys if key[0].endswith("_id")]
+
+        self.required = {
+            name for name, field in fields_map.items() if hasattr(field, "null") and not field.null
+        }
+
+        # (name, type name, default factory) of the required fields that aren't relations.
+        self.required_fields = [
+            (name, type(field).__name__, required_default(name, type(field).__name__))
+            for name, field in fields_map.items()
+            if not hasattr(field, "related_model") and name in self.required
+        ]
+
+        # (name, nullable, is a Player reference) of every `_id` attribute, zero is never a valid id.
+        self.id_fields = [
+            (name, is_nullable(fields_map.get(name[:-3]) or fields_map.get(name)), "player" in name)
+            for name in fields_map
+            if name.endswith("_id") and not name.startswith("_")
+        ]
+
+        # Ballsdex checks emoji_id with a Discord ID validator, see `invalid_snowflakes()`.
+        self.has_emoji_id = "emoji_id" in fields_map
+
+        # Fields with validators, which Tortoise would otherwise only run when the rows are inserted.
+        self.validated_fields = [
+            (name, field)
+            for name, field in fields_map.items()
+            if getattr(field, "validators", None) and not hasattr(field, "related_model")
+        ]
+
+
+BOUND_VALIDATORS = (MinValueValidator, MaxValueValidator, MinLengthValidator, MaxLengthValidator)
+
+
+def failing_candidates(field, column: list) -> list[int] | None:
+    """
+    Return the indexes of the values of `column` that may fail `field`'s validators, using NumPy.
+
+    Returns None when the column can't be checked that way: NumPy isn't installed, a validator isn't
+    a bound, or the values aren't all numbers (or all strings for lengths).
+    """
+    if numpy is None or not all(isinstance(validator, BOUND_VALIDATORS) for validator in field.validators):
+        return None
+
+    # Tortoise skips the validators of nullable fields set to None, others fail.
+    present = [index for index, value in enumerate(column) if value is not None]
+    candidates = [] if field.null else [index for index, value in enumerate(column) if value is None]
+    values = [column[index] for index in present]
+
+    if not values:
+        return candidates
+
+    mask = numpy.zeros(len(values), dtype=bool)
+    numbers = lengths = None
+
+    try:
+        for validator in field.validators:
+            if isinstance(validator, (MinLengthValidator, MaxLengthValidator)):
+                if lengths is None:
+                    if not all(isinstance(value, str) for value in values):
+                        return None
+                    lengths = numpy.fromiter(map(len, values), dtype=numpy.int64, count=len(values))
+
+                if isinstance(validator, MinLengthValidator):
+                    mask |= lengths < validator.min_length
+                else:
+                    mask |= lengths > validator.max_length
                 continue
 
-            if value not in fields:
-                raise Exception(f"Unknown value '{value}' detected on line {index:,} - attribute {attribute_index:,} in {section_full[0].__name__} object")
+            if numbers is None:
+                numbers = numpy.asarray(values)
+                if numbers.dtype.kind not in "iuf":
+                    return None
 
-            if line_data == "None":
-                line_data = None
-            elif line_data == "🬀":
-                line_data = True
-            elif line_data == "🬁":
-                line_data = False
+            if isinstance(validator, MinValueValidator):
+                mask |= numbers < validator.min_value
+            else:
+                mask |= numbers > validator.max_value
+    except (OverflowError, TypeError):
+        # Bounds beyond the column's dtype, left to the validators themselves.
+        return None
 
-            field_type = fields[value]
+    return candidates + [present[index] for index in numpy.flatnonzero(mask)]
 
-            if line_data is not None:
-                if isinstance(field_type, IntField):
-                    line_data = safe_int(line_data)
-                elif isinstance(field_type, FloatField):
-                    line_data = float(line_data)
-                elif isinstance(field_type, DatetimeField):
-                    line_data = safe_datetime(line_data)
-                elif isinstance(field_type, DateField):
-                    line_data = safe_date(line_data)
 
-            if isinstance(line_data, str):
-                line_data = line_data.replace("🮈", "\n")
+def invalid_snowflakes(column: list) -> set[int]:
+    """
+    Return the indexes of the values of `column` that aren't 17 to 19 characters long as integers,
+    the length Discord IDs are validated with. None values are left out.
 
-            model_dict[value] = line_data
+    Integer columns are checked with NumPy range masks when possible, other values one at a time.
+    """
+    present = [index for index, value in enumerate(column) if value is not None]
 
-        if model_dict is not None:
-            # Claude AI - Track which section this came from for duplicate handling
-            model_dict['_section'] = section
-            data[section_full[0]].append(model_dict)
+    if numpy is not None and present and all(type(column[index]) is int for index in present):
+        try:
+            values = numpy.fromiter((column[index] for index in present), dtype=numpy.int64, count=len(present))
+        except OverflowError:
+            pass
+        else:
+            # 17 to 19 digits, or 16 to 18 after a minus sign. No int64 has more than 19 digits.
+            valid = (values >= 10**16) | ((values <= -(10**15)) & (values > -(10**18)))
+            return {present[index] for index in numpy.flatnonzero(~valid)}
 
-    output.append(f"- Finished reading migration file. Processing {len(data)} model types...")
-    await message.edit(embed=reload_embed())
+    invalid = set()
+    for index in present:
+        try:
+            if not 17 <= len(str(int(column[index]))) <= 19:
+                invalid.add(index)
+        except (ValueError, TypeError):
+            invalid.add(index)
 
-    start_time = time.time()
+    return invalid
+
+
+def validate_columns(rules: ModelRules, instances: list) -> dict[int, str]:
+    """
+    Check the validated fields of `instances` a column at a time, before they're inserted.
+
+    Bounds are checked on whole columns with NumPy when possible, only the values they flag (or
+    every value otherwise) go through the field's validators. Returns the error of every invalid
+    instance, by index.
+    """
+    invalid = {}
+
+    for name, field in rules.validated_fields:
+        column = [getattr(instance, name, None) for instance in instances]
+        candidates = failing_candidates(field, column)
+
+        for index in range(len(column)) if candidates is None else candidates:
+            try:
+                field.validate(column[index])
+            except ValidationError as e:
+                invalid.setdefault(index, str(e))
+
+    return invalid
+
+
+async def insert_models(
+    reporter: ProgressReporter, sections: SectionReader, skipped_log: EventLog, placeholder_log: EventLog, checkpoint: Checkpoint):
+    data = sections.data
+    exclusive_id_map = {}  # Claude AI - Map original Exclusive IDs to offset IDs
+    created_placeholders = checkpoint.placeholders
+    fk_resolver = ForeignKeyResolver()
+
+    if checkpoint.resumed:
+        # Placeholders didn't exist yet when the interrupted import checked its references.
+        fk_resolver.ignore(Player, created_placeholders.values())
+    placeholders_ready = False
+    placeholder_ids = {}  # Placeholder of every missing Player id found by the prepass.
     inserted_ids = {}
     
     # Claude AI - CRITICAL: Process models in dependency order
@@ -255,375 +2256,332 @@ async def load(message):
     ]
     
     for item in processing_order:
+        await sections.wait([item])
         if item not in data:
             continue
         value = data[item]
-        output.append(f"- Processing {item.__name__}... ({len(value):,} records to validate)")
-        await message.edit(embed=reload_embed())
-        
-        fields_map = item._meta.fields_map
+
+        if item == Player and sections.reader.delta is not None:
+            with metrics.measure("placeholders", Player):
+                moved = await relocate_placeholders(value, placeholder_log)
+            if moved:
+                output.append(f"- Moved {moved:,} placeholder Players whose IDs are taken by new Players.")
+
+        rules = ModelRules(item)
         
-        # Identify foreign key fields - map both 'field' and 'field_id' to related model
-        fk_fields = {}
-        for field_name, field_obj in fields_map.items():
-            if hasattr(field_obj, 'related_model') and field_obj.related_model is not None:
-                # Tortoise stores FK as 'player' in fields_map but migration data uses 'player_id'
-                fk_fields[field_name] = field_obj.related_model          # e.g. 'player'
-                fk_fields[field_name + '_id'] = field_obj.related_model  # e.g. 'player_id'
+        # Once Players are in, create the placeholders every later model needs in one go.
+        if not placeholders_ready and item != Player and Player in rules.fk_fields.values():
+            placeholders_ready = True
+            dependents = processing_order[processing_order.index(item):]
+            await sections.wait(dependents)
+            with metrics.measure("placeholders", Player):
+                missing_players = await find_missing_players(data, dependents, inserted_ids, fk_resolver)
+            
+            if missing_players:
+                with metrics.measure("placeholders", Player, len(missing_players)):
+                    created_count = await create_placeholder_players(missing_players, placeholder_log, created_placeholders)
+                checkpoint.save()
+                placeholder_ids = {
+                    missing_player_id: created_placeholders[f"Player_{missing_player_id}"] for missing_player_id in missing_players
+                }
+                # Placeholders take new ids, which rows can reference as missing Players of their own.
+                fk_resolver.ignore(Player, placeholder_ids.values())
+                # A resumed (or delta) import reuses the placeholders an earlier run created.
+                reused = len(missing_players) - created_count
+                output.append(
+                    f"- Created {created_count:,} placeholder Players for missing Player references"
+                    + (f", reused {reused:,} from an earlier run." if reused else ".")
+                )
+                reporter.refresh()
         
-        seen_ids = set()
-        unique_values = []
+        seen_ids = IdSet()
         skipped_count = 0
         fk_violation_count = 0
         null_field_count = 0
         duplicate_count = 0
+        validation_fail_count = 0
+        emoji_fixed_count = 0
+        insert_fail_count = 0
+        fixed_count = 0
+        zero_fk_fixed = 0
+        built_count = 0
+        invalid_ids = set()
         
-        for idx, model in enumerate(value):
-            if idx > 0 and idx % 5000 == 0:
-                output[-1] = f"- Processing {item.__name__}... (validated {idx:,}/{len(value):,})"
-                await message.edit(embed=reload_embed())
-            
-            model_id = model.get('id')
+        # Rows are validated and built one chunk at a time, the previous chunk is inserted meanwhile.
+        async with InsertStage(reporter, item, skipped_log, len(value), checkpoint, sections.reader.delta is not None) as inserter:
+            # Rows are only built as dicts a chunk at a time, see `RowBlock`.
+            for chunk in value.chunks(VALIDATE_CHUNK_SIZE):
+                items = []
+                
+                # Every rule is applied in a single pass over the rows.
+                with metrics.measure("build", item, len(chunk)):
+                    # References to the models inserted before are checked for the whole chunk at once.
+                    tracked = {
+                        fk_field_name: inserted_ids[related_model].isin([model.get(fk_field_name) for model in chunk])
+                        for fk_field_name, related_model, _ in rules.foreign_keys
+                        if related_model in inserted_ids
+                    }
+                    bad_emojis = invalid_snowflakes([model.get("emoji_id") for model in chunk]) if rules.has_emoji_id else set()
+
+                    for index, model in enumerate(chunk):
+                        model_id = model.get('id')
             
-            # Claude AI - Extract and remove section marker (not a real field)
-            section_type = model.pop('_section', None)
+                        # Claude AI - Extract and remove section marker (not a real field)
+                        section_type = model.pop('_section', None)
             
-            if model_id is None:
-                skipped_log.write(f"{item.__name__} - ID: None - SKIPPED: Null ID\n")
-                skipped_count += 1
-                continue
+                        if model_id is None:
+                            skipped_log.record("skipped", item, None, "null_id")
+                            skipped_count += 1
+                            continue
             
-            if model_id in seen_ids:
-                # Claude AI - Special case: Events and Exclusives can have same ID
-                # Keep both by offsetting Exclusive IDs
-                if item == Special and section_type in ["S-EV", "S-EX"]:
-                    if section_type == "S-EX":
-                        # Offset Exclusive ID to avoid conflict with Event ID
-                        original_id = model_id
-                        model_id = model_id + 10000
-                        model['id'] = model_id
-                        exclusive_id_map[original_id] = model_id
-                        placeholder_log.write(f"Exclusive ID {original_id} offset to {model_id} (would conflict with Event ID {original_id})\n")
+                        if model_id in seen_ids:
+                            # Claude AI - Special case: Events and Exclusives can have same ID
+                            # Keep both by offsetting Exclusive IDs
+                            if item == Special and section_type in ["S-EV", "S-EX"]:
+                                if section_type == "S-EX":
+                                    # Offset Exclusive ID to avoid conflict with Event ID
+                                    original_id = model_id
+                                    model_id = model_id + 10000
+                                    model['id'] = model_id
+                                    exclusive_id_map[original_id] = model_id
+                                    placeholder_log.record("changed", item, model_id, "exclusive_offset", original_id=original_id)
                     
-                    # Check if it's still a duplicate after offset
-                    if model_id in seen_ids:
-                        skipped_log.write(f"{item.__name__} - ID: {model_id} - SKIPPED: Duplicate ID even after Exclusive offset\n")
-                        skipped_count += 1
-                        duplicate_count += 1
-                        continue
-                else:
-                    skipped_log.write(f"{item.__name__} - ID: {model_id} - SKIPPED: Duplicate ID\n")
-                    skipped_count += 1
-                    duplicate_count += 1
-                    continue
+                                # Check if it's still a duplicate after offset
+                                if model_id in seen_ids:
+                                    skipped_log.record("skipped", item, model_id, "duplicate_id", exclusive_offset=True)
+                                    skipped_count += 1
+                                    duplicate_count += 1
+                                    continue
+                            else:
+                                skipped_log.record("skipped", item, model_id, "duplicate_id")
+                                skipped_count += 1
+                                duplicate_count += 1
+                                continue
             
-            # Validate foreign key references and create placeholders if needed
-            has_invalid_fk = False
-            for fk_field_name, related_model in fk_fields.items():
-                fk_value = model.get(fk_field_name)
+                        # Validate foreign key references and create placeholders if needed
+                        has_invalid_fk = False
+                        for fk_field_name, related_model, fk_nullable in rules.foreign_keys:
+                            fk_value = model.get(fk_field_name)
                 
-                # Skip None values entirely
-                if fk_value is None:
-                    continue
+                            # Skip None values entirely
+                            if fk_value is None:
+                                continue
                 
-                # Treat 0 as invalid
-                if fk_value == 0:
-                    # Look up the field without _id suffix to find the actual field object
-                    base_field_name = fk_field_name[:-3] if fk_field_name.endswith('_id') else fk_field_name
-                    field_obj = fields_map.get(base_field_name)
-                    is_nullable = field_obj is not None and getattr(field_obj, 'null', False)
-                    
-                    if is_nullable:
-                        model[fk_field_name] = None
-                        placeholder_log.write(f"{item.__name__} ID {model_id}: Set {fk_field_name}=None (was 0, field is nullable)\n")
-                    elif related_model == Player:
-                        placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
-                        if Player not in inserted_ids:
-                            inserted_ids[Player] = set()
-                        inserted_ids[Player].add(placeholder_id)
-                        model[fk_field_name] = placeholder_id
-                        placeholder_log.write(f"{item.__name__} ID {model_id}: Replaced {fk_field_name}=0 with placeholder ID {placeholder_id}\n")
-                    else:
-                        skipped_log.write(f"{item.__name__} - ID: {model_id} - SKIPPED: {fk_field_name}=0 is invalid\n")
-                        has_invalid_fk = True
-                        fk_violation_count += 1
-                    continue  # Done handling this field
+                            # Treat 0 as invalid
+                            if fk_value == 0:
+                                if fk_nullable:
+                                    model[fk_field_name] = None
+                                    placeholder_log.record("changed", item, model_id, "zero_fk_nulled", field=fk_field_name)
+                                elif related_model == Player:
+                                    placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
+                                    fk_resolver.ignore(Player, [placeholder_id])
+                                    model[fk_field_name] = placeholder_id
+                                    placeholder_log.record(
+                                        "changed", item, model_id, "zero_fk_placeholder", field=fk_field_name, placeholder_id=placeholder_id
+                                    )
+                                else:
+                                    skipped_log.record("skipped", item, model_id, "zero_fk", field=fk_field_name)
+                                    has_invalid_fk = True
+                                    fk_violation_count += 1
+                                continue  # Done handling this field
+
+                            # Missing Players get the placeholder the prepass made for them, before any lookup.
+                            if related_model == Player and fk_value in placeholder_ids:
+                                placeholder_id = placeholder_ids[fk_value]
+                                model[fk_field_name] = placeholder_id
+                                placeholder_log.record(
+                                    "changed", item, model_id, "missing_player",
+                                    field=fk_field_name, value=fk_value, placeholder_id=placeholder_id,
+                                )
+                                continue
                 
-                # Normal FK validation
-                # Check three places: current batch (seen_ids), previous batches (inserted_ids), existing DB
-                exists_in_current_batch = related_model == item and fk_value in seen_ids
-                exists_in_tracking = related_model in inserted_ids and fk_value in inserted_ids[related_model]
+                            # Normal FK validation
+                            # Check three places: current batch (seen_ids), previous batches (inserted_ids), existing DB
+                            exists_in_current_batch = related_model == item and fk_value in seen_ids
+                            exists_in_tracking = fk_field_name in tracked and tracked[fk_field_name][index]
                 
-                if not exists_in_current_batch and not exists_in_tracking:
-                    exists_in_db = await related_model.filter(pk=fk_value).exists()
+                            if not exists_in_current_batch and not exists_in_tracking:
+                                exists_in_db = await fk_resolver.exists(related_model, fk_value)
                     
-                    if not exists_in_db:
-                        if related_model == Player:
-                            placeholder_id = await get_or_create_placeholder_player(fk_value, placeholder_log, created_placeholders)
-                            if Player not in inserted_ids:
-                                inserted_ids[Player] = set()
-                            inserted_ids[Player].add(placeholder_id)
-                            model[fk_field_name] = placeholder_id
-                            placeholder_log.write(f"{item.__name__} ID {model_id}: Reassigned {fk_field_name} from missing Player ID {fk_value} to placeholder DB ID {placeholder_id}\n")
-                        elif related_model == Special:
-                            # Special is nullable - but first check if this might be an Exclusive reference
-                            if fk_value in exclusive_id_map:
-                                # Try the Exclusive offset
-                                offset_id = exclusive_id_map[fk_value]
-                                offset_exists = offset_id in (inserted_ids.get(Special, set()))
-                                if offset_exists or await Special.filter(pk=offset_id).exists():
-                                    model[fk_field_name] = offset_id
-                                    placeholder_log.write(f"{item.__name__} ID {model_id}: Updated {fk_field_name} from {fk_value} to {offset_id} (Exclusive offset)\n")
-                                else:
-                                    # Neither Event nor Exclusive exists - null it
-                                    model[fk_field_name] = None
-                                    placeholder_log.write(f"{item.__name__} ID {model_id}: Set {fk_field_name}=None (Special ID {fk_value} not found, Exclusive offset {offset_id} also not found)\n")
-                            else:
-                                # No Exclusive offset available - just null it
-                                model[fk_field_name] = None
-                                placeholder_log.write(f"{item.__name__} ID {model_id}: Set {fk_field_name}=None (Special ID {fk_value} not found)\n")
-                        else:
-                            skipped_log.write(f"{item.__name__} - ID: {model_id} - SKIPPED: Invalid FK {fk_field_name}={fk_value} (references non-existent {related_model.__name__})\n")
-                            has_invalid_fk = True
-                            fk_violation_count += 1
-                            break
+                                if not exists_in_db:
+                                    if related_model == Player:
+                                        placeholder_id = await get_or_create_placeholder_player(fk_value, placeholder_log, created_placeholders)
+                                        fk_resolver.ignore(Player, [placeholder_id])
+                                        model[fk_field_name] = placeholder_id
+                                        placeholder_log.record(
+                                            "changed", item, model_id, "missing_player",
+                                            field=fk_field_name, value=fk_value, placeholder_id=placeholder_id,
+                                        )
+                                    elif related_model == Special:
+                                        # Special is nullable - but first check if this might be an Exclusive reference
+                                        if fk_value in exclusive_id_map:
+                                            # Try the Exclusive offset
+                                            offset_id = exclusive_id_map[fk_value]
+                                            offset_exists = offset_id in inserted_ids.get(Special, IdSet())
+                                            if offset_exists or await fk_resolver.exists(Special, offset_id):
+                                                model[fk_field_name] = offset_id
+                                                placeholder_log.record(
+                                                    "changed", item, model_id, "exclusive_offset_fk",
+                                                    field=fk_field_name, value=fk_value, new_value=offset_id,
+                                                )
+                                            else:
+                                                # Neither Event nor Exclusive exists - null it
+                                                model[fk_field_name] = None
+                                                placeholder_log.record(
+                                                    "changed", item, model_id, "missing_special",
+                                                    field=fk_field_name, value=fk_value, offset_value=offset_id,
+                                                )
+                                        else:
+                                            # No Exclusive offset available - just null it
+                                            model[fk_field_name] = None
+                                            placeholder_log.record("changed", item, model_id, "missing_special", field=fk_field_name, value=fk_value)
+                                    else:
+                                        skipped_log.record(
+                                            "skipped", item, model_id, "invalid_fk",
+                                            field=fk_field_name, value=fk_value, references=related_model.__name__,
+                                        )
+                                        has_invalid_fk = True
+                                        fk_violation_count += 1
+                                        break
             
-            if has_invalid_fk:
-                skipped_count += 1
-                continue
+                        if has_invalid_fk:
+                            skipped_count += 1
+                            continue
             
-            # Check for None values in non-nullable fields and set defaults
-            skip_record = False
-            null_fields = []
-            defaults_set = []
+                        # Check for None values in non-nullable fields and set defaults
+                        null_fields = []
+                        defaults_set = {}
             
-            for field_name, field_value in list(model.items()):
-                if field_value is None and field_name in fields_map:
-                    field_obj = fields_map[field_name]
-                    if hasattr(field_obj, 'null') and not field_obj.null:
-                        if field_name == 'country':
-                            model[field_name] = 'Unknown'
-                            defaults_set.append(f"{field_name}='Unknown'")
-                        elif field_name == 'short_name':
-                            model[field_name] = 'Unknown'
-                            defaults_set.append(f"{field_name}='Unknown'")
-                        elif field_name == 'enabled':
-                            model[field_name] = True
-                            defaults_set.append(f"{field_name}=True")
-                        elif field_name == 'tradeable':
-                            model[field_name] = True
-                            defaults_set.append(f"{field_name}=True")
-                        else:
-                            null_fields.append(field_name)
-                            skip_record = True
+                        for field_name, field_value in list(model.items()):
+                            if field_value is None and field_name in rules.required:
+                                if field_name in ROW_DEFAULTS:
+                                    model[field_name] = ROW_DEFAULTS[field_name]
+                                    defaults_set[field_name] = ROW_DEFAULTS[field_name]
+                                else:
+                                    null_fields.append(field_name)
             
-            if defaults_set:
-                placeholder_log.write(f"{item.__name__} ID {model_id}: Set defaults: {', '.join(defaults_set)}\n")
+                        if defaults_set:
+                            placeholder_log.record("changed", item, model_id, "defaults_set", defaults=defaults_set)
             
-            if skip_record:
-                skipped_log.write(f"{item.__name__} - ID: {model_id} - SKIPPED: Null required fields without defaults: {', '.join(null_fields)}\n")
-                skipped_count += 1
-                null_field_count += 1
-                continue
+                        if null_fields:
+                            skipped_log.record("skipped", item, model_id, "null_required", fields=null_fields)
+                            skipped_count += 1
+                            null_field_count += 1
+                            continue
                 
-            seen_ids.add(model_id)
-            unique_values.append(model)
-        
-        output[-1] = f"- Creating {item.__name__} instances... ({len(unique_values):,} valid records)"
-        await message.edit(embed=reload_embed())
-        
-        # Create model instances
-        items = []
-        validation_fail_count = 0
-        emoji_validation_count = 0
-        
-        for idx, model in enumerate(unique_values):
-            if idx > 0 and idx % 5000 == 0:
-                output[-1] = f"- Creating {item.__name__} instances... ({idx:,}/{len(unique_values):,})"
-                await message.edit(embed=reload_embed())
-            
-            # CRITICAL: Set defaults for required fields if they're None or missing
-            if model.get('short_name') is None:
-                model['short_name'] = 'Unknown'
-            if model.get('country') is None:
-                model['country'] = 'Unknown'
-            if model.get('enabled') is None:
-                model['enabled'] = True
-            if model.get('tradeable') is None:
-                model['tradeable'] = True
+                        seen_ids.add(model_id)
+                    
+                        # CRITICAL: Set defaults for required fields if they're None or missing
+                        for field_name, default in ROW_DEFAULTS.items():
+                            if model.get(field_name) is None:
+                                model[field_name] = default
             
-            # Validate Discord ID fields (must be 17-19 chars long)  
-            emoji_id = model.get('emoji_id')
-            if emoji_id is not None:
-                try:
-                    emoji_id_int = int(emoji_id)
-                    emoji_id_str = str(emoji_id_int)
-                    if len(emoji_id_str) < 17 or len(emoji_id_str) > 19:
                         # FIX invalid emoji_id with a valid placeholder (don't skip!)
-                        model['emoji_id'] = 1234567890123456789  # Valid 19-digit placeholder
-                        placeholder_log.write(f"{item.__name__} ID {model.get('id')}: Fixed invalid emoji_id (was {emoji_id}, len={len(emoji_id_str)})\n")
-                        defaults_set.append(f"emoji_id=placeholder")
-                except (ValueError, TypeError):
-                    # FIX non-numeric emoji_id
-                    model['emoji_id'] = 1234567890123456789  # Valid 19-digit placeholder
-                    placeholder_log.write(f"{item.__name__} ID {model.get('id')}: Fixed non-numeric emoji_id (was {emoji_id})\n")
-                    defaults_set.append(f"emoji_id=placeholder")
+                        if index in bad_emojis:
+                            placeholder_log.record("changed", item, model_id, "invalid_emoji_id", value=model['emoji_id'])
+                            model['emoji_id'] = EMOJI_PLACEHOLDER
+                            emoji_fixed_count += 1
             
-            try:
-                instance = item(**model)
+                        try:
+                            instance = item(**model)
                 
-                # CRITICAL: Check FK fields directly on the instance after creation
-                # Tortoise may not propagate model dict changes correctly for FK fields
-                for fk_field_name in list(fk_fields.keys()):
-                    if not fk_field_name.endswith('_id'):
-                        continue
-                    inst_val = getattr(instance, fk_field_name, None)
-                    if inst_val == 0:
-                        # Zero is never valid - fix it directly on the instance
-                        related_model = fk_fields[fk_field_name]
-                        base_name = fk_field_name[:-3]
-                        field_obj = fields_map.get(base_name)
-                        is_nullable = field_obj is not None and getattr(field_obj, 'null', False)
-                        if is_nullable:
-                            setattr(instance, fk_field_name, None)
-                        elif related_model == Player:
-                            placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
-                            if Player not in inserted_ids:
-                                inserted_ids[Player] = set()
-                            inserted_ids[Player].add(placeholder_id)
-                            setattr(instance, fk_field_name, placeholder_id)
-                            placeholder_log.write(f"{item.__name__} ID {model.get('id')}: Fixed instance {fk_field_name}=0 → {placeholder_id}\n")
-                # This will catch custom validators like emoji_id length check
-                try:
-                    await instance.full_clean()
-                except AttributeError:
-                    # full_clean might not exist, try manual field validation
-                    pass
-                except ValidationError as ve:
-                    skipped_log.write(f"{item.__name__} - ID: {model.get('id')} - SKIPPED: Instance validation error: {str(ve)[:200]}\n")
-                    skipped_log.write(f"  emoji_id: {model.get('emoji_id')}\n")
-                    skipped_count += 1
-                    validation_fail_count += 1
-                    continue
+                            # CRITICAL: Check FK fields directly on the instance after creation
+                            # Tortoise may not propagate model dict changes correctly for FK fields
+                            for fk_field_name, related_model, fk_nullable in rules.instance_foreign_keys:
+                                if getattr(instance, fk_field_name, None) == 0:
+                                    # Zero is never valid - fix it directly on the instance
+                                    if fk_nullable:
+                                        setattr(instance, fk_field_name, None)
+                                    elif related_model == Player:
+                                        placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
+                                        fk_resolver.ignore(Player, [placeholder_id])
+                                        setattr(instance, fk_field_name, placeholder_id)
+                                        placeholder_log.record(
+                                            "changed", item, model_id, "zero_fk_placeholder", field=fk_field_name, placeholder_id=placeholder_id
+                                        )
+                        except (ValueError, ValidationError) as e:
+                            skipped_log.record(
+                                "skipped", item, model_id, "validation_error", error=str(e)[:200], emoji_id=model.get('emoji_id')
+                            )
+                            skipped_count += 1
+                            validation_fail_count += 1
+                            continue
                 
-                items.append(instance)
-            except (ValueError, ValidationError) as e:
-                skipped_log.write(f"{item.__name__} - ID: {model.get('id')} - SKIPPED: Validation error: {str(e)[:200]}\n")
-                skipped_log.write(f"  emoji_id in model: {model.get('emoji_id')} (type: {type(model.get('emoji_id'))})\n")
-                skipped_count += 1
-                validation_fail_count += 1
-                continue
-        
-        if emoji_validation_count > 0:
-            output.append(f"  Note: Skipped {emoji_validation_count} items due to invalid emoji_id")
-            await message.edit(embed=reload_embed())
-
-        output[-1] = f"- Saving {item.__name__} to database... ({len(items):,} objects)"
-        await message.edit(embed=reload_embed())
-
-        if items:
-            # CRITICAL: Fix ALL instances - loop every required field generically
-            fixed_count = 0
-            STRING_FIELD_TYPES = ('CharField', 'TextField')
-            
-            for instance in items:
-                instance_fields = instance._meta.fields_map
-                for field_name, field_obj in instance_fields.items():
-                    # Skip relation fields
-                    if hasattr(field_obj, 'related_model'):
-                        continue
-                    # Only care about non-nullable fields
-                    if not (hasattr(field_obj, 'null') and not field_obj.null):
-                        continue
-                    
-                    val = getattr(instance, field_name, None)
-                    if val is not None:
-                        # Special case: emoji_id must be 17-19 digits
-                        if field_name == 'emoji_id':
-                            if len(str(val)) < 17 or len(str(val)) > 19:
-                                setattr(instance, field_name, 1234567890123456789)
-                                placeholder_log.write(f"{item.__name__} ID {getattr(instance, 'id', '?')}: Fixed invalid emoji_id={val}\n")
-                                fixed_count += 1
-                        continue
-                    
-                    # Field is None but required - set a sensible default
-                    field_type = type(field_obj).__name__
-                    if field_name == 'emoji_id':
-                        setattr(instance, field_name, 1234567890123456789)
-                    elif field_type in STRING_FIELD_TYPES:
-                        setattr(instance, field_name, 'Unknown')
-                    elif field_type == 'IntField':
-                        setattr(instance, field_name, 0)
-                    elif field_type == 'FloatField':
-                        setattr(instance, field_name, 0.0)
-                    elif field_type == 'BooleanField':
-                        setattr(instance, field_name, False)
-                    elif field_type in ('DatetimeField', 'DateField'):
-                        setattr(instance, field_name, datetime.now())
-                    else:
-                        setattr(instance, field_name, 'Unknown')
+                        # CRITICAL: Fix required fields the instance still lacks
+                        for field_name, field_type, default in rules.required_fields:
+                            val = getattr(instance, field_name, None)
+                            if val is not None:
+                                # Special case: emoji_id must be 17-19 digits
+                                if field_name == 'emoji_id' and (len(str(val)) < 17 or len(str(val)) > 19):
+                                    setattr(instance, field_name, EMOJI_PLACEHOLDER)
+                                    placeholder_log.record("changed", item, instance.pk, "invalid_emoji_id", value=val)
+                                    fixed_count += 1
+                                continue
                     
-                    placeholder_log.write(f"{item.__name__} ID {getattr(instance, 'id', '?')}: Fixed None required field '{field_name}' (type={field_type})\n")
-                    fixed_count += 1
-            
-            if fixed_count > 0:
-                output.append(f"  Fixed {fixed_count} None required fields before save")
-                await message.edit(embed=reload_embed())
+                            # Field is None but required - set a sensible default
+                            setattr(instance, field_name, default())
+                            placeholder_log.record("changed", item, instance.pk, "required_default", field=field_name, type=field_type)
+                            fixed_count += 1
             
-            # FINAL PASS: scan every instance for any _id field that is 0 (never valid)
-            zero_fk_fixed = 0
-            for instance in items:
-                for attr in list(vars(instance).keys()):
-                    if attr.endswith('_id') and not attr.startswith('_'):
-                        val = getattr(instance, attr, None)
-                        if val == 0:
-                            # Determine if nullable by checking fields_map
-                            base = attr[:-3]
-                            field_obj = instance._meta.fields_map.get(base) or instance._meta.fields_map.get(attr)
-                            is_nullable = field_obj is not None and getattr(field_obj, 'null', False)
-                            if is_nullable:
+                        # FINAL PASS: any _id field that is 0 (never valid)
+                        for attr, id_nullable, is_player in rules.id_fields:
+                            if getattr(instance, attr, None) != 0:
+                                continue
+                            if id_nullable:
                                 setattr(instance, attr, None)
-                            else:
+                            elif is_player:
                                 # Non-nullable FK = 0, create placeholder if it's player_id
-                                if 'player' in attr:
-                                    placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
-                                    if Player not in inserted_ids:
-                                        inserted_ids[Player] = set()
-                                    inserted_ids[Player].add(placeholder_id)
-                                    setattr(instance, attr, placeholder_id)
-                                else:
-                                    setattr(instance, attr, None)
-                            placeholder_log.write(f"{item.__name__} ID {getattr(instance, 'id', '?')}: FINAL PASS fixed {attr}=0\n")
+                                placeholder_id = await get_or_create_placeholder_player(0, placeholder_log, created_placeholders)
+                                fk_resolver.ignore(Player, [placeholder_id])
+                                setattr(instance, attr, placeholder_id)
+                            else:
+                                setattr(instance, attr, None)
+                            placeholder_log.record("changed", item, instance.pk, "zero_fk_final", field=attr, new_value=getattr(instance, attr))
                             zero_fk_fixed += 1
-            
-            if zero_fk_fixed > 0:
-                output.append(f"  Fixed {zero_fk_fixed} zero FK values in final pass")
-                await message.edit(embed=reload_embed())
-            
-            try:
-                await item.bulk_create(items)
-                inserted_ids[item] = seen_ids
                 
-                # Reset sequence immediately after insert so any subsequent .create() calls get correct IDs
-                await sequence_model(item)
+                        items.append(instance)
                 
-            except Exception as e:
-                error_msg = f"ERROR: {type(e).__name__}: {str(e)[:500]}"
-                skipped_log.write(f"\n{item.__name__} BULK CREATE FAILED: {error_msg}\n")
-                skipped_log.write(f"First 3 items:\n")
-                for i, failed_item in enumerate(items[:3]):
-                    skipped_log.write(f"  Item {i}: {failed_item.__dict__}\n")
+                # Validators are checked a column at a time, only valid rows are inserted.
+                with metrics.measure("validate", item, len(items)):
+                    invalid = validate_columns(rules, items)
                 
-                output.append(f"- CRITICAL ERROR: Bulk create failed for {item.__name__}: {error_msg}")
-                output.append(f"- Check skipped_records.log for details.")
-                await message.edit(embed=reload_embed())
+                if invalid:
+                    for index, error in invalid.items():
+                        skipped_log.record("skipped", item, items[index].pk, "validator", error=error[:200])
+                        invalid_ids.add(items[index].pk)
+                    
+                    skipped_count += len(invalid)
+                    validation_fail_count += len(invalid)
+                    items = [instance for index, instance in enumerate(items) if index not in invalid]
                 
-                skipped_log.close()
-                placeholder_log.close()
-                raise
+                inserter.progress.done += len(chunk)
+                inserter.report()
+                
+                if not items:
+                    continue
+                
+                built_count += len(items)
+                await inserter.put(items)
+        
+        # Rows that failed validation or insertion don't exist for later models.
+        seen_ids -= invalid_ids
+        
+        if inserter.failed:
+            seen_ids -= inserter.failed
+            insert_fail_count = len(inserter.failed)
+            skipped_count += insert_fail_count
+        
+        inserted_ids[item] = seen_ids
 
+        # Later models don't read these rows again.
+        del data[item], value
+        
+        if built_count > 0:
+            # Reset sequence immediately after insert so any subsequent .create() calls get correct IDs
+            await sequence_model(item)
+        
         # Build detailed skip message
-        msg = f"- Added **{len(items):,}** {item.__name__} objects."
+        msg = f"- Added **{built_count - insert_fail_count:,}** {item.__name__} objects."
         skip_details = []
         if fk_violation_count > 0:
             skip_details.append(f"{fk_violation_count} FK violations")
@@ -633,53 +2591,84 @@ async def load(message):
             skip_details.append(f"{duplicate_count} duplicates")
         if validation_fail_count > 0:
             skip_details.append(f"{validation_fail_count} validation errors")
+        if insert_fail_count > 0:
+            skip_details.append(f"{insert_fail_count} insert errors")
         
         if skip_details:
             msg += f" (skipped: {', '.join(skip_details)})"
         
-        output[-1] = msg
-        skipped_log.write(f"\n{item.__name__} SUMMARY: Added {len(items):,}, Skipped {skipped_count}\n\n")
-        await message.edit(embed=reload_embed())
+        reporter.finish(inserter.progress, msg)
+        skipped_log.write({"event": "summary", "model": item.__name__, "added": built_count - insert_fail_count, "skipped": skipped_count})
+        
+        if fixed_count > 0:
+            output.append(f"  Fixed {fixed_count} None required fields before save")
+        if zero_fk_fixed > 0:
+            output.append(f"  Fixed {zero_fk_fixed} zero FK values in final pass")
+        if emoji_fixed_count > 0:
+            output.append(f"  Note: Replaced {emoji_fixed_count} invalid emoji_id values with a placeholder")
+
+    if created_placeholders:
+        with metrics.measure("placeholders", Player):
+            removed = await remove_unused_placeholders(created_placeholders, placeholder_log)
+        if removed:
+            checkpoint.save()
+            output.append(f"- Removed {removed:,} unused placeholder Players.")
+
+
+async def load(reporter: ProgressReporter, reader: MigrationReader, checkpoint: Checkpoint):
+    skipped_log = EventLog(SKIPPED_LOG_FILE)
+    placeholder_log = EventLog(PLACEHOLDER_LOG_FILE)
+
+    # Models are validated and inserted while later sections are still being decoded.
+    sections = SectionReader(reporter, reader, skipped_log)
+    start_time = time.time()
+
+    try:
+        await insert_models(reporter, sections, skipped_log, placeholder_log, checkpoint)
+    except Exception:
+        skipped_log.close()
+        placeholder_log.close()
+        metrics.write()
+        raise
+    finally:
+        await sections.close()
 
     output.append("- Updating database sequences...")
-    await message.edit(embed=reload_embed())
+    reporter.refresh()
     
     await sequence_all_models()
+    checkpoint.remove()
 
-    skipped_log.write("\n=== END OF LOG ===\n")
     skipped_log.close()
-    
-    placeholder_log.write("\n=== END OF LOG ===\n")
-    placeholder_log.write(f"\nTo find all placeholder players: SELECT * FROM player WHERE discord_id >= 900000000000000000;\n")
-    placeholder_log.write(f"To recover original player ID: original_id = discord_id - 900000000000000000\n")
     placeholder_log.close()
+    metrics.write()
     
     # Try to copy log files but don't fail migration if this doesn't work
     try:
-        if os.path.exists("skipped_records.log"):
-            shutil.copy("skipped_records.log", "/mnt/user-data/outputs/skipped_records.log")
-        if os.path.exists("placeholder_assignments.log"):
-            shutil.copy("placeholder_assignments.log", "/mnt/user-data/outputs/placeholder_assignments.log")
+        for log_file in (SKIPPED_LOG_FILE, PLACEHOLDER_LOG_FILE, METRICS_FILE):
+            if os.path.exists(log_file):
+                shutil.copy(log_file, f"/mnt/user-data/outputs/{log_file}")
         output.append("- Migration complete! Logs saved to outputs directory.")
     except Exception:
-        output.append("- Migration complete! Logs saved to working directory (skipped_records.log, placeholder_assignments.log)")
+        output.append(f"- Migration complete! Logs saved to working directory ({SKIPPED_LOG_FILE}, {PLACEHOLDER_LOG_FILE})")
     
-    await message.edit(embed=reload_embed(start_time, "FINISHED"))
+    await reporter.close(start_time, "FINISHED")
 
 
 async def sequence_model(model):
     """Reset PostgreSQL sequence for a model after bulk insert. Non-critical - data is already saved."""
-    if await model.all().count() == 0:
-        return
-    
-    try:
-        client = Tortoise.get_connection("default")
-        last_id = await model.all().order_by("-id").first().values_list("id", flat=True)
-        await client.execute_query(f"SELECT setval('{model._meta.db_table}_id_seq', {last_id});")
-    except Exception:
-        # Sequence might not exist or be named differently - this is OK, data is already saved
-        # Future .create() calls will just use the default sequence value
-        pass
+    with metrics.measure("sequence", model):
+        if await model.all().count() == 0:
+            return
+        
+        try:
+            client = Tortoise.get_connection("default")
+            last_id = await model.all().order_by("-id").first().values_list("id", flat=True)
+            await client.execute_query(f"SELECT setval('{model._meta.db_table}_id_seq', {last_id});")
+        except Exception:
+            # Sequence might not exist or be named differently - this is OK, data is already saved
+            # Future .create() calls will just use the default sequence value
+            pass
 
 
 async def sequence_all_models():
@@ -718,63 +2707,113 @@ async def main():
         print("You cannot run this command from CarFigures.")
         return
 
-    if not os.path.isfile("migration.txt.bz2"):
-        print("Could not find `migration.txt.bz2` migration file.")
+    path = find_migration_file()
+
+    if path is None:
+        print(f"Could not find `{MIGRATION_FILE}` migration file.")
         return
 
+    reader = MigrationReader(path)
+    reader.inspect()
+
+    file_hash = await asyncio.to_thread(hash_file, path)
+    checkpoint = Checkpoint.load(file_hash)
+    choices = ["proceed", "cancel"] + (["resume"] if checkpoint is not None else [])
+
+    if reader.delta is None:
+        warning = "**WARNING**: All existing data on this bot will be **CLEARED**.\n"
+    else:
+        warning = (
+            f"**WARNING**: This file holds the changes since the export of {reader.delta}. "
+            "They will be applied on top of the existing data, which must come from that export.\n"
+        )
+
     try:
         await ctx.send(  # type: ignore # noqa: F821
-            "**WARNING**: All existing data on this bot will be **CLEARED**.\n"
-            "Type `proceed` if you wish to proceed.\n"
-            "Type `cancel` if you wish to cancel."
+            warning
+            + "Type `proceed` if you wish to proceed.\n"
+            + (
+                "Type `resume` to continue the interrupted import of this file instead.\n"
+                if checkpoint is not None
+                else ""
+            )
+            + "Type `cancel` if you wish to cancel."
         )
 
         confirm_message = await bot.wait_for(  # type: ignore # noqa: F821
             "message",
             check=lambda m: m.author == ctx.author  # type: ignore # noqa: F821
             and m.channel == ctx.channel  # type: ignore # noqa: F821
-            and m.content.lower() in ["proceed", "cancel"],
+            and m.content.lower() in choices,
             timeout=20,
         )
     except asyncio.TimeoutError:
         await ctx.send("Canceled due to response timeout.")  # type: ignore # noqa: F821
         return
 
-    if confirm_message.content.lower() != "proceed":
+    if confirm_message.content.lower() == "cancel":
         await ctx.send("Canceled due to message response.")  # type: ignore # noqa: F821
         return
 
     message = await ctx.send(embed=reload_embed())  # type: ignore # noqa: F821
+    reporter = ProgressReporter(message)
+    metrics.begin()
+    start_time = time.time()
+
+    try:
+        if confirm_message.content.lower() == "resume":
+            # The data imported so far is kept, committed rows are skipped.
+            output.append("- Resuming the interrupted import...")
+            reporter.refresh()
+
+            await load(reporter, reader, checkpoint)
+            return
 
-    output.append("- Clearing existing data...")
-    await message.edit(embed=reload_embed())
+        checkpoint = Checkpoint(file_hash)
+        checkpoint.remove()
+
+        if reader.delta is not None:
+            # Rows of a delta are upserted, the data already imported stays.
+            output.append(f"- Applying the changes since the export of {reader.delta}...")
+            reporter.refresh()
+
+            await load(reporter, reader, checkpoint)
+            return
+
+        output.append("- Clearing existing data...")
+        reporter.refresh()
     
-    await clear_all_data()
+        with metrics.measure("clear"):
+            await clear_all_data()
     
-    output.append("- Data cleared successfully. Starting migration...")
-    await message.edit(embed=reload_embed())
+        output.append("- Data cleared successfully. Starting migration...")
+        reporter.refresh()
     
-    # Create a special Player with id=0 for invalid FK references
-    try:
-        donation = list(DonationPolicy)[0]
-        privacy = list(PrivacyPolicy)[0]
+        # Create a special Player with id=0 for invalid FK references
+        try:
+            donation = list(DonationPolicy)[0]
+            privacy = list(PrivacyPolicy)[0]
         
-        await Player.create(
-            id=0,
-            discord_id=100000000000000000,  # Valid 18-digit ID
-            donation_policy=donation,
-            privacy_policy=privacy
-        )
-        # Reset sequence to 1 so real player IDs start at 1
-        client = Tortoise.get_connection("default")
-        await client.execute_query("SELECT setval('player_id_seq', 1, false);")
-        output.append("- Created Player id=0 for invalid FK references")
-        await message.edit(embed=reload_embed())
-    except Exception as e:
-        output.append(f"- Note: Could not create Player id=0: {str(e)[:100]}")
-        await message.edit(embed=reload_embed())
+            await Player.create(
+                id=0,
+                discord_id=100000000000000000,  # Valid 18-digit ID
+                donation_policy=donation,
+                privacy_policy=privacy
+            )
+            # Reset sequence to 1 so real player IDs start at 1
+            client = Tortoise.get_connection("default")
+            await client.execute_query("SELECT setval('player_id_seq', 1, false);")
+            output.append("- Created Player id=0 for invalid FK references")
+            reporter.refresh()
+        except Exception as e:
+            output.append(f"- Note: Could not create Player id=0: {str(e)[:100]}")
+            reporter.refresh()
     
-    await load(message)
+        await load(reporter, reader, checkpoint)
+    except BaseException:
+        # `load()` shows the finished state, a failed or cancelled import is shown here.
+        await reporter.close(start_time, "CANCELED")
+        raise
 
 
 await main()  # type: ignore  # noqa: F704
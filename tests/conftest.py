@@ -0,0 +1,220 @@
+"""
+Fixtures running the migration scripts on the in-memory models of `fakes.py`.
+
+The scripts run as they do in an eval command, like in `benchmarks/run.py`: up to their `main()`
+call, with stand-ins for `ctx`, `bot` and the status message. Every test starts with empty tables
+in its own working directory, where the scripts write the migration file and their logs.
+"""
+
+import asyncio
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fakes  # noqa: E402
+
+fakes.install()
+
+SOURCE = Path(__file__).resolve().parent.parent / "src"
+
+# Blocks are compressed and decompressed in the test process, unless a test asks for workers.
+OVERRIDES = {"export": {"COMPRESSION_WORKERS": 0}, "import": {"DECOMPRESSION_WORKERS": 0}}
+
+# 2024-03-05 12:30:45.123456 UTC.
+DATE = datetime(2024, 3, 5, 12, 30, 45, 123456, tzinfo=timezone.utc)
+
+
+class Message:
+    def __init__(self):
+        self.edits = 0
+        self.embed = None
+
+    async def edit(self, embed=None):
+        self.edits += 1
+        self.embed = embed
+
+
+class Context:
+    """Stands in for the eval command's `ctx`, the status message is kept in `message`."""
+
+    author = "test"
+    channel = "test"
+
+    def __init__(self):
+        self.message: Message | None = None
+        self.sent: list[str] = []
+
+    async def send(self, content=None, embed=None):
+        if embed is None:
+            self.sent.append(content)
+            return None
+
+        self.message = Message()
+        return self.message
+
+    @property
+    def status(self) -> str | None:
+        """The status shown by the embed, such as "FINISHED"."""
+        if self.message is None or self.message.embed is None:
+            return None
+        return self.message.embed.description.removeprefix("Status: **").removesuffix("**")
+
+
+class Bot:
+    """Answers the import's confirmation with `answer`."""
+
+    def __init__(self, answer: str = "proceed"):
+        self.answer = answer
+
+    async def wait_for(self, event, check=None, timeout=None):
+        reply = type("Reply", (), {"content": self.answer, "author": Context.author, "channel": Context.channel})
+        assert check(reply)
+        return reply
+
+
+def load_script(name: str, ctx: Context | None = None, bot: Bot | None = None, **overrides) -> dict[str, Any]:
+    """Run a script up to its `main()` call and override its settings, returning its globals."""
+    path = SOURCE / f"{name}.py"
+    source = re.sub(r"^await main\(\).*$", "", path.read_text(encoding="utf-8"), flags=re.M)
+
+    namespace = {"__name__": "__eval__", "ctx": ctx, "bot": bot}
+    exec(compile(source, str(path), "exec"), namespace)
+
+    for key, value in overrides.items():
+        assert key in namespace, f"{name}.py has no {key}"
+        namespace[key] = value
+
+    return namespace
+
+
+def run(name: str, bot: Bot | None, overrides: dict[str, Any]) -> dict[str, Any]:
+    namespace = load_script(name, Context(), bot, **{**OVERRIDES[name], **overrides})
+    asyncio.run(namespace["main"]())
+    return namespace
+
+
+class SkippedLog:
+    """Fails the test on any skipped row."""
+
+    def record(self, *args, **details):
+        raise AssertionError(f"unexpected skipped row: {args} {details}")
+
+
+def decode(importer: dict[str, Any], path: str) -> dict[str, list]:
+    """Every decoded block of a migration file, by section."""
+    reader = importer["MigrationReader"](path)
+    sections = {}
+
+    for block in importer["decode_batches"](reader, SkippedLog()):
+        sections.setdefault(block.section, []).append(block)
+
+    return sections
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    fakes.reset()
+    monkeypatch.chdir(tmp_path)
+    yield
+    fakes.reset()
+
+
+@pytest.fixture
+def exporter() -> dict[str, Any]:
+    return load_script("export", **OVERRIDES["export"])
+
+
+@pytest.fixture
+def importer() -> dict[str, Any]:
+    return load_script("import", **OVERRIDES["import"])
+
+
+@pytest.fixture
+def run_export() -> Callable[..., dict[str, Any]]:
+    """Export the CarFigures tables, the script's globals are returned."""
+
+    def export(**overrides) -> dict[str, Any]:
+        return run("export", None, overrides)
+
+    return export
+
+
+@pytest.fixture
+def run_import() -> Callable[..., dict[str, Any]]:
+    """Import the migration file into the Ballsdex tables, confirming with `answer`."""
+
+    def load(answer: str = "proceed", **overrides) -> dict[str, Any]:
+        return run("import", Bot(answer), overrides)
+
+    return load
+
+
+def fill(model, *rows: dict):
+    asyncio.run(model.bulk_create([model(**row) for row in rows]))
+
+
+def rows(model) -> dict[int, dict]:
+    """The rows of `model`, by id."""
+    return {pk: dict(row) for pk, row in sorted(model._rows.items())}
+
+
+@pytest.fixture
+def carfigures() -> dict[str, Any]:
+    """
+    Fill the CarFigures tables with a bit of everything: non-ASCII text, line breaks, NULLs, values
+    left to their defaults, an invalid emoji and a trade with a Player that doesn't exist.
+    """
+    models = fakes.models("carfigures")
+
+    fill(
+        models["CarType"],
+        {"id": 1, "name": "Sports", "image": "/static/uploads/sports.png"},
+        {"id": 2, "name": "Électrique", "image": "electric.png"},
+    )
+    fill(models["Country"], {"id": 1, "name": "Česko", "image": "/carfigures/core/image_generator/src/cz.png"})
+    fill(
+        models["Event"],
+        {"id": 1, "name": "Winter", "rarity": 0.5, "card": "winter.png", "catchPhrase": "Brr\nit's ❄️", "startDate": DATE},
+        {"id": 2, "name": "Hidden", "rarity": 1.0, "card": "hidden.png", "hidden": True, "tradeable": False},
+    )
+    fill(models["Exclusive"], {"id": 1, "name": "Founder", "image": "founder.png", "rarity": 0.1})
+    fill(
+        models["Car"],
+        {
+            "id": 1, "cartype_id": 1, "fullName": "Škoda Octavia", "weight": 1300, "horsepower": 150, "rarity": 0.25,
+            "emoji": 1180000000000000001, "collectionPicture": "/static/uploads/octavia.png", "carCredits": "Ondřej",
+            "capacityName": "Kombi", "capacityDescription": "Fits a whole 🏠\nand more", "createdAt": DATE,
+            "country_id": 1, "shortName": "Octavia",
+        },
+        {
+            "id": 2, "cartype_id": 2, "fullName": "Citroën 2CV", "weight": 600, "horsepower": 29, "rarity": 0.5,
+            "emoji": 123, "collectionPicture": "2cv.png", "carCredits": "Zoë", "capacityName": "Deux chevaux",
+            "capacityDescription": "Très lente", "createdAt": None, "enabled": False,
+        },
+        {
+            "id": 3, "cartype_id": 1, "fullName": "Ferrari F40", "weight": 1100, "horsepower": 478, "rarity": 0.01,
+            "emoji": 118000000000000003, "collectionPicture": "f40.png", "carCredits": "Enzo", "capacityName": "Turbo",
+            "capacityDescription": "Vroom", "createdAt": DATE + timedelta(days=1), "tradeable": False,
+        },
+    )
+    fill(
+        models["Player"],
+        *(
+            {"id": pk, "discord_id": 200000000000000000 + pk, "donationPolicy": 2 if pk == 3 else 1}
+            for pk in range(1, 6)
+        ),
+    )
+    fill(models["GuildConfig"], {"id": 1, "guild_id": 300000000000000001, "spawnChannel": 300000000000000002})
+    fill(models["Friendship"], {"id": 1, "friender_id": 1, "friended_id": 2, "since": DATE})
+    fill(models["BlacklistedUser"], {"id": 1, "discord_id": 400000000000000001, "reason": "Spam ✉", "date": DATE})
+    # Written to the table as is, like a trade left behind by a deleted Player 9. The import gives
+    # it a placeholder Player instead.
+    models["Trade"]._rows[1] = {"id": 1, "player1_id": 1, "player2_id": 9, "date": DATE}
+
+    return models
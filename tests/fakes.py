@@ -0,0 +1,932 @@
+"""
+In-memory stand-ins for `discord`, Tortoise and the models of CarFigures and Ballsdex.
+
+The migration scripts only run inside a bot, so the tests install these modules in their place.
+Only what the scripts use is implemented, but the way Tortoise validates is kept: values are
+converted and validated when an instance is built, when it's inserted and when it's updated.
+Rows are kept per model as dicts of columns, and relations are checked on insert and delete.
+"""
+
+import copy
+import sys
+import types
+from datetime import date, datetime, timezone
+from enum import Enum, IntEnum
+from typing import Any
+
+
+# discord
+
+
+class Color:
+    @staticmethod
+    def yellow():
+        return 0xFEE75C
+
+    @staticmethod
+    def green():
+        return 0x57F287
+
+    @staticmethod
+    def red():
+        return 0xED4245
+
+
+class Embed:
+    def __init__(self, title=None, description=None, color=None):
+        self.title = title
+        self.description = description
+        self.color = color
+        self.fields: list[tuple[str, str]] = []
+        self.footer = None
+
+    def add_field(self, name, value, inline=True):
+        self.fields.append((name, value))
+
+    def set_footer(self, text=None):
+        self.footer = text
+
+
+class HTTPException(Exception):
+    pass
+
+
+# tortoise.exceptions
+
+
+class BaseORMException(Exception):
+    pass
+
+
+class IntegrityError(BaseORMException):
+    pass
+
+
+class ValidationError(BaseORMException):
+    pass
+
+
+class OperationalError(BaseORMException):
+    pass
+
+
+# tortoise.validators
+
+
+class Validator:
+    def __call__(self, value):
+        raise NotImplementedError
+
+
+class MaxLengthValidator(Validator):
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+
+    def __call__(self, value):
+        if value is None:
+            raise ValidationError("Value must not be None")
+        if len(value) > self.max_length:
+            raise ValidationError(f"Length of '{value}' {len(value)} > {self.max_length}")
+
+
+class MinLengthValidator(Validator):
+    def __init__(self, min_length: int):
+        self.min_length = min_length
+
+    def __call__(self, value):
+        if value is None:
+            raise ValidationError("Value must not be None")
+        if len(value) < self.min_length:
+            raise ValidationError(f"Length of '{value}' {len(value)} < {self.min_length}")
+
+
+class MinValueValidator(Validator):
+    def __init__(self, min_value):
+        self.min_value = min_value
+
+    def __call__(self, value):
+        if not isinstance(value, (int, float)):
+            raise ValidationError("Value must be a numeric value and is required")
+        if value < self.min_value:
+            raise ValidationError(f"Value should be greater or equal to {self.min_value}")
+
+
+class MaxValueValidator(Validator):
+    def __init__(self, max_value):
+        self.max_value = max_value
+
+    def __call__(self, value):
+        if not isinstance(value, (int, float)):
+            raise ValidationError("Value must be a numeric value and is required")
+        if value > self.max_value:
+            raise ValidationError(f"Value should be less or equal to {self.max_value}")
+
+
+class DiscordSnowflakeValidator(Validator):
+    """The validator Ballsdex puts on its Discord ID fields."""
+
+    def __call__(self, value: int):
+        if not 17 <= len(str(value)) <= 19:
+            raise ValidationError("Discord IDs are between 17 and 19 characters long")
+
+
+# tortoise.fields
+
+
+class Field:
+    field_type: Any = None
+
+    def __init__(self, null=False, default=None, unique=False, validators=None, pk=False, **kwargs):
+        self.null = null
+        self.default = default
+        self.unique = unique
+        self.pk = pk
+        self.validators = list(validators or [])
+        self.model_field_name = ""
+
+    def convert(self, value):
+        if value is not None and not isinstance(value, self.field_type):
+            value = self.field_type(value)
+        return value
+
+    def validate(self, value):
+        for validator in self.validators:
+            if self.null and value is None:
+                continue
+            try:
+                validator(value.value if isinstance(value, Enum) else value)
+            except ValidationError as exc:
+                raise ValidationError(f"{self.model_field_name}: {exc}")
+
+    def to_python_value(self, value):
+        value = self.convert(value)
+        self.validate(value)
+        return value
+
+    def to_db_value(self, value, instance):
+        value = self.convert(value)
+        self.validate(value)
+        return value
+
+
+class IntField(Field):
+    field_type = int
+
+
+class BigIntField(IntField):
+    pass
+
+
+class SmallIntField(IntField):
+    pass
+
+
+class IntEnumFieldInstance(SmallIntField):
+    def __init__(self, enum_type: type[IntEnum], **kwargs):
+        super().__init__(**kwargs)
+        self.enum_type = enum_type
+
+    def to_python_value(self, value):
+        value = self.enum_type(value) if value is not None else None
+        self.validate(value)
+        return value
+
+    def to_db_value(self, value, instance):
+        if value is not None:
+            value = int(self.enum_type(int(value)))
+        self.validate(value)
+        return value
+
+
+def IntEnumField(enum_type, **kwargs):
+    return IntEnumFieldInstance(enum_type, **kwargs)
+
+
+class FloatField(Field):
+    field_type = float
+
+
+class BooleanField(Field):
+    field_type = bool
+
+
+class CharField(Field):
+    field_type = str
+
+    def __init__(self, max_length: int, **kwargs):
+        super().__init__(**kwargs)
+        self.max_length = max_length
+        self.validators.append(MaxLengthValidator(max_length))
+
+
+class TextField(Field):
+    field_type = str
+
+
+class DatetimeField(Field):
+    field_type = datetime
+
+    def __init__(self, auto_now_add=False, **kwargs):
+        super().__init__(**kwargs)
+
+    def convert(self, value):
+        if value is None:
+            return None
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        # Values are returned in UTC, as with `use_tz` enabled.
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+
+class DateField(Field):
+    field_type = date
+
+    def convert(self, value):
+        if value is not None and not isinstance(value, date):
+            value = date.fromisoformat(str(value))
+        return value
+
+
+class ForeignKeyFieldInstance(Field):
+    def __init__(self, model_name: str, related_name=None, on_delete=None, **kwargs):
+        super().__init__(**kwargs)
+        self.model_name = model_name
+        self.source_field = ""
+
+    @property
+    def related_model(self):
+        return MODELS[self.model_name]
+
+
+def ForeignKeyField(model_name: str, **kwargs):
+    return ForeignKeyFieldInstance(model_name, **kwargs)
+
+
+# tortoise.models
+
+
+MODELS: dict[str, Any] = {}  # "app.Model": model class, as relations name them.
+
+
+class Meta:
+    def __init__(self, model, app: str):
+        self.app = app
+        self.db_table = model.__name__.lower()
+        self.db_pk_column = "id"
+        self.pk_attr = "id"
+        self.fields_map: dict[str, Field] = {}
+        self.fk_fields: set[str] = set()
+        self.o2o_fields: set[str] = set()
+        self.fields_db_projection: dict[str, str] = {}
+
+        for klass in reversed(model.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Field):
+                    self.fields_map[name] = value
+
+        # The primary key first, then every relation followed by its `_id` column.
+        fields = {"id": self.fields_map.pop("id", IntField(pk=True))}
+        for name, field in self.fields_map.items():
+            fields[name] = field
+            if isinstance(field, ForeignKeyFieldInstance):
+                field.source_field = f"{name}_id"
+                fields[field.source_field] = IntField(null=field.null)
+                self.fk_fields.add(name)
+        self.fields_map = fields
+
+        for name, field in fields.items():
+            field.model_field_name = name
+            if name not in self.fk_fields:
+                self.fields_db_projection[name] = name
+
+
+class Model:
+    _meta: Meta
+    _rows: dict[Any, dict]
+
+    def __init_subclass__(cls, app: str = "", **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._meta = Meta(cls, app)
+        cls._rows = {}
+        MODELS[f"{app}.{cls.__name__}"] = cls
+
+        # Fields are class attributes until here, instances hold the values.
+        for name in cls._meta.fields_map:
+            if name in vars(cls):
+                delattr(cls, name)
+
+    def __init__(self, **kwargs):
+        meta = self._meta
+
+        for key, value in kwargs.items():
+            if key in meta.fk_fields:
+                setattr(self, meta.fields_map[key].source_field, value.pk if value is not None else None)
+            elif key in meta.fields_db_projection:
+                field = meta.fields_map[key]
+                if value is None and not field.null and not field.pk:
+                    raise ValueError(f"{key} is non nullable field, but null was passed")
+                setattr(self, key, field.to_python_value(value))
+
+        for name, field in meta.fields_map.items():
+            if name in meta.fk_fields or name in self.__dict__:
+                continue
+            default = field.default
+            setattr(self, name, default() if callable(default) else copy.deepcopy(default))
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f"<{type(self).__name__}: {self.pk}>"
+
+    @classmethod
+    def from_row(cls, row: dict):
+        instance = cls.__new__(cls)
+        instance.__dict__.update(row)
+        return instance
+
+    @classmethod
+    def all(cls) -> "QuerySet":
+        return QuerySet(cls)
+
+    @classmethod
+    def filter(cls, *args, **kwargs) -> "QuerySet":
+        return QuerySet(cls).filter(*args, **kwargs)
+
+    @classmethod
+    async def create(cls, **kwargs):
+        instance = cls(**kwargs)
+        await cls.bulk_create([instance])
+        return instance
+
+    @classmethod
+    async def bulk_create(
+        cls, objects, batch_size=None, ignore_conflicts=False, update_fields=None, on_conflict=None, using_db=None
+    ):
+        """Insert `objects`, or none of them if any fails."""
+        meta = cls._meta
+        table = cls._rows
+        pending: dict[Any, dict] = {}
+
+        for instance in objects:
+            row = {
+                column: meta.fields_map[name].to_db_value(getattr(instance, name, None), instance)
+                for name, column in meta.fields_db_projection.items()
+            }
+
+            if row["id"] is None:
+                row["id"] = max([0, *table, *pending]) + 1
+                instance.id = row["id"]
+
+            if row["id"] in pending or (row["id"] in table and not on_conflict):
+                raise IntegrityError(f'duplicate key value violates unique constraint "{meta.db_table}_pkey"')
+
+            if row["id"] in table:
+                # ON CONFLICT DO UPDATE, only the columns of `update_fields` are overwritten.
+                row = {**table[row["id"]], **{column: row[column] for column in update_fields}}
+
+            pending[row["id"]] = row
+
+        for row in pending.values():
+            check_row(cls, row, pending)
+
+        table.update(copy.deepcopy(pending))
+        return objects
+
+
+def check_row(model, row: dict, pending: dict):
+    """Raise the IntegrityError the database would for `row`, with `pending` being inserted along."""
+    meta = model._meta
+
+    for name, field in meta.fields_map.items():
+        if name in meta.fk_fields:
+            value = row[field.source_field]
+            related = field.related_model
+            if value is not None and value not in related._rows and not (related is model and value in pending):
+                raise IntegrityError(
+                    f'insert or update on table "{meta.db_table}" violates foreign key constraint '
+                    f'"{meta.db_table}_{field.source_field}_fkey"'
+                )
+            continue
+
+        if row[name] is None and not field.null:
+            raise IntegrityError(f'null value in column "{name}" of relation "{meta.db_table}" violates not-null constraint')
+
+        if field.unique and row[name] is not None:
+            for pk, other in {**model._rows, **pending}.items():
+                if pk != row["id"] and other[name] == row[name]:
+                    raise IntegrityError(f'duplicate key value violates unique constraint "{meta.db_table}_{name}_key"')
+
+
+# tortoise.expressions
+
+
+LOOKUPS = {
+    "exact": lambda value, other: value == other,
+    "in": lambda value, other: value in other,
+    "gt": lambda value, other: value is not None and value > other,
+    "gte": lambda value, other: value is not None and value >= other,
+    "lt": lambda value, other: value is not None and value < other,
+    "lte": lambda value, other: value is not None and value <= other,
+}
+
+
+class Q:
+    def __init__(self, *children: "Q", join="AND", **lookups):
+        self.children = list(children)
+        self.join = join
+        self.lookups = []
+
+        for key, value in lookups.items():
+            name, _, lookup = key.partition("__")
+            if lookup == "in":
+                value = set(value)
+            self.lookups.append(("id" if name == "pk" else name, LOOKUPS[lookup or "exact"], value))
+
+    def __or__(self, other: "Q") -> "Q":
+        return Q(self, other, join="OR")
+
+    def __and__(self, other: "Q") -> "Q":
+        return Q(self, other)
+
+    def matches(self, row: dict) -> bool:
+        results = [test(row[name], value) for name, test, value in self.lookups]
+        results += [child.matches(row) for child in self.children]
+        return any(results) if self.join == "OR" else all(results)
+
+
+# tortoise.queryset
+
+
+class ValuesListQuery:
+    """Awaited for a list of the values, or iterated over asynchronously."""
+
+    def __init__(self, queryset: "QuerySet", fields: tuple[str, ...], flat: bool):
+        self.queryset = queryset
+        self.fields = fields
+        self.flat = flat
+
+    def result(self) -> list:
+        rows = self.queryset.rows()
+        if self.flat:
+            return [row[self.fields[0]] for row in rows]
+        return [tuple(row[field] for field in self.fields) for row in rows]
+
+    def __await__(self):
+        async def run():
+            return self.result()
+
+        return run().__await__()
+
+    async def __aiter__(self):
+        for value in self.result():
+            yield value
+
+
+class FirstQuery:
+    def __init__(self, queryset: "QuerySet"):
+        self.queryset = queryset.limit(1)
+
+    def __await__(self):
+        async def run():
+            rows = self.queryset.rows()
+            return self.queryset.model.from_row(rows[0]) if rows else None
+
+        return run().__await__()
+
+    async def values_list(self, *fields, flat=False):
+        rows = await ValuesListQuery(self.queryset, fields, flat)
+        return rows[0] if rows else None
+
+
+class QuerySet:
+    def __init__(self, model, filters=(), order=(), limit=None, offset=0):
+        self.model = model
+        self.filters = list(filters)
+        self.order = order
+        self._limit = limit
+        self._offset = offset
+
+    def clone(self, **changes) -> "QuerySet":
+        state = {"filters": self.filters, "order": self.order, "limit": self._limit, "offset": self._offset}
+        return QuerySet(self.model, **{**state, **changes})
+
+    def filter(self, *args, **kwargs) -> "QuerySet":
+        return self.clone(filters=[*self.filters, *args, Q(**kwargs)])
+
+    def all(self) -> "QuerySet":
+        return self
+
+    def order_by(self, *fields) -> "QuerySet":
+        return self.clone(order=fields)
+
+    def limit(self, count: int) -> "QuerySet":
+        return self.clone(limit=count)
+
+    def offset(self, count: int) -> "QuerySet":
+        return self.clone(offset=count)
+
+    def rows(self) -> list[dict]:
+        rows = [row for row in self.model._rows.values() if all(q.matches(row) for q in self.filters)]
+        for field in reversed(self.order or ("id",)):
+            name = field.lstrip("-")
+            rows.sort(key=lambda row: (row[name] is not None, row[name]), reverse=field.startswith("-"))
+        rows = rows[self._offset :]
+        return rows if self._limit is None else rows[: self._limit]
+
+    def values_list(self, *fields, flat=False) -> ValuesListQuery:
+        return ValuesListQuery(self, fields, flat)
+
+    def first(self) -> FirstQuery:
+        return FirstQuery(self)
+
+    async def count(self) -> int:
+        return len(self.rows())
+
+    async def exists(self) -> bool:
+        return bool(self.rows())
+
+    async def update(self, **kwargs) -> int:
+        meta = self.model._meta
+        values = {name: meta.fields_map[name].to_db_value(value, self.model) for name, value in kwargs.items()}
+        rows = {row["id"]: {**row, **values} for row in self.rows()}
+
+        for row in rows.values():
+            check_row(self.model, row, rows)
+
+        self.model._rows.update(rows)
+        return len(rows)
+
+    async def delete(self) -> int:
+        ids = {row["id"] for row in self.rows()}
+
+        # Every relation is ON DELETE RESTRICT, so a row can't be deleted while it's referenced.
+        for model in list(MODELS.values()):
+            for name in model._meta.fk_fields:
+                field = model._meta.fields_map[name]
+                if field.related_model is self.model and any(
+                    row[field.source_field] in ids and not (model is self.model and row["id"] in ids)
+                    for row in model._rows.values()
+                ):
+                    raise IntegrityError(
+                        f'update or delete on table "{self.model._meta.db_table}" violates foreign key constraint '
+                        f'"{model._meta.db_table}_{field.source_field}_fkey"'
+                    )
+
+        for pk in ids:
+            del self.model._rows[pk]
+        return len(ids)
+
+    def __await__(self):
+        async def run():
+            return [self.model.from_row(row) for row in self.rows()]
+
+        return run().__await__()
+
+
+# tortoise.transactions and the connection
+
+
+class Transaction:
+    """Every table is restored if the block raises."""
+
+    async def __aenter__(self):
+        self.snapshot = {model: copy.deepcopy(model._rows) for model in MODELS.values()}
+        return connection
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for model, rows in self.snapshot.items():
+                model._rows.clear()
+                model._rows.update(rows)
+        return False
+
+
+def in_transaction(connection_name=None) -> Transaction:
+    return Transaction()
+
+
+class Connection:
+    """Accepts the PostgreSQL maintenance queries of the scripts, and TRUNCATE."""
+
+    capabilities = types.SimpleNamespace(dialect="sqlite")
+
+    def __init__(self):
+        self.queries: list[str] = []
+
+    async def execute_query(self, query: str, values=None):
+        self.queries.append(query)
+        if query.startswith("TRUNCATE TABLE"):
+            tables = query.removeprefix("TRUNCATE TABLE").split(" RESTART")[0].split(",")
+            for model in MODELS.values():
+                if model._meta.app == "ballsdex" and model._meta.db_table in {table.strip() for table in tables}:
+                    model._rows.clear()
+        return 0, []
+
+
+connection = Connection()
+
+
+class Tortoise:
+    apps: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def get_connection(connection_name):
+        return connection
+
+
+# carfigures.core.models
+
+
+class CarType(Model, app="carfigures"):
+    name = CharField(max_length=64)
+    image = CharField(max_length=200)
+
+
+class Country(Model, app="carfigures"):
+    name = CharField(max_length=64)
+    image = CharField(max_length=200)
+
+
+class Event(Model, app="carfigures"):
+    name = CharField(max_length=64)
+    catchPhrase = CharField(max_length=128, null=True)
+    startDate = DatetimeField(null=True)
+    endDate = DatetimeField(null=True)
+    rarity = FloatField()
+    card = CharField(max_length=200)
+    emoji = CharField(max_length=20, null=True)
+    tradeable = BooleanField(default=True)
+    hidden = BooleanField(default=False)
+
+
+class Exclusive(Model, app="carfigures"):
+    name = CharField(max_length=64)
+    image = CharField(max_length=200)
+    rarity = FloatField()
+    catchPhrase = CharField(max_length=128, null=True)
+    emoji = CharField(max_length=20, null=True)
+
+
+class Car(Model, app="carfigures"):
+    fullName = CharField(max_length=48)
+    shortName = CharField(max_length=12, null=True)
+    catchNames = TextField(null=True)
+    cartype = ForeignKeyField("carfigures.CarType")
+    country = ForeignKeyField("carfigures.Country", null=True)
+    weight = IntField()
+    horsepower = IntField()
+    rarity = FloatField()
+    enabled = BooleanField(default=True)
+    tradeable = BooleanField(default=True)
+    emoji = BigIntField()
+    spawnPicture = CharField(max_length=200, null=True)
+    collectionPicture = CharField(max_length=200)
+    carCredits = CharField(max_length=64)
+    capacityName = CharField(max_length=64)
+    capacityDescription = CharField(max_length=256)
+    createdAt = DatetimeField(null=True)
+
+
+class CarFiguresPlayer(Model, app="carfigures"):
+    discord_id = BigIntField(unique=True)
+    donationPolicy = SmallIntField(default=1)
+    privacyPolicy = SmallIntField(default=1)
+
+
+class CarInstance(Model, app="carfigures"):
+    car = ForeignKeyField("carfigures.Car")
+    player = ForeignKeyField("carfigures.Player")
+    catchDate = DatetimeField()
+    spawnedTime = DatetimeField(null=True)
+    server = BigIntField(null=True)
+    trade_player = ForeignKeyField("carfigures.Player", null=True)
+    exclusive = ForeignKeyField("carfigures.Exclusive", null=True)
+    event = ForeignKeyField("carfigures.Event", null=True)
+    favorite = BooleanField(default=False)
+    tradeable = BooleanField(default=True)
+    weightBonus = IntField(default=0)
+    horsepowerBonus = IntField(default=0)
+
+
+class CarFiguresGuildConfig(Model, app="carfigures"):
+    guild_id = BigIntField(unique=True)
+    spawnChannel = BigIntField(null=True)
+    enabled = BooleanField(default=True)
+
+
+class CarFiguresFriendship(Model, app="carfigures"):
+    friender = ForeignKeyField("carfigures.Player")
+    friended = ForeignKeyField("carfigures.Player")
+    since = DatetimeField()
+
+
+class BlacklistedUser(Model, app="carfigures"):
+    discord_id = BigIntField(unique=True)
+    reason = TextField(null=True, default=None)
+    date = DatetimeField(null=True)
+
+
+class CarFiguresBlacklistedGuild(Model, app="carfigures"):
+    discord_id = BigIntField(unique=True)
+    reason = TextField(null=True, default=None)
+    date = DatetimeField(null=True)
+
+
+class CarFiguresTrade(Model, app="carfigures"):
+    player1 = ForeignKeyField("carfigures.Player")
+    player2 = ForeignKeyField("carfigures.Player")
+    date = DatetimeField()
+
+
+class CarFiguresTradeObject(Model, app="carfigures"):
+    trade = ForeignKeyField("carfigures.Trade")
+    carinstance = ForeignKeyField("carfigures.CarInstance")
+    player = ForeignKeyField("carfigures.Player")
+
+
+# ballsdex.core.models
+
+
+class DonationPolicy(IntEnum):
+    ALWAYS_ACCEPT = 1
+    REQUEST_APPROVAL = 2
+    ALWAYS_DENY = 3
+
+
+class PrivacyPolicy(IntEnum):
+    ALLOW = 1
+    DENY = 2
+
+
+class Regime(Model, app="ballsdex"):
+    name = CharField(max_length=64)
+    background = CharField(max_length=200)
+
+
+class Economy(Model, app="ballsdex"):
+    name = CharField(max_length=64)
+    icon = CharField(max_length=200)
+
+
+class Special(Model, app="ballsdex"):
+    name = CharField(max_length=64)
+    catch_phrase = CharField(max_length=128, null=True)
+    start_date = DatetimeField(null=True)
+    end_date = DatetimeField(null=True)
+    rarity = FloatField()
+    emoji = CharField(max_length=20, null=True)
+    background = CharField(max_length=200, null=True)
+    tradeable = BooleanField(default=True)
+    hidden = BooleanField(default=False)
+
+
+class Ball(Model, app="ballsdex"):
+    country = CharField(max_length=48, unique=True)
+    short_name = CharField(max_length=12, null=True)
+    catch_names = TextField(null=True)
+    regime = ForeignKeyField("ballsdex.Regime")
+    economy = ForeignKeyField("ballsdex.Economy", null=True)
+    health = IntField()
+    attack = IntField()
+    rarity = FloatField()
+    enabled = BooleanField(default=True)
+    tradeable = BooleanField(default=True)
+    emoji_id = BigIntField(validators=[DiscordSnowflakeValidator()])
+    wild_card = CharField(max_length=200)
+    collection_card = CharField(max_length=200)
+    credits = CharField(max_length=64)
+    capacity_name = CharField(max_length=64)
+    capacity_description = CharField(max_length=256)
+    created_at = DatetimeField(null=True)
+
+
+class Player(Model, app="ballsdex"):
+    discord_id = BigIntField(unique=True, validators=[DiscordSnowflakeValidator()])
+    donation_policy = IntEnumField(DonationPolicy, default=DonationPolicy.ALWAYS_ACCEPT)
+    privacy_policy = IntEnumField(PrivacyPolicy, default=PrivacyPolicy.DENY)
+
+
+class GuildConfig(Model, app="ballsdex"):
+    guild_id = BigIntField(unique=True, validators=[DiscordSnowflakeValidator()])
+    spawn_channel = BigIntField(null=True)
+    enabled = BooleanField(default=True)
+
+
+class BallInstance(Model, app="ballsdex"):
+    ball = ForeignKeyField("ballsdex.Ball")
+    player = ForeignKeyField("ballsdex.Player")
+    catch_date = DatetimeField()
+    spawned_time = DatetimeField(null=True)
+    server_id = BigIntField(null=True)
+    special = ForeignKeyField("ballsdex.Special", null=True)
+    trade_player = ForeignKeyField("ballsdex.Player", null=True)
+    favorite = BooleanField(default=False)
+    tradeable = BooleanField(default=True)
+    health_bonus = IntField(default=0)
+    attack_bonus = IntField(default=0)
+
+
+class Friendship(Model, app="ballsdex"):
+    player1 = ForeignKeyField("ballsdex.Player")
+    player2 = ForeignKeyField("ballsdex.Player")
+    since = DatetimeField()
+
+
+class BlacklistedID(Model, app="ballsdex"):
+    discord_id = BigIntField(unique=True, validators=[DiscordSnowflakeValidator()])
+    reason = TextField(null=True, default=None)
+    date = DatetimeField(null=True)
+
+
+class BlacklistedGuild(Model, app="ballsdex"):
+    discord_id = BigIntField(unique=True, validators=[DiscordSnowflakeValidator()])
+    reason = TextField(null=True, default=None)
+    date = DatetimeField(null=True)
+
+
+class Trade(Model, app="ballsdex"):
+    player1 = ForeignKeyField("ballsdex.Player")
+    player2 = ForeignKeyField("ballsdex.Player")
+    date = DatetimeField()
+
+
+class TradeObject(Model, app="ballsdex"):
+    trade = ForeignKeyField("ballsdex.Trade")
+    ballinstance = ForeignKeyField("ballsdex.BallInstance")
+    player = ForeignKeyField("ballsdex.Player")
+
+
+def models(app: str) -> dict[str, Any]:
+    """The models of `app` by the name the bot gives them."""
+    return {
+        name.removeprefix(f"{app}.").removeprefix("CarFigures"): model
+        for name, model in MODELS.items()
+        if model._meta.app == app
+    }
+
+
+# Both bots have models of these names, CarFigures' are prefixed in this module.
+for name, model in models("carfigures").items():
+    MODELS[f"carfigures.{name}"] = MODELS.pop(f"carfigures.{model.__name__}")
+    model.__name__ = name
+
+Tortoise.apps["models"] = models("ballsdex")
+
+
+def reset():
+    """Empty every table."""
+    for model in MODELS.values():
+        model._rows.clear()
+    connection.queries.clear()
+
+
+def module(name: str, **attributes) -> types.ModuleType:
+    result = types.ModuleType(name)
+    result.__dict__.update(attributes)
+    return result
+
+
+def install():
+    """Register the fake modules, the scripts import them like the real ones."""
+    namespace = globals()
+    fields = {
+        name: namespace[name]
+        for name in (
+            "Field", "IntField", "BigIntField", "SmallIntField", "IntEnumField", "IntEnumFieldInstance", "FloatField",
+            "BooleanField", "CharField", "TextField", "DatetimeField", "DateField", "ForeignKeyField",
+            "ForeignKeyFieldInstance",
+        )
+    }
+    validators = {
+        name: namespace[name]
+        for name in ("Validator", "MaxLengthValidator", "MinLengthValidator", "MinValueValidator", "MaxValueValidator")
+    }
+    exceptions = {
+        name: namespace[name] for name in ("BaseORMException", "IntegrityError", "ValidationError", "OperationalError")
+    }
+    enums = {"DonationPolicy": DonationPolicy, "PrivacyPolicy": PrivacyPolicy}
+
+    sys.modules.update(
+        {
+            "discord": module("discord", Embed=Embed, Color=Color, HTTPException=HTTPException),
+            "tortoise": module("tortoise", Tortoise=Tortoise, Model=Model, fields=module("tortoise.fields", **fields)),
+            "tortoise.fields": module("tortoise.fields", **fields),
+            "tortoise.fields.data": module("tortoise.fields.data", **fields),
+            "tortoise.exceptions": module("tortoise.exceptions", **exceptions),
+            "tortoise.expressions": module("tortoise.expressions", Q=Q),
+            "tortoise.transactions": module("tortoise.transactions", in_transaction=in_transaction),
+            "tortoise.validators": module("tortoise.validators", **validators),
+            "carfigures": module("carfigures"),
+            "carfigures.core": module("carfigures.core"),
+            "carfigures.core.models": module("carfigures.core.models", **models("carfigures")),
+            "ballsdex": module("ballsdex"),
+            "ballsdex.core": module("ballsdex.core"),
+            "ballsdex.core.models": module(
+                "ballsdex.core.models", DiscordSnowflakeValidator=DiscordSnowflakeValidator, **models("ballsdex"), **enums
+            ),
+        }
+    )
@@ -0,0 +1,126 @@
+"""
+Delta exports: the watermarks of the export and the upserts of the import.
+
+Both scripts run on the in-memory models of `fakes.py`, see `conftest.py`.
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+
+import fakes
+
+from conftest import DATE, decode, fill, rows
+
+BALLSDEX = fakes.models("ballsdex")
+
+
+def ids(blocks: list) -> list[int]:
+    return [row["id"] for block in blocks for row in block.dicts()]
+
+
+def test_delta_export(carfigures, run_export, importer):
+    fill(
+        carfigures["CarInstance"],
+        *({"id": pk, "car_id": 1, "player_id": pk, "catchDate": DATE + timedelta(days=pk % 2)} for pk in (1, 2, 3)),
+    )
+    fill(carfigures["TradeObject"], {"id": 1, "trade_id": 1, "carinstance_id": 2, "player_id": 1})
+
+    # A delta export needs the watermarks of a full export.
+    namespace = run_export(DELTA=True)
+    assert namespace["ctx"].status == "CANCELED"
+    assert "- No `migration_watermark.json` found, a full export is needed before a delta export." in namespace["output"]
+
+    assert run_export()["ctx"].status == "FINISHED"
+
+    with open("migration_watermark.json", encoding="utf-8") as f:
+        full = json.load(f)
+
+    sections = full["sections"]
+    assert sections["BI"] == {"id": 3, "timestamp": (DATE + timedelta(days=1)).isoformat()}
+    assert sections["T"] == {"id": 1, "timestamp": DATE.isoformat()}
+    assert (sections["P"], sections["TO"]) == ({"id": 5, "timestamp": None}, {"id": 1, "timestamp": None})
+
+    # A new instance caught before the last one, an older instance traded away and an edited car.
+    later = DATE + timedelta(days=2)
+    fill(carfigures["CarInstance"], {"id": 4, "car_id": 2, "player_id": 4, "catchDate": DATE})
+    fill(carfigures["Trade"], {"id": 2, "player1_id": 1, "player2_id": 2, "date": later})
+    fill(carfigures["TradeObject"], {"id": 2, "trade_id": 2, "carinstance_id": 1, "player_id": 1})
+    asyncio.run(carfigures["CarInstance"].filter(id=1).update(player_id=2))
+    asyncio.run(carfigures["Car"].filter(id=1).update(rarity=0.75))
+
+    assert run_export(DELTA=True)["ctx"].status == "FINISHED"
+
+    reader = importer["MigrationReader"]("migration.txt.bz2")
+    reader.inspect()
+    assert reader.delta == full["exported"]
+
+    delta = decode(importer, "migration.txt.bz2")
+    assert ids(delta["BI"]) == [1, 4]
+    assert ids(delta["T"]) == ids(delta["TO"]) == [2]
+    assert ids(delta.get("P", [])) == [] and ids(delta.get("F", [])) == []
+
+    # Small sections are exported in full.
+    assert ids(delta["B"]) == [1, 2, 3]
+    assert delta["B"][0].column("rarity")[0] == 0.75
+
+    with open("migration_watermark.json", encoding="utf-8") as f:
+        sections = json.load(f)["sections"]
+    assert sections["BI"] == full["sections"]["BI"] | {"id": 4}
+    assert sections["T"] == {"id": 2, "timestamp": later.isoformat()}
+    assert sections["TO"] == {"id": 2, "timestamp": None}
+
+
+def test_delta_import(carfigures, run_export, run_import):
+    assert run_export()["ctx"].status == "FINISHED"
+    assert run_import()["ctx"].status == "FINISHED"
+    imported = {name: rows(table) for name, table in BALLSDEX.items()}
+
+    asyncio.run(carfigures["Car"].filter(id=1).update(rarity=0.75))
+    fill(carfigures["Player"], {"id": 7, "discord_id": 200000000000000007})
+    fill(carfigures["Trade"], {"id": 2, "player1_id": 7, "player2_id": 1, "date": DATE + timedelta(days=1)})
+
+    assert run_export(DELTA=True)["ctx"].status == "FINISHED"
+    namespace = run_import()
+    assert namespace["ctx"].status == "FINISHED"
+    assert any(line.startswith("- Applying the changes since the export of") for line in namespace["output"])
+
+    # Changed rows are updated, new rows added and the rest left as it was.
+    balls = rows(BALLSDEX["Ball"])
+    assert balls[1]["rarity"] == 0.75
+    assert balls[1] | {"rarity": imported["Ball"][1]["rarity"]} == imported["Ball"][1]
+    assert {pk: ball for pk, ball in balls.items() if pk != 1} == {
+        pk: ball for pk, ball in imported["Ball"].items() if pk != 1
+    }
+
+    players = rows(BALLSDEX["Player"])
+    assert sorted(players) == [*imported["Player"], 7]
+    assert players[7]["discord_id"] == 200000000000000007
+
+    trades = rows(BALLSDEX["Trade"])
+    assert trades[1] == imported["Trade"][1]
+    assert (trades[2]["player1_id"], trades[2]["player2_id"]) == (7, 1)
+
+
+def test_delta_moves_placeholders(carfigures, run_export, run_import):
+    assert run_export()["ctx"].status == "FINISHED"
+    assert run_import()["ctx"].status == "FINISHED"
+
+    # The placeholder of the missing Player 9 took id 6, the next Player of the bot takes it too.
+    assert rows(BALLSDEX["Player"])[6]["discord_id"] == 900000000000000009
+    fill(carfigures["Player"], {"id": 6, "discord_id": 200000000000000006})
+    fill(carfigures["Trade"], {"id": 2, "player1_id": 6, "player2_id": 1, "date": DATE + timedelta(days=1)})
+
+    assert run_export(DELTA=True)["ctx"].status == "FINISHED"
+    namespace = run_import()
+    assert namespace["ctx"].status == "FINISHED"
+    assert "- Moved 1 placeholder Players whose IDs are taken by new Players." in namespace["output"]
+
+    players = rows(BALLSDEX["Player"])
+    assert players[6]["discord_id"] == 200000000000000006
+    assert players[7]["discord_id"] == 900000000000000009
+    assert all(17 <= len(str(player["discord_id"])) <= 19 for player in players.values())
+
+    trades = rows(BALLSDEX["Trade"])
+    assert (trades[1]["player1_id"], trades[1]["player2_id"]) == (1, 7)
+    assert (trades[2]["player1_id"], trades[2]["player2_id"]) == (6, 1)
@@ -0,0 +1,122 @@
+"""
+The blocks of the migration file: the export's index and reading the file back whole or by section.
+
+The export runs on the in-memory models of `fakes.py`, see `conftest.py`.
+"""
+
+import asyncio
+import bz2
+import io
+import random
+
+import pytest
+
+from conftest import DATE, Context, fill, load_script
+
+
+def write_blocks(exporter, codec: str, workers: int, sections: dict[str, list[bytes]]) -> tuple[bytes, dict]:
+    """Write `sections` through a `BlockWriter` of 64-byte blocks, returning the file and its index."""
+    file = io.BytesIO()
+
+    async def write():
+        async with exporter["BlockWriter"](file, codec, workers, block_size=64) as f:
+            for key, writes in sections.items():
+                await f.start_section(key)
+                for data in writes:
+                    await f.write(data)
+                await f.end_section(len(writes))
+
+        return f.index
+
+    index = asyncio.run(write())
+    return file.getvalue(), index
+
+
+@pytest.mark.parametrize("codec, workers", [("bz2", 0), ("bz2", 2), ("gzip", 0), ("lzma", 0), ("none", 0)])
+def test_block_writer_index(exporter, codec, workers):
+    generator = random.Random(0)
+    sections = {
+        "B": [generator.randbytes(generator.randrange(1, 50)) for _ in range(12)],
+        "P": [b"x" * 200],
+        "T": [b"y"],
+    }
+
+    data, index = write_blocks(exporter, codec, workers, sections)
+
+    # Blocks follow each other and cover the whole file.
+    offset = 0
+    for block_offset, length, _ in index["blocks"]:
+        assert block_offset == offset
+        offset += length
+    assert index["size"] == offset == len(data)
+
+    # Sections start on a new block and their blocks hold exactly their bytes.
+    decompress = exporter["CODECS"][codec]["decompress"] or bytes
+    blocks = [decompress(data[offset : offset + length]) for offset, length, _ in index["blocks"]]
+    assert [len(block) for block in blocks] == [size for _, _, size in index["blocks"]]
+
+    offset = 0
+    for key, writes in sections.items():
+        section = index["sections"][key]
+        first, end = section["blocks"]
+        assert b"".join(blocks[first:end]) == b"".join(writes)
+        assert (section["rows"], section["offset"], section["size"]) == (len(writes), offset, len(b"".join(writes)))
+        offset += section["size"]
+
+    assert index["sections"]["B"]["blocks"][1] - index["sections"]["B"]["blocks"][0] > 1
+    assert index["sections"]["P"]["blocks"][1] - index["sections"]["P"]["blocks"][0] == 1
+
+    # The blocks are one multi-stream file for the codec's own decompression.
+    expected = b"".join(b"".join(writes) for writes in sections.values())
+    if codec != "none":
+        assert decompress(data) == expected
+
+
+def small_blocks(writer: type) -> type:
+    """The export's `BlockWriter` with 256-byte blocks, so sections span several blocks."""
+
+    class SmallBlocks(writer):
+        def __init__(self, file, codec, workers):
+            super().__init__(file, codec, workers, block_size=256)
+
+    return SmallBlocks
+
+
+@pytest.mark.parametrize("compression_workers, decompression_workers", [(0, 0), (2, 2)])
+def test_sections_read_on_their_own(carfigures, importer, compression_workers, decompression_workers):
+    fill(
+        carfigures["CarInstance"],
+        *({"id": pk, "car_id": pk % 3 + 1, "player_id": pk % 5 + 1, "catchDate": DATE} for pk in range(1, 301)),
+    )
+
+    exporter = load_script("export", Context(), WRITE_CHUNK_SIZE=50, COMPRESSION_WORKERS=compression_workers)
+    exporter["BlockWriter"] = small_blocks(exporter["BlockWriter"])
+    asyncio.run(exporter["main"]())
+    assert exporter["ctx"].status == "FINISHED"
+
+    importer["DECOMPRESSION_WORKERS"] = decompression_workers
+    reader = importer["MigrationReader"]("migration.txt.bz2")
+    stream = reader.open()
+    chunks = list(reader.column_chunks(stream))
+    stream.close()
+
+    sections = reader.index["sections"]
+    assert sections["BI"]["blocks"][1] - sections["BI"]["blocks"][0] > 1
+    assert reader.total_rows == sum(rows for _, rows, _ in chunks)
+
+    # Each section read on its own gives the chunks of the whole file's read.
+    for key, section in sections.items():
+        expected = [chunk for chunk in chunks if chunk[0] == key]
+        assert sum(rows for _, rows, _ in expected) == section["rows"], key
+
+        stream = reader.section_stream(key)
+        assert list(reader.column_chunks(stream)) == expected, key
+        stream.close()
+
+    assert reader.section_stream("X") is None
+
+    # The header and the blocks are one multi-stream file for `bz2` itself.
+    with bz2.open("migration.txt.bz2") as f:
+        data = f.read()
+    assert data.startswith(b"// Generated with 'CF-Migrator'")
+    assert data.endswith(b"\x00")
@@ -0,0 +1,103 @@
+"""
+Format 1 and format 2 must decode the rows they encode to the same values.
+
+Both scripts run on the in-memory models of `fakes.py`, see `conftest.py`.
+"""
+
+import os
+import struct
+
+import pytest
+
+from conftest import DATE, SkippedLog, decode, fill
+
+# 2024-03-06 12:30:45.123456 UTC.
+NEXT_DAY = DATE.replace(day=6)
+
+
+def rows(blocks: list) -> list[dict]:
+    return [row for block in blocks for row in block.dicts()]
+
+
+@pytest.fixture
+def exports(carfigures, run_export) -> dict[int, str]:
+    """The migration file of each format, of the same data."""
+    fill(
+        carfigures["CarInstance"],
+        {"id": 1, "car_id": 1, "player_id": 1, "catchDate": DATE, "server": 500000000000000001, "favorite": True},
+        {"id": 2, "car_id": 2, "player_id": 2, "catchDate": NEXT_DAY, "spawnedTime": DATE, "exclusive_id": 1, "event_id": 2},
+    )
+
+    paths = {}
+    for version in (1, 2):
+        namespace = run_export(FORMAT_VERSION=version)
+        assert namespace["ctx"].status == "FINISHED"
+
+        paths[version] = f"migration-{version}.txt.bz2"
+        os.replace("migration.txt.bz2", paths[version])
+
+    return paths
+
+
+def test_formats_decode_alike(importer, exports):
+    text = decode(importer, exports[1])
+    columns = decode(importer, exports[2])
+
+    assert text.keys() == columns.keys() == {"R", "E", "S-EV", "S-EX", "B", "P", "BI", "GC", "F", "BU", "T"}
+    for section in text:
+        assert rows(text[section]) == rows(columns[section]), section
+
+
+def test_round_trip(importer, exports):
+    sections = decode(importer, exports[2])
+    octavia, citroen, ferrari = rows(sections["B"])
+
+    # Text survives as is, line breaks and non-ASCII characters included, minus the static paths.
+    assert octavia["country"] == "Škoda Octavia"
+    assert octavia["capacity_description"] == "Fits a whole 🏠\nand more"
+    assert octavia["collection_card"] == "octavia.png"
+    assert citroen["credits"] == "Zoë"
+    assert rows(sections["S-EV"])[0]["catch_phrase"] == "Brr\nit's ❄️"
+    assert rows(sections["BU"])[0]["reason"] == "Spam ✉"
+    assert rows(sections["E"])[0] == {"id": 1, "icon": "cz.png", "name": "Česko", "_section": "E"}
+
+    # Values of every type.
+    assert octavia["created_at"] == DATE and octavia["created_at"].utcoffset().total_seconds() == 0
+    assert ferrari["created_at"] == NEXT_DAY
+    assert (octavia["emoji_id"], citroen["emoji_id"]) == (1180000000000000001, 123)
+    assert (octavia["rarity"], ferrari["rarity"]) == (0.25, 0.01)
+    assert citroen["enabled"] is False
+
+    # NULLs are kept, values equal to the export's defaults are left to the model's.
+    (block,) = sections["B"]
+    assert block.column("created_at") == [DATE, None, NEXT_DAY]
+    assert block.column("economy_id") == [1, importer["OMITTED"], importer["OMITTED"]]
+    assert "economy_id" not in citroen and "short_name" not in citroen and "tradeable" not in citroen
+    assert octavia["short_name"] == "Octavia" and ferrari["tradeable"] is False
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "2024-03-05 12:30:45.123456",  # Naive datetimes, exported in UTC.
+        "2024-03-05 12:30:45.123456+00:00",
+        "2024-03-05 14:30:45.123456+02:00",
+        "1709641845.123456",
+    ],
+)
+def test_datetime_matches(importer, text):
+    microseconds = (DATE - importer["EPOCH"]) // importer["timedelta"](microseconds=1)
+    columns = [
+        (b"q", bytes([2]), struct.pack("<q", 1)),  # STATE_VALUE
+        (b"t", bytes([2]), struct.pack("<q", microseconds)),
+        (b"q", bytes([2]), struct.pack("<q", 2)),
+        (b"q", bytes([2]), struct.pack("<q", 3)),
+    ]
+
+    v1 = importer["decode_line"](1, "T", f"1╵{text}╵2╵3", SkippedLog())
+    (v2,) = importer["decode_chunk"]("T", 1, columns, SkippedLog()).dicts()
+    del v2["_section"]
+
+    assert v1 == v2
+    assert v1["date"] == DATE
+    assert v1["date"].utcoffset() == v2["date"].utcoffset()
@@ -0,0 +1,217 @@
+"""
+Parts of the import: id sets, the bisection of failed inserts and resuming an interrupted import.
+
+The import runs on the in-memory models of `fakes.py`, see `conftest.py`.
+"""
+
+import asyncio
+import json
+import os
+import random
+from collections import Counter
+
+import fakes
+import pytest
+
+from conftest import fill, rows
+
+BALLSDEX = fakes.models("ballsdex")
+
+
+def test_id_set_matches_set(importer):
+    IdSet = importer["IdSet"]
+    generator = random.Random(0)
+
+    # Dense ids, ids far past the bitmap, negative ids and values that aren't ints.
+    values = [
+        *range(0, 3000, 3),
+        *(generator.randrange(10**12) for _ in range(50)),
+        -1, -(10**15), 70_000, 140_000, "12", None, 2.5,
+    ]
+    generator.shuffle(values)
+
+    ids = IdSet(values[:500])
+    expected = set(values[:500])
+
+    for value in values[500:]:
+        ids.add(value)
+        expected.add(value)
+
+    for value in generator.sample(values, 200):
+        ids.discard(value)
+        expected.discard(value)
+
+    assert len(ids) == len(expected)
+    probes = [*values, *range(-5, 3005), 10**12 + 1, "13", 3.5]
+    assert ids.isin(probes) == [value in expected for value in probes]
+    assert all((value in ids) == (value in expected) for value in probes)
+
+
+def test_id_set_grows_over_sparse_ids(importer):
+    IdSet = importer["IdSet"]
+
+    # An id past the bitmap goes in the plain set, until the bitmap grows over it.
+    ids = IdSet([1, 2])
+    ids.add(200_000)
+    assert 200_000 in ids.sparse
+
+    ids.update(range(0, 200_001, 2))
+    assert not ids.sparse
+    assert len(ids) == 100_002
+    assert 200_000 in ids and 199_999 not in ids and 3 not in ids
+
+
+def test_id_set_merges_and_removes(importer):
+    IdSet = importer["IdSet"]
+
+    merged = IdSet([1, 5, 10**13, -4])
+    merged.update(IdSet([5, 6, 100_000, "x"]))
+    assert len(merged) == 7
+    assert merged.isin([1, 5, 6, 100_000, 10**13, -4, "x", 7]) == [True] * 7 + [False]
+
+    merged -= [5, 10**13, "x", 8]
+    assert len(merged) == 4
+    assert merged.isin([1, 5, 6, 100_000, 10**13, -4, "x"]) == [True, False, True, True, False, True, False]
+
+
+def balls(*countries: str, regime_id: int = 1) -> list[dict]:
+    return [
+        {
+            "country": country, "regime_id": regime_id, "health": 100, "attack": 100, "rarity": 1.0,
+            "emoji_id": 100000000000000000, "wild_card": "w.png", "collection_card": "c.png", "credits": "me",
+            "capacity_name": "name", "capacity_description": "description",
+        }
+        for country in countries
+    ]
+
+
+def read_log(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("upsert", [False, True])
+def test_insert_chunk_isolates_failed_rows(importer, monkeypatch, upsert):
+    Ball = BALLSDEX["Ball"]
+    fill(BALLSDEX["Regime"], {"id": 1, "name": "Regime", "background": "r.png"})
+    fill(Ball, {"id": 1, **balls("Old")[0]})
+
+    # Ball 4 references a missing Regime and Ball 7 has the name of Ball 2, both fail on insert.
+    chunk = [
+        Ball(id=pk, **row)
+        for pk, row in enumerate(balls("A", "B", "C", "D", "E", "F", "B", "H", regime_id=1), start=2)
+    ]
+    chunk[2].regime_id = 99
+
+    calls = []
+    bulk_create = Ball.bulk_create
+
+    async def counted(*args, **kwargs):
+        calls.append(len(args[0]))
+        return await bulk_create(*args, **kwargs)
+
+    monkeypatch.setattr(Ball, "bulk_create", counted)
+
+    skipped_log = importer["EventLog"]("skipped.jsonl")
+    failed = set()
+    asyncio.run(importer["insert_chunk"](Ball, chunk, skipped_log, failed, upsert))
+    skipped_log.close()
+
+    assert failed == {4, 8}
+    assert sorted(rows(Ball)) == [1, 2, 3, 5, 6, 7, 9]
+    # Halving finds both rows without trying every row on its own.
+    assert calls[0] == 8 and len(calls) < 2 * len(chunk)
+
+    events = [event for event in read_log("skipped.jsonl") if event["event"] == "skipped"]
+    assert [(event["id"], event["reason"]) for event in events] == [(4, "insert_failed"), (8, "insert_failed")]
+
+
+def test_insert_chunk_upserts(importer):
+    Ball = BALLSDEX["Ball"]
+    fill(BALLSDEX["Regime"], {"id": 1, "name": "Regime", "background": "r.png"})
+    fill(Ball, {"id": 1, **balls("Old")[0]})
+
+    chunk = [Ball(id=pk, **row) for pk, row in enumerate(balls("New", "Other"), start=1)]
+    skipped_log = importer["EventLog"]("skipped.jsonl")
+    failed = set()
+
+    # A plain insert of an existing row fails, an upsert updates it.
+    asyncio.run(importer["insert_chunk"](Ball, chunk, skipped_log, failed))
+    assert failed == {1}
+    assert rows(Ball)[1]["country"] == "Old"
+
+    failed.clear()
+    asyncio.run(importer["insert_chunk"](Ball, chunk, skipped_log, failed, True))
+    skipped_log.close()
+
+    assert not failed
+
+    assert {pk: row["country"] for pk, row in rows(Ball).items()} == {1: "New", 2: "Other"}
+
+
+@pytest.fixture
+def players(carfigures) -> dict:
+    """More Players than fit in one insert transaction, Player 9 is still missing."""
+    fill(carfigures["Player"], *({"id": pk, "discord_id": 200000000000000000 + pk} for pk in range(10, 26)))
+    return carfigures
+
+
+# Import settings that make every model take several small transactions.
+SMALL_BATCHES = {"INSERT_BATCH_SIZE": 4, "INSERT_TARGET_SECONDS": 0}
+
+
+@pytest.mark.parametrize("model, failing_call", [("Player", 3), ("Trade", 1)])
+def test_resume(players, run_export, run_import, monkeypatch, model, failing_call):
+    assert run_export()["ctx"].status == "FINISHED"
+
+    Player = BALLSDEX["Player"]
+    failing = BALLSDEX[model]
+    inserted = Counter()
+    calls = []
+
+    def track(target):
+        bulk_create = target.bulk_create
+
+        async def tracked(objects, *args, **kwargs):
+            calls.append(target)
+            if target is failing and calls.count(target) == failing_call and not resumed:
+                raise fakes.OperationalError("connection lost")
+
+            result = await bulk_create(objects, *args, **kwargs)
+            inserted.update((target.__name__, instance.pk) for instance in objects)
+            return result
+
+        monkeypatch.setattr(target, "bulk_create", tracked)
+
+    resumed = False
+    for target in {Player, failing}:
+        track(target)
+
+    with pytest.raises(fakes.OperationalError):
+        run_import(**SMALL_BATCHES)
+
+    with open("migration_checkpoint.json", encoding="utf-8") as f:
+        journal = json.load(f)["models"]
+    assert journal.get(model, {"done": False})["done"] is False
+    if model == "Player":
+        # The first transaction was committed, Player 0 is created before the import's journal.
+        assert journal["Player"]["committed"] == 4
+
+    resumed = True
+    namespace = run_import("resume", **SMALL_BATCHES)
+    assert namespace["ctx"].status == "FINISHED"
+    assert "- Resuming the interrupted import..." in namespace["output"]
+    assert not os.path.exists("migration_checkpoint.json")
+
+    # Nothing the interrupted import committed was inserted again.
+    assert max(inserted.values()) == 1
+    if model == "Trade":
+        assert "- Created 0 placeholder Players for missing Player references, reused 1 from an earlier run." in namespace["output"]
+
+    resumed_rows = {name: rows(table) for name, table in BALLSDEX.items()}
+    assert len(resumed_rows["Player"]) == 23  # Player 0, 21 Players and the placeholder of Player 9.
+
+    # The same file imported in one go gives the same tables.
+    fakes.reset()
+    assert run_import(**SMALL_BATCHES)["ctx"].status == "FINISHED"
+    assert {name: rows(table) for name, table in BALLSDEX.items()} == resumed_rows